@@ -4,7 +4,6 @@ from jinja2 import Environment, FileSystemLoader
 from loguru import logger
 from flask import Flask, redirect
 from flask_cors import CORS
-from pymodbus.client.sync import ModbusSerialClient
 from application.data.analyzer import TimeWindowDataStore
 from config import load_config
 from flask_sqlalchemy import SQLAlchemy
@@ -66,18 +65,7 @@ try:
     db = SQLAlchemy(app)
     # 允许所有来源的跨域请求
     CORS(app)
-    # 初始化Modbus客户端
-    modbus_client = ModbusSerialClient(
-        method='rtu',
-        port='/dev/ttyCOM5',
-        baudrate=9600,
-        parity='N',
-        stopbits=1,
-        bytesize=8,
-        timeout=3
-    )
-    if not modbus_client.connect():
-        logger.error("Modbus init connection failed")
+    # Modbus客户端由采集引擎按设备表（modbus.ports）逐链路创建
     # max_size = int(Config.ROLLING_WINDOW * 60 / (Config.INTERVAL / 60))
     # # 初始化数据分析器
     # data_analyzer = TimeWindowDataStore(Config.ROLLING_WINDOW)
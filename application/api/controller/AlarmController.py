@@ -26,7 +26,7 @@ def get_alarm_list():
         'confined': (query.pageNumber - 1) * query.pageSize,
         'offset': query.pageSize
     })
-    results = db.session.execute(alarm_list).fetchall()
+    results = db.session.execute(alarm_list, {"startTime": query.startTime, "endTime": query.endTime}).fetchall()
     # 将结果转换为 JSON 格式并返回
     items_json = [{
             "id": item.id,
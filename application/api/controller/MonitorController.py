@@ -1,14 +1,53 @@
+from datetime import datetime
 from flask import Blueprint, request
-from application import db
+from application import app, db
 from application.api.models.alert import Alert
 from application.base import Result, DataResult, PageResult
 from application.base.AnalysisParam import Param, get_post_data
+from application.data.collector import ingest_executor, polling_engine
+from application.data.deadband import step_hold
+from application.data.processor import well_data_deadband
+from application.data.rollup import well_data_rollups
 from application.utils.database import render_sql, file_name
-from application.utils.tools import handle_exceptions
+from application.utils.downsample import downsample
+from application.utils.tools import handle_exceptions, parse_time_range
 
 monitor_bp = Blueprint('monitor', __name__, url_prefix='/monitor')
 
 
+def hold_series(results, field: str, start: datetime, end: datetime, query) -> list:
+    """
+    按采样保持还原曲线数据（死区过滤后两次写入之间的值保持不变），传入 maxPoints 时降采样
+    :param results: 按时间排序的查询结果，包含窗口起点之前的最后一条数据
+    :param field: 字段名称
+    :param query: 请求参数，包含 maxPoints / downsample
+    """
+    points = step_hold(((row.createTime, getattr(row, field)) for row in results), start, end)
+    if query.maxPoints and len(points) > query.maxPoints:
+        indexes = downsample([time_value.timestamp() for time_value, _ in points],
+                             [float(value) for _, value in points],
+                             query.maxPoints, query.downsample or "lttb")
+        points = [points[i] for i in indexes]
+    return [{"time": time_value.strftime("%Y-%m-%d %H:%M:%S"), "value": round(float(value), 2)}
+            for time_value, value in points]
+
+
+def query_series(template: str, query) -> tuple:
+    """
+    按井号与时间范围（默认最近24小时）查询曲线数据，返回 (查询结果, 开始时间, 结束时间)
+    原始数据点数超过上限时改用满足点数的最细汇总粒度（时间桶平均值）
+    """
+    start, end = parse_time_range(query.startTime, query.endTime)
+    if app.config["ROLLUP_ENABLED"]:
+        resolution = well_data_rollups.pick_resolution(start, end, app.config["ROLLUP_MAX_POINTS"],
+                                                       app.config["INTERVAL"])
+        if resolution is not None:
+            return well_data_rollups.series(db.session, start, end, resolution, query.code), start, end
+    sql = render_sql(file_name(template), {"code": query.code})
+    results = db.session.execute(sql, {"code": query.code, "start_time": start, "end_time": end}).fetchall()
+    return results, start, end
+
+
 @monitor_bp.route('/status', methods=['GET'])
 @handle_exceptions(msg="获取设备在线状态失败！")
 def get_status():
@@ -34,62 +73,59 @@ def get_alerts():
     return Result.success(data)
 
 
+@monitor_bp.route('/ingest', methods=['GET'])
+@handle_exceptions(msg="获取入库队列状态失败！")
+def get_ingest():
+    data = ingest_executor.metrics()
+    if well_data_deadband is not None:
+        data["deadband"] = well_data_deadband.metrics()
+    return DataResult.success(data=data)
+
+
+@monitor_bp.route('/acquisition', methods=['GET'])
+@handle_exceptions(msg="获取采集调度状态失败！")
+def get_acquisition():
+    return DataResult.success(data=polling_engine.metrics())
+
+
 @monitor_bp.route('/device', methods=['GET'])
 @handle_exceptions(msg="获取数据流失败！")
 def get_device():
     params = [
         Param(name='code', param_type=str, required=True),
         Param(name='startTime', param_type=str, required=False),
-        Param(name='endTime', param_type=str, required=False)
+        Param(name='endTime', param_type=str, required=False),
+        Param(name='maxPoints', param_type=int, required=False),
+        Param(name='downsample', param_type=str, required=False)
     ]
 
-    data_list = render_sql(file_name('water_cut'))
-    results = db.session.execute(data_list).fetchall()
+    query = get_post_data(request, params)
+    results, start, end = query_series('water_cut', query)
 
-    # 按照指定格式组织数据
+    # 按照指定格式组织数据，曲线按阶梯（采样保持）绘制
     data = [
         {
-            "data": [],
-            "name": "gas flow rate(m³)"
+            "data": hold_series(results, "gas_flow_rate", start, end, query),
+            "name": "gas flow rate(m³)",
+            "step": "end"
         },
         {
-            "data": [],
-            "name": "liquid flow rate(m³)"
+            "data": hold_series(results, "liquid_flow_rate", start, end, query),
+            "name": "liquid flow rate(m³)",
+            "step": "end"
         },
         {
-            "data": [],
-            "name": "oil flow rate(m³)"
+            "data": hold_series(results, "oil_flow_rate", start, end, query),
+            "name": "oil flow rate(m³)",
+            "step": "end"
         },
         {
-            "data": [],
-            "name": "water flow rate(m³)"
+            "data": hold_series(results, "water_flow_rate", start, end, query),
+            "name": "water flow rate(m³)",
+            "step": "end"
         }
     ]
 
-    # 将查询结果填充到数据结构中
-    for row in results:
-        gas_value = round(float(row.gas_flow_rate), 2)
-        liquid_value = round(float(row.liquid_flow_rate), 2)
-        oil_value = round(float(row.oil_flow_rate), 2)
-        water_value = round(float(row.water_flow_rate), 2)
-        time_value = row.createTime.strftime("%Y-%m-%d %H:%M:%S")
-        data[0]["data"].append({
-            "time": time_value,
-            "value": gas_value
-        })
-        data[1]["data"].append({
-            "time": time_value,
-            "value": liquid_value
-        })
-        data[2]["data"].append({
-            "time": time_value,
-            "value": oil_value
-        })
-        data[3]["data"].append({
-            "time": time_value,
-            "value": water_value
-        })
-
     return DataResult.success(data=data)
 
 
@@ -108,18 +144,20 @@ def get_database():
 @handle_exceptions(msg="获取温度数据失败！")
 def get_temperature():
     params = [
-        Param(name='code', param_type=str, required=False),
+        Param(name='code', param_type=str, required=True),
         Param(name='startTime', param_type=str, required=False),
-        Param(name='endTime', param_type=str, required=False)
+        Param(name='endTime', param_type=str, required=False),
+        Param(name='maxPoints', param_type=int, required=False),
+        Param(name='downsample', param_type=str, required=False)
     ]
-    data_list = render_sql(file_name('temperature_list'))
-    results = db.session.execute(data_list).fetchall()
+    query = get_post_data(request, params)
+    results, start, end = query_series('temperature_list', query)
 
     # 按照指定格式组织数据
     data = {
-            "data": [{'time': item.createTime.strftime("%Y-%m-%d %H:%M:%S"),
-                      'value': round(float(item.temperature), 2)} for item in results],
-            "name": "temperature(℃)"
+            "data": hold_series(results, "temperature", start, end, query),
+            "name": "temperature(℃)",
+            "step": "end"
         }
     return DataResult.success(data=data)
 
@@ -130,47 +168,31 @@ def get_transmitter():
     params = [
         Param(name='code', param_type=str, required=True),
         Param(name='startTime', param_type=str, required=False),
-        Param(name='endTime', param_type=str, required=False)
+        Param(name='endTime', param_type=str, required=False),
+        Param(name='maxPoints', param_type=int, required=False),
+        Param(name='downsample', param_type=str, required=False)
     ]
     query = get_post_data(request, params)
-
-    data_list = render_sql(file_name('transmitter'))
-    results = db.session.execute(data_list).fetchall()
+    results, start, end = query_series('transmitter', query)
 
     # 按照指定格式组织数据
     data = [
         {
-            "data": [],
+            "data": hold_series(results, "dp", start, end, query),
             "name": "Differential Pressure DP(kPa)",
             "threshold": 500,
-            "yAxisIndex": 0
+            "yAxisIndex": 0,
+            "step": "end"
         },
         {
-            "data": [],
+            "data": hold_series(results, "pressure", start, end, query),
             "name": "Pressure(psi)",
             "threshold": 4600,
-            "yAxisIndex": 1
+            "yAxisIndex": 1,
+            "step": "end"
         }
     ]
 
-    # 将查询结果填充到数据结构中
-    for row in results:
-        dp_value = round(float(row.dp), 2)
-        pressure_value = round(float(row.pressure), 2)
-        time_value = row.createTime.strftime("%Y-%m-%d %H:%M:%S")
-
-        # 添加DP数据
-        data[0]["data"].append({
-            "time": time_value,
-            "value": dp_value
-        })
-
-        # 添加Pressure数据
-        data[1]["data"].append({
-            "time": time_value,
-            "value": pressure_value
-        })
-
     return DataResult.success(data=data)
 
 
@@ -3,6 +3,10 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Set, Tuple
 import logging
 from collections import defaultdict
+from application.data.analyzer import TimeWindowDataStore
+from application.data.flatline import DEFAULT_FLATLINE_RULES
+from application.data.models import Alert, AlertType, DataPoint
+from application.data.rules import FLATLINE, THRESHOLD, RuleEngine, parse_rules
 
 logger = logging.getLogger(__name__)
 
@@ -20,14 +24,30 @@ class AlertManager:
         self.interruption_periods: Dict[str, List[Tuple[datetime, datetime]]] = defaultdict(list)
         self.last_data_time: Dict[str, datetime] = {}
 
-        # 温度平线检测
-        self.temperature_history: Dict[str, List[Tuple[datetime, float]]] = defaultdict(list)
+        # 告警规则：差压、压力阈值与温度平线（10分钟内变化不超过0.01度），可由 config.alert_rules 定义
+        self.rules = RuleEngine(parse_rules(getattr(config, "alert_rules", None) or self._default_rules(config)))
+        self.flatline = self.rules.flatline
+
+    @staticmethod
+    def _default_rules(config) -> List[dict]:
+        return [
+            {"kind": THRESHOLD, "field": "dp", "op": ">", "value": config.dp_threshold,  # 500 kPa
+             "alert_type": AlertType.DP_THRESHOLD.name, "severity": "critical",
+             "message": "设备 {device_id} 差压 {value:.1f}kPa > {threshold:g}kPa"},
+            {"kind": THRESHOLD, "field": "pressure", "op": ">", "value": config.pressure_threshold,  # 4600 psi
+             "alert_type": AlertType.PRESSURE_THRESHOLD.name, "severity": "critical",
+             "message": "设备 {device_id} 压力 {value:.1f}psi > {threshold:g}psi"},
+            {"kind": FLATLINE, "field": "temperature", **DEFAULT_FLATLINE_RULES["temperature"],
+             "alert_type": AlertType.TEMPERATURE_FLATLINE.name, "severity": "warning",
+             "message": "设备 {device_id} 温度连续{minutes:.0f}分钟无变化"},
+        ]
 
     def process_data_point(self, device_id: str, data_point: DataPoint) -> List[Alert]:
         """处理数据点，返回所有触发的告警"""
         alerts = []
 
-        # 1. 存储数据
+        # 1. 存储数据（先与已有数据比对是否重复，再写入）
+        duplicate = self._check_duplicate_data(device_id, data_point)
         self.data_store.add_data(device_id, data_point)
 
         # 2. 更新最后数据时间（用于中断检测）
@@ -35,7 +55,7 @@ class AlertManager:
 
         # 3. 检查所有告警条件
         # 3.1 重复数据检测
-        if self._check_duplicate_data(device_id, data_point):
+        if duplicate:
             alerts.append(self._create_alert(
                 device_id, AlertType.DUPLICATE_DATA,
                 f"设备 {device_id} 检测到重复数据",
@@ -51,27 +71,11 @@ class AlertManager:
                 "warning"
             ))
 
-        # 3.3 变送器阈值检测
-        if data_point.dp > self.config.dp_threshold:  # 500 kPa
-            alerts.append(self._create_alert(
-                device_id, AlertType.DP_THRESHOLD,
-                f"设备 {device_id} 差压 {data_point.dp:.1f}kPa > 500kPa",
-                "critical"
-            ))
-
-        if data_point.pressure > self.config.pressure_threshold:  # 4600 psi
+        # 3.3 规则告警（变送器阈值、温度平线等），逐样本处理时只评估当前设备
+        self.rules.update(device_id, datetime.now().timestamp(), vars(data_point))
+        for hit in self.rules.evaluate(device_id=device_id):
             alerts.append(self._create_alert(
-                device_id, AlertType.PRESSURE_THRESHOLD,
-                f"设备 {device_id} 压力 {data_point.pressure:.1f}psi > 4600psi",
-                "critical"
-            ))
-
-        # 3.4 温度平线检测
-        if self._check_temperature_flatline(device_id, data_point):
-            alerts.append(self._create_alert(
-                device_id, AlertType.TEMPERATURE_FLATLINE,
-                f"设备 {device_id} 温度连续10分钟无变化",
-                "warning"
+                device_id, AlertType[hit.rule.alert_type], hit.message, hit.rule.severity
             ))
 
         # 4. 应用告警抑制
@@ -85,44 +89,13 @@ class AlertManager:
         return alerts
 
     def _check_duplicate_data(self, device_id: str, new_point: DataPoint) -> bool:
-        """检查重复数据"""
-        recent_data = self.data_store.get_data_in_window(
-            device_id,
-            start_time=datetime.now() - timedelta(minutes=5)  # 检查最近5分钟
-        )
-
-        for point in recent_data[-10:]:  # 检查最近10个点
-            if (abs((point.timestamp - new_point.timestamp).total_seconds()) < 1 and
-                    point.content_hash() == new_point.content_hash()):
-                return True
-        return False
-
-    def _check_temperature_flatline(self, device_id: str,
-                                    current_point: DataPoint) -> bool:
-        """检查温度平线"""
-        # 维护最近10分钟的温度记录
-        history = self.temperature_history[device_id]
-        now = datetime.now()
-
-        # 添加当前温度
-        history.append((now, current_point.temperature))
-
-        # 清理10分钟前的数据
-        cutoff = now - timedelta(minutes=10)
-        self.temperature_history[device_id] = [
-            (ts, temp) for ts, temp in history if ts >= cutoff
-        ]
-
-        # 检查是否有足够数据
-        if len(history) < 10:  # 每分钟一个点，需要10个点
-            return False
+        """检查重复数据，需在写入 new_point 之前调用"""
+        # 检查最近5分钟内的最近10个点，从窗口尾部查找
+        recent_data = self.data_store.get_recent_data(device_id, seconds=300, limit=10)
 
-        # 检查温度变化
-        temps = [temp for _, temp in history[-10:]]
-        if all(abs(t - temps[0]) < 0.01 for t in temps):  # 变化小于0.01度
-            return True
-
-        return False
+        # 同一秒内内容相同视为重复
+        new_fingerprint = new_point.fingerprint()
+        return any(point.fingerprint() == new_fingerprint for point in recent_data)
 
     def _update_last_data_time(self, device_id: str, timestamp: datetime):
         """更新最后数据时间，检测中断"""
@@ -185,4 +158,12 @@ class AlertManager:
         """获取24小时内的中断时间段"""
         cutoff = datetime.now() - timedelta(hours=24)
         periods = self.interruption_periods.get(device_id, [])
-        return [(start, end) for start, end in periods if end >= cutoff]
\ No newline at end of file
+        return [(start, end) for start, end in periods if end >= cutoff]
+
+    def dump_state(self) -> dict:
+        """状态快照：窗口数据、滚动统计、采样时隙与平线检测，可注册到 StateCheckpoint"""
+        return {"data_store": self.data_store.dump_state(), "flatline": self.flatline.dump_state()}
+
+    def load_state(self, state: dict):
+        self.data_store.load_state(state["data_store"])
+        self.flatline.load_state(state["flatline"])
@@ -1,89 +1,239 @@
+import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
-from collections import deque, defaultdict
-import statistics
+import numpy as np
 from application import logger
+from application.data.lock_stripes import LockStripes
 from application.data.models import DataPoint
+from application.data.ring_buffer import ColumnarRingBuffer, from_millis, to_millis
+from application.data.rolling import MEASUREMENT_FIELDS, RollingWindow
+from application.data.slot_bitmap import SlotBitmap
 
 
 class TimeWindowDataStore:
-    """时间窗口数据存储，支持滑动窗口清理"""
+    """
+    时间窗口数据存储，支持滑动窗口清理
 
-    def __init__(self, window_hours: int = 24):
+    每台设备一个列式环形缓冲区（int64 毫秒时间戳 + 每个测量字段一个数值数组），
+    窗口查询为向量化运算。
+
+    线程安全：同一设备的写入（及会移除过期数据的统计查询）持有该设备所在分段的锁，不同设备可并发写入；
+    窗口数据查询不加锁，由环形缓冲区的顺序锁得到一致的拷贝，不阻塞入库线程。
+
+    :param window_hours: 窗口长度 单位:小时
+    :param capacity: 每台设备最多保存的数据点个数
+    :param dtype: 测量字段的数值类型
+    :param slot_seconds: 采集间隔 单位:秒，用于按时隙统计缺失率
+    """
+
+    def __init__(self, window_hours: int = 24, capacity: int = 10000, dtype=np.float32,
+                 slot_seconds: int = 60):
         self.window_hours = window_hours
+        self.capacity = capacity
+        self.dtype = dtype
+        self.slot_seconds = slot_seconds
         # 按设备存储数据点
-        self.data: Dict[str, deque] = defaultdict(lambda: deque(maxlen=10000))
-        # 数据统计缓存
-        self.stats_cache: Dict[str, dict] = {}
-        self.cache_valid_minutes = 5
+        self.data: Dict[str, ColumnarRingBuffer] = {}
+        # 按设备维护窗口内各字段的滚动统计，与 data 同步增删
+        self.stats: Dict[str, RollingWindow] = {}
+        # 按设备记录每个采集时隙是否收到数据
+        self.slots: Dict[str, SlotBitmap] = {}
         self.last_update_time: Dict[str, datetime] = {}
+        # 设备级分段锁；_registry_lock 只在首次出现新设备时用于创建其数据结构
+        self._locks = LockStripes()
+        self._registry_lock = threading.Lock()
+
+    def _ensure_device(self, device_id: str) -> ColumnarRingBuffer:
+        """创建设备的数据结构，data 最后写入，保证 device_id in data 时其余结构均已存在"""
+        buffer = self.data.get(device_id)
+        if buffer is not None:
+            return buffer
+        with self._registry_lock:
+            if device_id not in self.data:
+                self.stats[device_id] = RollingWindow()
+                self.slots[device_id] = SlotBitmap(self.slot_seconds, self.window_hours * 3600)
+                self.data[device_id] = ColumnarRingBuffer(self.capacity, MEASUREMENT_FIELDS, self.dtype)
+            return self.data[device_id]
 
     def add_data(self, device_id: str, data_point: DataPoint):
         """添加数据点并清理旧数据"""
-        buffer = self.data[device_id]
-        buffer.append(data_point)
-        self._clean_old_data(device_id)
-        self.stats_cache.pop(device_id, None)  # 使缓存失效
+        buffer = self._ensure_device(device_id)
+        with self._locks(device_id):
+            stats = self.stats[device_id]
+            # 缓冲区已满时覆盖最早的数据点，同步移出统计
+            evicted = buffer.append(to_millis(data_point.timestamp), vars(data_point))
+            if evicted is not None:
+                stats.pop(evicted)
+            # 按缓冲区中存储的值（已转为 dtype）入统计，保证与移出时一致
+            stats.push(buffer.row(-1))
+            self.slots[device_id].mark(data_point.timestamp.timestamp())
+            self._clean_old_data(device_id)
+            stats.resync(buffer.column)
+
+    def load_history(self, device_id: str, points: List[DataPoint]):
+        """批量加载按时间排序的历史数据（启动预热），只保留窗口内的数据"""
+        cutoff_time = datetime.now() - timedelta(hours=self.window_hours)
+        with self._locks(device_id):
+            for data_point in points:
+                if data_point.timestamp >= cutoff_time:
+                    self.add_data(device_id, data_point)
+
+    def dump_state(self) -> dict:
+        state = {}
+        for device_id, buffer in list(self.data.items()):
+            with self._locks(device_id):
+                state[device_id] = {"buffer": buffer.dump_state(), "stats": self.stats[device_id].dump_state(),
+                                    "slots": self.slots[device_id].dump_state()}
+        return state
+
+    def load_state(self, state: dict):
+        """由快照恢复各设备的缓冲区、滚动统计与时隙位图，随后移除已过期的数据"""
+        for device_id, device in state.items():
+            buffer = self._ensure_device(device_id)
+            with self._locks(device_id):
+                buffer.load_state(device["buffer"])
+                if len(buffer) == len(device["buffer"]["timestamps"]):
+                    self.stats[device_id].load_state(device["stats"])
+                else:
+                    # 快照超出当前容量时被截断，滚动统计按保留的数据重新计算
+                    stats = self.stats[device_id] = RollingWindow()
+                    for index in range(len(buffer)):
+                        stats.push(buffer.row(index))
+                slots = self.slots[device_id]
+                if device["slots"]["interval"] == slots.interval and len(device["slots"]["bytes"]) * 8 == slots.bits:
+                    slots.load_state(device["slots"])
+                self._clean_old_data(device_id)
 
     def _clean_old_data(self, device_id: str):
-        """清理超过时间窗口的旧数据"""
-        cutoff_time = datetime.now() - timedelta(hours=self.window_hours)
+        """清理超过时间窗口的旧数据，调用方持有设备锁"""
+        cutoff_time = to_millis(datetime.now() - timedelta(hours=self.window_hours))
         buffer = self.data[device_id]
+        stats = self.stats[device_id]
 
         # 从左侧移除旧数据
-        while buffer and buffer[0].timestamp < cutoff_time:
-            buffer.popleft()
+        while len(buffer) and buffer.first_timestamp() < cutoff_time:
+            stats.pop(buffer.popleft())
+
+    def get_window_arrays(self, device_id: str,
+                          start_time: datetime = None,
+                          end_time: datetime = None) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        获取指定时间窗口内的毫秒时间戳与各字段数组（一致性拷贝，无锁读取）
+
+        :param start_time: 默认为窗口起点
+        :param end_time: 默认为当前时间
+        """
+        if start_time is None:
+            start_time = datetime.now() - timedelta(hours=self.window_hours)
+        if end_time is None:
+            end_time = datetime.now()
+        if device_id not in self.data:
+            return np.empty(0, dtype=np.int64), {field: np.empty(0, dtype=self.dtype)
+                                                 for field in MEASUREMENT_FIELDS}
+        return self.data[device_id].window_copy(to_millis(start_time), to_millis(end_time))
 
     def get_data_in_window(self, device_id: str,
                            start_time: datetime = None,
                            end_time: datetime = None) -> List[DataPoint]:
-        """获取指定时间窗口内的数据"""
-        if device_id not in self.data:
-            return []
+        """获取指定时间窗口内的数据（二分定位，O(log n + k)）"""
+        return self._to_points(device_id, *self.get_window_arrays(device_id, start_time, end_time))
 
-        if start_time is None:
-            start_time = datetime.now() - timedelta(hours=self.window_hours)
-        if end_time is None:
-            end_time = datetime.now()
+    def get_recent_data(self, device_id: str, seconds: float,
+                        limit: int = None) -> List[DataPoint]:
+        """
+        获取最近 seconds 秒内的数据，从尾部查找，只与结果个数有关
 
+        :param limit: 只返回最近的 limit 个数据点
+        """
+        if device_id not in self.data:
+            return []
+        timestamps, columns = self.data[device_id].tail_copy(to_millis(datetime.now() - timedelta(seconds=seconds)))
+        if limit is not None:
+            timestamps = timestamps[-limit:]
+            columns = {field: column[-limit:] for field, column in columns.items()}
+        return self._to_points(device_id, timestamps, columns)
+
+    @staticmethod
+    def _to_points(device_id: str, timestamps: np.ndarray,
+                   columns: Dict[str, np.ndarray]) -> List[DataPoint]:
+        values = {field: column.tolist() for field, column in columns.items()}
         return [
-            point for point in self.data[device_id]
-            if start_time <= point.timestamp <= end_time
+            DataPoint(device_id=device_id, timestamp=from_millis(timestamp),
+                      **{field: values[field][i] for field in MEASUREMENT_FIELDS})
+            for i, timestamp in enumerate(timestamps.tolist())
         ]
 
     def calculate_data_loss_rate(self, device_id: str,
-                                 expected_interval_minutes: int = 1) -> float:
-        """计算数据丢失率"""
-        data_points = list(self.data[device_id])
-        if len(data_points) < 2:
+                                 expected_interval_minutes: int = 1,
+                                 hours: float = None) -> float:
+        """
+        计算数据丢失率，采集间隔与时隙一致时按时隙位图统计
+
+        :param hours: 统计最近多少小时，默认为整个窗口
+        """
+        if device_id not in self.data:
             return 1.0
+        if expected_interval_minutes * 60 == self.slot_seconds:
+            with self._locks(device_id):
+                return self.slots[device_id].loss_rate((hours or self.window_hours) * 3600)
 
-        # 按时间排序
-        sorted_points = sorted(data_points, key=lambda x: x.timestamp)
+        actual_count = len(self.data[device_id])
+        if actual_count < 2:
+            return 1.0
 
         # 计算总时间范围和期望数据点数
         total_minutes = self.window_hours * 60
         expected_count = total_minutes / expected_interval_minutes
 
-        # 统计实际数据点
-        actual_count = len(sorted_points)
-
         if expected_count == 0:
             return 0.0
 
         loss_rate = max(0.0, 1 - (actual_count / expected_count))
         return round(loss_rate, 4)
 
+    def get_data_gaps(self, device_id: str, hours: float = None) -> List[Tuple[datetime, datetime]]:
+        """最近 hours 小时内连续缺失数据的时间段"""
+        if device_id not in self.data:
+            return []
+        with self._locks(device_id):
+            gaps = self.slots[device_id].gaps((hours or self.window_hours) * 3600)
+        return [(datetime.fromtimestamp(start), datetime.fromtimestamp(end)) for start, end in gaps]
+
+    def get_longest_interruption(self, device_id: str, hours: float = None) -> timedelta:
+        """最近 hours 小时内最长的连续缺失时长"""
+        if device_id not in self.data:
+            return timedelta(0)
+        with self._locks(device_id):
+            return timedelta(seconds=self.slots[device_id].longest_gap((hours or self.window_hours) * 3600))
+
+    def get_rolling_stats(self, device_id: str, field: str) -> Optional[dict]:
+        """
+        窗口内某字段的滚动统计快照（count / mean / variance / std / min / max，均为 O(1)），会先移除过期数据
+        """
+        if device_id not in self.data:
+            return None
+        with self._locks(device_id):
+            self._clean_old_data(device_id)
+            stats = self.stats[device_id].get(field)
+            return stats.snapshot() if stats else None
+
+    def get_water_cut_rolling_avg(self, device_id: str) -> Optional[float]:
+        """窗口内含水率滚动平均值"""
+        stats = self.get_rolling_stats(device_id, "water_cut")
+        return stats["mean"] if stats else None
+
     def get_water_cut_average(self, device_id: str,
                               hours: int = 24) -> Optional[float]:
         """获取指定小时数的含水率平均值"""
-        cutoff_time = datetime.now() - timedelta(hours=hours)
-        data_points = [
-            point for point in self.data[device_id]
-            if point.timestamp >= cutoff_time
-        ]
+        if hours >= self.window_hours:
+            return self.get_water_cut_rolling_avg(device_id)
 
-        if not data_points:
+        if device_id not in self.data:
+            return None
+        _, columns = self.data[device_id].window_copy(to_millis(datetime.now() - timedelta(hours=hours)))
+        water_cut = columns["water_cut"]
+        water_cut = water_cut[~np.isnan(water_cut)]
+        if not len(water_cut):
             return None
 
-        return statistics.mean(point.water_cut for point in data_points)
\ No newline at end of file
+        return float(water_cut.mean(dtype=np.float64))
@@ -0,0 +1,135 @@
+import threading
+import time
+from typing import Dict, Optional
+
+# 熔断器状态
+STATE_CLOSED = "closed"  # 正常轮询
+STATE_OPEN = "open"  # 熔断中，仅按退避间隔探测
+STATE_HALF_OPEN = "half_open"  # 探测中
+
+# 本周期的处理方式
+ACTION_POLL = "poll"  # 完整轮询
+ACTION_PROBE = "probe"  # 单寄存器探测
+ACTION_SKIP = "skip"  # 跳过
+
+
+class CircuitBreaker:
+    """单个从站的熔断器：连续失败 N 次后熔断，熔断期间按指数退避探测"""
+
+    def __init__(self, name: str, failure_threshold: int = 3, backoff: float = 30, max_backoff: float = 600):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self.state = STATE_CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.next_probe_at: Optional[float] = None
+        self.last_success_at: Optional[float] = None
+        self.last_failure_at: Optional[float] = None
+        self._current_backoff = backoff
+        self._lock = threading.Lock()
+
+    def before_poll(self) -> str:
+        """决定本周期对该从站的处理方式"""
+        with self._lock:
+            if self.state == STATE_CLOSED:
+                return ACTION_POLL
+            if time.time() >= self.next_probe_at:
+                self.state = STATE_HALF_OPEN
+                return ACTION_PROBE
+            return ACTION_SKIP
+
+    def record_success(self):
+        with self._lock:
+            self.state = STATE_CLOSED
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self.next_probe_at = None
+            self.last_success_at = time.time()
+            self._current_backoff = self.backoff
+
+    def record_failure(self):
+        with self._lock:
+            now = time.time()
+            self.consecutive_failures += 1
+            self.last_failure_at = now
+            if self.state == STATE_HALF_OPEN:
+                # 探测失败，退避间隔翻倍
+                self._current_backoff = min(self._current_backoff * 2, self.max_backoff)
+                self.state = STATE_OPEN
+                self.next_probe_at = now + self._current_backoff
+            elif self.state == STATE_CLOSED and self.consecutive_failures >= self.failure_threshold:
+                self.state = STATE_OPEN
+                self.opened_at = now
+                self.next_probe_at = now + self._current_backoff
+
+    def is_open(self) -> bool:
+        """是否处于熔断（含探测中）状态"""
+        return self.state != STATE_CLOSED
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "state": self.state,
+                "consecutiveFailures": self.consecutive_failures,
+                "openedAt": self.opened_at,
+                "nextProbeAt": self.next_probe_at,
+                "lastSuccessAt": self.last_success_at,
+                "lastFailureAt": self.last_failure_at,
+            }
+
+
+class BreakerRegistry:
+    """按设备编号管理熔断器，供采集引擎与在线状态监测共用"""
+
+    def __init__(self, failure_threshold: int = 3, backoff: float = 30, max_backoff: float = 600):
+        self.failure_threshold = failure_threshold
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        # 设备编号 -> 熔断器：未配置井号的从站按 链路:从站地址 登记，读到井号后再按设备编号关联
+        self._aliases: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, failure_threshold: int, backoff: float, max_backoff: float):
+        """设置之后新建熔断器使用的参数"""
+        self.failure_threshold = failure_threshold
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def get(self, device_id: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(device_id)
+            if breaker is None:
+                breaker = CircuitBreaker(device_id, self.failure_threshold, self.backoff, self.max_backoff)
+                self._breakers[device_id] = breaker
+            return breaker
+
+    def bind(self, device_id: str, breaker: CircuitBreaker):
+        """把设备编号关联到已登记的熔断器，之后可按设备编号查询"""
+        device_id = str(device_id)
+        if self._aliases.get(device_id) is not breaker:
+            with self._lock:
+                self._aliases[device_id] = breaker
+
+    def find(self, device_id: str) -> Optional[CircuitBreaker]:
+        """按登记名称或设备编号查找熔断器，不存在时返回 None"""
+        device_id = str(device_id)
+        return self._breakers.get(device_id) or self._aliases.get(device_id)
+
+    def is_open(self, device_id: str) -> bool:
+        """设备是否已被熔断（即判定为不可达）"""
+        breaker = self.find(device_id)
+        return breaker is not None and breaker.is_open()
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            breakers = list(self._breakers.items())
+        return {device_id: breaker.snapshot() for device_id, breaker in breakers}
+
+
+# 全局熔断器注册表
+breaker_registry = BreakerRegistry()
@@ -1,8 +1,9 @@
-import time
-import struct
-import threading
-from application import app, logger, modbus_client
+from application import app
+from application.data.circuit_breaker import breaker_registry
+from application.data.ingest import IngestExecutor
+from application.data.polling import PollingEngine
 from application.data.processor import process_data
+from application.data.register_plan import ProfileCompiler
 
 MEASUREMENT_POINTS = [
     {"name": "wellCode", "address": 0, "unit": "", "type": "int", "decimla": 0, "description": "0 Start Testing  1 Stop Testing  2 Stop purging 3 Abort"},
@@ -22,36 +23,33 @@ MEASUREMENT_POINTS = [
     {"name": "dp", "address": 100, "unit": "", "type": "float", "decimla": 2, "description": "Differential Pressure"}
 ]
 
+# 寄存器配置：名称 -> 测点定义或 {"byte_order", "word_order", "points"}，设备表中按名称引用
+# 配置文件 modbus.profiles 中的同名配置覆盖内置配置
+REGISTER_PROFILES = {
+    "default": MEASUREMENT_POINTS,
+    **app.config["MODBUS_PROFILES"],
+}
 
-def read_modbus_registers():
-    data = {}
-    for point in MEASUREMENT_POINTS:
-        address = point["address"]
-        reg_type = point["type"]
-        try:
-            if reg_type == "int":
-                result = modbus_client.read_holding_registers(
-                    address=address,
-                    count=1,
-                    unit=1
-                )
-                data[point["name"]] = result.registers[0]
-            elif reg_type == "float":
-                result = modbus_client.read_holding_registers(
-                    address=address,
-                    count=2,
-                    unit=1
-                )
-                # 大端解析
-                byte_data = bytes()
-                for reg in result.registers:
-                    byte_data += reg.to_bytes(2, byteorder='big')
-                # 解析为浮点数（>f 表示大端浮点数）
-                float_value = struct.unpack('>f', byte_data)[0]
-                data[point["name"]] = round(float_value, 2)
-        except Exception as e:
-            logger.error(f"Error reading {point['name']} (Addr:{address}): {str(e)}")
-    return data
+# 寄存器配置编译缓存，每个配置只编译一次
+profile_compiler = ProfileCompiler(app.config["MODBUS_MAX_GAP"], app.config["MODBUS_MAX_COUNT"])
+
+# 入库线程池，工作线程在各自的 app 上下文中处理采集数据
+ingest_executor = IngestExecutor(process_data,
+                                 workers=app.config["INGEST_WORKERS"],
+                                 queue_size=app.config["INGEST_QUEUE_SIZE"],
+                                 overflow=app.config["INGEST_OVERFLOW"],
+                                 spill_dir=app.config["INGEST_SPILL_DIR"],
+                                 context_factory=app.app_context)
+
+# 从站熔断参数
+breaker_registry.configure(app.config["MODBUS_BREAKER_FAILURES"],
+                           app.config["MODBUS_BREAKER_BACKOFF"],
+                           app.config["MODBUS_BREAKER_MAX_BACKOFF"])
+
+# 采集引擎：每条链路一个线程，按 INTERVAL 对齐的固定频率轮询链路上的从站
+polling_engine = PollingEngine(PollingEngine.build_ports(app.config["MODBUS_PORTS"], REGISTER_PROFILES,
+                                                         profile_compiler),
+                               app.config["INTERVAL"], ingest_executor.submit)
 
 
 def read_data():
@@ -59,11 +57,5 @@ def read_data():
     读取Modbus数据
     :return:
     """
-    while True:
-        try:
-            measurements = read_modbus_registers()
-            logger.info("采集数据：{}".format(measurements))
-            threading.Thread(target=process_data, args=(measurements,), daemon=True).start()
-            time.sleep(app.config["INTERVAL"])
-        except Exception as e:
-            logger.error("采集数据失败：{}".format(str(e)))
+    ingest_executor.start()
+    polling_engine.run()
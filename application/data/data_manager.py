@@ -1,29 +1,46 @@
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Deque
 from collections import deque, defaultdict
-import statistics
 import logging
+from application.data.flatline import FlatlineMonitor
+from application.data.lock_stripes import LockStripes
 from application.data.models import DataPoint
+from application.data.rolling import RollingWindow
+from application.data.slot_bitmap import SlotBitmap
 
 logger = logging.getLogger(__name__)
 
 
 class TimeWindowDataManager:
-    """统一管理24小时窗口数据，避免频繁数据库查询"""
+    """
+    统一管理24小时窗口数据，避免频繁数据库查询
+
+    线程安全：按设备分段加锁，同一设备的读写串行、不同设备并发；查询在锁内拷贝，返回的列表可在锁外使用。
+    """
 
     def __init__(self, config):
         self.config = config
         # 存储24小时内的数据点
         self.data_points: Dict[str, Deque] = defaultdict(lambda: deque(maxlen=1440))  # 假设1分钟一个点，最多1440个
+        # 24小时窗口内各字段的滚动统计，与 data_points 同步增删
+        self.rolling: Dict[str, RollingWindow] = defaultdict(RollingWindow)
+        # 每分钟一个时隙，记录24小时内各时隙是否收到数据
+        self.slots: Dict[str, SlotBitmap] = defaultdict(lambda: SlotBitmap(60, 24 * 3600))
         # 最后数据时间（用于在线检测）
         self.last_data_times: Dict[str, datetime] = {}
         # 中断记录
         self.interruption_periods: Dict[str, List[Tuple[datetime, datetime]]] = defaultdict(list)
-        # 温度历史（用于平线检测）
-        self.temperature_history: Dict[str, List[Tuple[datetime, float]]] = defaultdict(list)
+        # 平线检测（默认检测温度10分钟无变化）
+        self.flatline = FlatlineMonitor()
+        # 设备级分段锁，保护以上按设备存储的结构
+        self._locks = LockStripes()
 
     def add_data_point(self, device_id: str, data_point: 'DataPoint'):
         """添加数据点并自动清理24小时前的数据"""
+        with self._locks(device_id):
+            self._add_data_point(device_id, data_point)
+
+    def _add_data_point(self, device_id: str, data_point: 'DataPoint'):
         current_time = datetime.now()
 
         # 检查是否中断（超过5分钟无数据）
@@ -41,57 +58,87 @@ class TimeWindowDataManager:
                     if end >= cutoff
                 ]
 
-        # 存储数据点
-        self.data_points[device_id].append(data_point)
+        # 存储数据点，队列已满时 append 会挤出最早的数据点，先同步移出统计
+        points = self.data_points[device_id]
+        rolling = self.rolling[device_id]
+        if len(points) == points.maxlen:
+            rolling.pop(vars(points[0]))
+        points.append(data_point)
+        rolling.push(vars(data_point))
+        self.slots[device_id].mark(data_point.timestamp.timestamp())
+        self._evict_expired(device_id, current_time - timedelta(hours=24))
+        rolling.resync(lambda field: (getattr(point, field) for point in points))
         self.last_data_times[device_id] = current_time
 
-        # 维护温度历史（用于平线检测）
-        self._update_temperature_history(device_id, current_time, data_point.temperature)
+        # 更新平线检测
+        self.flatline.update(device_id, current_time.timestamp(), vars(data_point))
 
-    def _update_temperature_history(self, device_id: str, timestamp: datetime, temperature: float):
-        """维护10分钟温度历史"""
-        history = self.temperature_history[device_id]
-        history.append((timestamp, temperature))
+    def load_history(self, device_id: str, points: List['DataPoint']):
+        """
+        批量加载按时间排序的历史数据（启动预热）
 
-        # 保留最近10分钟的数据
-        cutoff = timestamp - timedelta(minutes=10)
-        self.temperature_history[device_id] = [
-            (ts, temp) for ts, temp in history if ts >= cutoff
-        ]
+        以数据时间代替接收时间恢复窗口、滚动统计、采样时隙与平线检测，不记录中断。
+        """
+        cutoff = datetime.now() - timedelta(hours=24)
+        with self._locks(device_id):
+            data_points = self.data_points[device_id]
+            rolling = self.rolling[device_id]
+            for data_point in points:
+                if data_point.timestamp < cutoff:
+                    continue
+                if len(data_points) == data_points.maxlen:
+                    rolling.pop(vars(data_points[0]))
+                data_points.append(data_point)
+                rolling.push(vars(data_point))
+                self.slots[device_id].mark(data_point.timestamp.timestamp())
+                self.flatline.update(device_id, data_point.timestamp.timestamp(), vars(data_point))
+                self.last_data_times[device_id] = data_point.timestamp
+            rolling.resync(lambda field: (getattr(point, field) for point in data_points))
+
+    def _evict_expired(self, device_id: str, cutoff: datetime):
+        """从队首移除早于 cutoff 的数据点并同步滚动统计，调用方持有设备锁"""
+        points = self.data_points.get(device_id)
+        if not points:
+            return
+        rolling = self.rolling[device_id]
+        while points and points[0].timestamp < cutoff:
+            rolling.pop(vars(points.popleft()))
 
     def get_24h_data(self, device_id: str) -> List['DataPoint']:
-        """获取24小时内数据"""
-        cutoff = datetime.now() - timedelta(hours=24)
-        return [dp for dp in self.data_points.get(device_id, [])
-                if dp.timestamp >= cutoff]
+        """获取24小时内数据，数据按时间顺序到达，移除过期数据后队列内即为窗口数据"""
+        with self._locks(device_id):
+            self._evict_expired(device_id, datetime.now() - timedelta(hours=24))
+            return list(self.data_points.get(device_id, ()))
+
+    def get_recent_data(self, device_id: str, cutoff: datetime) -> List['DataPoint']:
+        """从队尾向前取时间不早于 cutoff 的数据，只访问结果内的数据点"""
+        recent = []
+        with self._locks(device_id):
+            for dp in reversed(self.data_points.get(device_id, ())):
+                if dp.timestamp < cutoff:
+                    break
+                recent.append(dp)
+        recent.reverse()
+        return recent
 
     def calculate_data_loss_rate(self, device_id: str) -> float:
-        """计算24小时内数据缺失率"""
-        data_points = self.get_24h_data(device_id)
-
-        # 期望1440个点（24小时 * 60分钟）
-        expected_count = 1440
-        actual_count = len(data_points)
-
-        if expected_count == 0:
-            return 0.0
-
-        loss_rate = max(0.0, 1 - (actual_count / expected_count))
-        return round(loss_rate, 4)
+        """计算24小时内数据缺失率（1440个时隙中未收到数据的比例）"""
+        with self._locks(device_id):
+            if device_id not in self.slots:
+                return 1.0
+            return self.slots[device_id].loss_rate(24 * 3600)
 
     def get_duplicate_data_count(self, device_id: str,
                                  window_minutes: int = 5) -> int:
         """检查最近window_minutes内的重复数据"""
-        cutoff = datetime.now() - timedelta(minutes=window_minutes)
-        recent_data = [dp for dp in self.data_points.get(device_id, [])
-                       if dp.timestamp >= cutoff]
+        recent_data = self.get_recent_data(device_id, datetime.now() - timedelta(minutes=window_minutes))
 
         # 使用集合检测重复
         seen = set()
         duplicates = 0
 
         for dp in recent_data:
-            key = (dp.timestamp, dp.content_hash())
+            key = (dp.timestamp, dp.fingerprint())
             if key in seen:
                 duplicates += 1
             else:
@@ -101,33 +148,19 @@ class TimeWindowDataManager:
 
     def check_temperature_flatline(self, device_id: str) -> bool:
         """检查温度是否连续10分钟无变化"""
-        history = self.temperature_history.get(device_id, [])
-
-        if len(history) < 10:  # 需要至少10个数据点
-            return False
-
-        # 检查最后10个点的温度变化
-        temps = [temp for _, temp in history[-10:]]
-        if len(temps) < 10:
-            return False
+        return self.flatline.is_flat(device_id, "temperature")
 
-        # 检查是否所有温度值都相同（精确到两位小数）
-        first_temp = round(temps[0], 2)
-        for temp in temps[1:]:
-            if round(temp, 2) != first_temp:
-                return False
-
-        return True
+    def get_flatline_duration(self, device_id: str, field: str = "temperature") -> float:
+        """某字段已连续无变化的时长 单位:秒"""
+        return self.flatline.stuck_for(device_id, field)
 
     def get_water_cut_24h_avg(self, device_id: str) -> Optional[float]:
-        """获取24小时含水率平均值"""
-        data_points = self.get_24h_data(device_id)
-
-        if not data_points:
-            return None
-
-        water_cuts = [dp.water_cut for dp in data_points]
-        return statistics.mean(water_cuts)
+        """获取24小时含水率平均值（滚动统计，O(1)）"""
+        with self._locks(device_id):
+            if device_id not in self.data_points:
+                return None
+            self._evict_expired(device_id, datetime.now() - timedelta(hours=24))
+            return self.rolling[device_id].get("water_cut").mean
 
     def get_last_data_time(self, device_id: str) -> Optional[datetime]:
         """获取最后数据时间"""
@@ -0,0 +1,89 @@
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 不参与死区比较的字段
+IGNORED_FIELDS = ("code", "create_time")
+
+
+class DeadbandFilter:
+    """
+    例外报告（report-by-exception）过滤器
+
+    与该井上一次写入的值相比，任一字段变化超出死区，或距上次写入超过最长静默时间（心跳）时才写入；
+    读取端按采样保持（step-hold）还原两次写入之间的值。
+
+    :param deadbands: 字段 -> {"abs": 绝对死区} 或 {"pct": 相对上次写入值的百分比死区}，
+                      "default" 作用于未单独配置的字段，未配置时字段有任何变化即写入
+    :param heartbeat: 最长静默时间 单位:秒
+    """
+
+    def __init__(self, deadbands: Dict[str, dict] = None, heartbeat: float = 300):
+        deadbands = dict(deadbands or {})
+        self.default = deadbands.pop("default", None) or {}
+        self.deadbands = deadbands
+        self.heartbeat = heartbeat
+        self.stored = 0
+        self.suppressed = 0
+        # 井号 -> (上次写入时间戳, 上次写入的数据)
+        self._last: Dict[str, Tuple[float, dict]] = {}
+        self._lock = threading.Lock()
+
+    def accept(self, key: str, row: dict, timestamp: float) -> bool:
+        """判断该条数据是否需要写入，需要写入时同时更新该井的基准值"""
+        with self._lock:
+            last = self._last.get(key)
+            if last is None or timestamp - last[0] >= self.heartbeat or self._exceeds(last[1], row):
+                self._last[key] = (timestamp, row)
+                self.stored += 1
+                return True
+            self.suppressed += 1
+            return False
+
+    def _exceeds(self, last: dict, row: dict) -> bool:
+        for name, value in row.items():
+            if name in IGNORED_FIELDS:
+                continue
+            previous = last.get(name)
+            if previous is None or value is None:
+                if previous is not value:
+                    return True
+                continue
+            deadband = self.deadbands.get(name, self.default)
+            delta = abs(value - previous)
+            if "pct" in deadband:
+                if delta > abs(previous) * deadband["pct"] / 100:
+                    return True
+            elif delta > deadband.get("abs", 0):
+                return True
+        return False
+
+    def metrics(self) -> dict:
+        total = self.stored + self.suppressed
+        return {
+            "heartbeat": self.heartbeat,
+            "stored": self.stored,
+            "suppressed": self.suppressed,
+            "suppressed_ratio": round(self.suppressed / total, 4) if total else 0.0,
+        }
+
+
+def step_hold(points: Iterable[Tuple[datetime, float]], start: datetime,
+              end: Optional[datetime] = None) -> List[Tuple[datetime, float]]:
+    """
+    按采样保持还原时间序列
+
+    :param points: 按时间排序的 (时间, 值)，可包含窗口起点之前的最后一条数据
+    :param start: 窗口起点，之前最后一条数据的值保持到起点
+    :param end: 窗口终点，最后一个值保持到终点
+    """
+    result = []
+    for time_value, value in points:
+        if time_value <= start:
+            result = [(start, value)]
+        else:
+            result.append((time_value, value))
+    if result and end is not None and result[-1][0] < end:
+        result.append((end, result[-1][1]))
+    return result
+
@@ -0,0 +1,85 @@
+import hashlib
+import struct
+import threading
+from collections import deque
+from typing import Deque, Dict, Iterable, Sequence, Tuple
+
+import numpy as np
+
+
+def fingerprint(timestamp: int, values: Sequence[float]) -> int:
+    """
+    数据内容指纹：时间戳 + 各测量值的 8 字节 BLAKE2b 摘要
+
+    测量值按单精度打包，与数据库 FLOAT 列读回的值得到相同指纹。
+    """
+    packed = struct.pack(f"<q{len(values)}f", int(timestamp), *values)
+    return int.from_bytes(hashlib.blake2b(packed, digest_size=8).digest(), "little")
+
+
+class FingerprintSet:
+    """
+    按设备保存最近一段时间内数据指纹的集合，用于重复数据检测
+
+    以数据时间计算过期：每台设备只保留最新数据时间之前 ttl 秒内的指纹，
+    判重为一次哈希查找，无需查询数据库。
+
+    :param ttl: 指纹保留时长 单位:秒
+    """
+
+    def __init__(self, ttl: float = 86400):
+        self.ttl = ttl
+        # 设备 -> 按加入顺序的 (时间戳, 指纹)
+        self._order: Dict[str, Deque[Tuple[float, int]]] = {}
+        # 设备 -> 指纹 -> 时间戳
+        self._fingerprints: Dict[str, Dict[int, float]] = {}
+        self._latest: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, device_id: str, timestamp: float, value: int) -> bool:
+        """加入指纹，已存在（重复数据）时返回 False"""
+        with self._lock:
+            fingerprints = self._fingerprints.setdefault(device_id, {})
+            if value in fingerprints:
+                return False
+            fingerprints[value] = timestamp
+            self._order.setdefault(device_id, deque()).append((timestamp, value))
+            if timestamp > self._latest.get(device_id, timestamp - 1):
+                self._latest[device_id] = timestamp
+                self._expire(device_id)
+            return True
+
+    def seed(self, rows: Iterable[Tuple[str, float, int]]):
+        """由 (设备编号, 时间戳, 指纹) 批量加载历史数据"""
+        for device_id, timestamp, value in rows:
+            self.add(str(device_id), timestamp, value)
+
+    def _expire(self, device_id: str):
+        cutoff = self._latest[device_id] - self.ttl
+        order, fingerprints = self._order[device_id], self._fingerprints[device_id]
+        # 按加入顺序清理；迟到的旧数据会在其之后的数据过期时一并清理
+        while order and order[0][0] < cutoff:
+            timestamp, value = order.popleft()
+            if fingerprints.get(value) == timestamp:
+                del fingerprints[value]
+
+    def dump_state(self) -> dict:
+        with self._lock:
+            return {"ttl": self.ttl, "devices": {device_id: {
+                "latest": self._latest.get(device_id),
+                "timestamps": np.array([timestamp for timestamp, _ in order], dtype=np.float64),
+                "fingerprints": np.array([value for _, value in order], dtype=np.uint64),
+            } for device_id, order in self._order.items()}}
+
+    def load_state(self, state: dict):
+        with self._lock:
+            for device_id, device in state["devices"].items():
+                order = deque(zip(device["timestamps"].tolist(), device["fingerprints"].tolist()))
+                # 同一指纹过期后可再次加入，按顺序覆盖即保留最新的时间戳
+                self._fingerprints[device_id] = {value: timestamp for timestamp, value in order}
+                self._order[device_id] = order
+                if device["latest"] is not None:
+                    self._latest[device_id] = device["latest"]
+
+    def __len__(self) -> int:
+        return sum(len(fingerprints) for fingerprints in self._fingerprints.values())
@@ -0,0 +1,185 @@
+import threading
+from collections import deque
+from typing import Dict, Mapping, Optional
+
+import numpy as np
+
+# 默认检测规则：字段 -> 容差（最大值 - 最小值）、持续时间 单位:秒、最少样本数
+DEFAULT_FLATLINE_RULES = {
+    "temperature": {"tolerance": 0.01, "duration": 600, "min_samples": 10},
+}
+
+
+class FlatlineDetector:
+    """
+    单个测量值的平线（传感器卡死）检测
+
+    以单调队列维护当前平线段内的最小值、最大值：新样本使平线段的最大值与最小值之差超过容差时，
+    从队首丢弃样本直到满足容差，平线段的起点随之后移。每个样本均摊 O(1)，不保存平线段内的全部样本。
+
+    :param tolerance: 容差，平线段内最大值与最小值之差不超过该值视为无变化
+    :param duration: 平线持续超过该时长（秒）判定为平线
+    :param min_samples: 判定为平线所需的最少样本数
+    """
+
+    def __init__(self, tolerance: float = 0.01, duration: float = 600, min_samples: int = 2):
+        self.tolerance = tolerance
+        self.duration = duration
+        self.min_samples = min_samples
+        # 元素为 [序号, 时间戳, 值, 下一个样本的时间戳]，两个队列共享同一元素
+        self._min = deque()
+        self._max = deque()
+        self._last: Optional[list] = None
+        self._seq = 0
+        # 平线段起点的序号与时间戳
+        self._start_seq = 0
+        self._since: Optional[float] = None
+
+    def update(self, timestamp: float, value: Optional[float]) -> float:
+        """
+        加入一个样本，返回当前平线已持续的时长（秒）
+
+        :param timestamp: 秒级时间戳，不晚于上一个样本的样本（如启动预热时晚于实时数据到达的历史数据）忽略
+        :param value: 测量值，None 视为中断，重新开始计算
+        """
+        if self._last is not None and timestamp <= self._last[1]:
+            return self.stuck_for()
+        if value is None or value != value:
+            self.reset()
+            return 0.0
+        entry = [self._seq, timestamp, value, None]
+        self._seq += 1
+        if self._last is not None:
+            self._last[3] = timestamp
+        self._last = entry
+        if self._since is None:
+            self._since = timestamp
+
+        while self._min and self._min[-1][2] >= value:
+            self._min.pop()
+        self._min.append(entry)
+        while self._max and self._max[-1][2] <= value:
+            self._max.pop()
+        self._max.append(entry)
+
+        # 超出容差时丢弃序号较小的极值，平线段从其后一个样本开始
+        while self._max[0][2] - self._min[0][2] > self.tolerance:
+            dropped = self._min.popleft() if self._min[0][0] < self._max[0][0] else self._max.popleft()
+            self._start_seq, self._since = dropped[0] + 1, dropped[3]
+            while self._min[0][0] < self._start_seq:
+                self._min.popleft()
+            while self._max[0][0] < self._start_seq:
+                self._max.popleft()
+        return self.stuck_for(timestamp)
+
+    def stuck_for(self, now: float = None) -> float:
+        """当前平线段已持续的时长（秒）"""
+        if self._since is None:
+            return 0.0
+        return max((self._last[1] if now is None else now) - self._since, 0.0)
+
+    @property
+    def samples(self) -> int:
+        """当前平线段内的样本数"""
+        return self._seq - self._start_seq
+
+    def is_flat(self, now: float = None) -> bool:
+        return self.samples >= self.min_samples and self.stuck_for(now) >= self.duration
+
+    def dump_state(self) -> dict:
+        """两个单调队列的元素按序号合并保存，并标记各自所属的队列"""
+        entries = {entry[0]: entry for entry in self._min}
+        entries.update((entry[0], entry) for entry in self._max)
+        ordered = [entries[seq] for seq in sorted(entries)]
+        in_min = {entry[0] for entry in self._min}
+        in_max = {entry[0] for entry in self._max}
+        return {
+            "seq": self._seq,
+            "start_seq": self._start_seq,
+            "since": self._since,
+            "entries": np.array([[entry[0], entry[1], entry[2], np.nan if entry[3] is None else entry[3]]
+                                 for entry in ordered], dtype=np.float64).reshape(-1, 4),
+            "in_min": np.array([entry[0] in in_min for entry in ordered], dtype=bool),
+            "in_max": np.array([entry[0] in in_max for entry in ordered], dtype=bool),
+        }
+
+    def load_state(self, state: dict):
+        self.reset()
+        self._seq, self._start_seq, self._since = state["seq"], state["start_seq"], state["since"]
+        for (seq, timestamp, value, next_timestamp), in_min, in_max in zip(
+                state["entries"].tolist(), state["in_min"].tolist(), state["in_max"].tolist()):
+            entry = [int(seq), timestamp, value, None if next_timestamp != next_timestamp else next_timestamp]
+            if in_min:
+                self._min.append(entry)
+            if in_max:
+                self._max.append(entry)
+            # 最后加入的样本同时位于两个队列的队尾
+            self._last = entry
+
+    def reset(self):
+        self._min.clear()
+        self._max.clear()
+        self._last = None
+        self._start_seq = self._seq
+        self._since = None
+
+
+class FlatlineMonitor:
+    """
+    按设备、字段管理平线检测，同一组件覆盖温度、压力、差压等任意测量值
+
+    :param rules: 字段 -> {"tolerance": 容差, "duration": 持续时间 单位:秒, "min_samples": 最少样本数}
+    """
+
+    def __init__(self, rules: Mapping[str, dict] = None):
+        self.rules = dict(DEFAULT_FLATLINE_RULES if rules is None else rules)
+        self._detectors: Dict[str, Dict[str, FlatlineDetector]] = {}
+        self._lock = threading.Lock()
+
+    def _device(self, device_id: str) -> Dict[str, FlatlineDetector]:
+        detectors = self._detectors.get(device_id)
+        if detectors is None:
+            detectors = {field: FlatlineDetector(**rule) for field, rule in self.rules.items()}
+            self._detectors[device_id] = detectors
+        return detectors
+
+    def update(self, device_id: str, timestamp: float, values: Mapping[str, Optional[float]]) -> Dict[str, float]:
+        """
+        加入一组样本，返回判定为平线的字段及其已持续的时长（秒）
+
+        :param values: 字段 -> 值，未配置规则的字段忽略
+        """
+        flat = {}
+        with self._lock:
+            for field, detector in self._device(device_id).items():
+                if field not in values:
+                    continue
+                detector.update(timestamp, values[field])
+                if detector.is_flat(timestamp):
+                    flat[field] = detector.stuck_for(timestamp)
+        return flat
+
+    def stuck_for(self, device_id: str, field: str) -> float:
+        """某字段当前平线段已持续的时长（秒）"""
+        with self._lock:
+            detector = self._detectors.get(device_id, {}).get(field)
+            return detector.stuck_for() if detector else 0.0
+
+    def is_flat(self, device_id: str, field: str) -> bool:
+        with self._lock:
+            detector = self._detectors.get(device_id, {}).get(field)
+            return detector.is_flat() if detector else False
+
+    def dump_state(self) -> dict:
+        with self._lock:
+            return {"devices": {device_id: {field: detector.dump_state() for field, detector in detectors.items()}
+                                for device_id, detectors in self._detectors.items()}}
+
+    def load_state(self, state: dict):
+        """由快照恢复，只恢复当前规则中仍存在的字段"""
+        with self._lock:
+            for device_id, fields in state["devices"].items():
+                detectors = self._device(device_id)
+                for field, detector_state in fields.items():
+                    if field in detectors:
+                        detectors[field].load_state(detector_state)
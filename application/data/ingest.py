@@ -0,0 +1,202 @@
+import os
+import json
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+from application import logger
+
+# 队列满时的处理策略
+OVERFLOW_BLOCK = "block"  # 阻塞采集线程直到有空位
+OVERFLOW_DROP_OLDEST = "drop_oldest"  # 丢弃最旧的一条
+OVERFLOW_SPILL = "spill"  # 溢写到磁盘，空闲时回灌
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_SPILL)
+
+
+class IngestExecutor:
+    """固定大小的入库线程池，由有界队列供数"""
+
+    def __init__(self, handler: Callable[[dict], None], workers: int = 2, queue_size: int = 100,
+                 overflow: str = OVERFLOW_BLOCK, spill_dir: str = "spill",
+                 context_factory: Optional[Callable] = None):
+        """
+        :param handler: 处理单条采集数据的函数
+        :param workers: 工作线程数
+        :param queue_size: 队列容量
+        :param overflow: 队列满时的策略 block / drop_oldest / spill
+        :param spill_dir: spill 策略下的溢写目录
+        :param context_factory: 工作线程生命周期内持有的上下文（如 app.app_context）
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"不支持的溢出策略: {overflow}")
+        self.handler = handler
+        self.workers = workers
+        self.overflow = overflow
+        self.spill_file = os.path.join(spill_dir, "ingest-spill.jsonl")
+        self.context_factory = context_factory
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._threads = []
+        self._running = False
+        self._lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+
+        # 统计指标
+        self._submitted = 0
+        self._processed = 0
+        self._failed = 0
+        self._dropped = 0
+        self._spilled = 0
+        self._busy = 0
+        self._wait_times = deque(maxlen=1000)
+        self._max_wait = 0.0
+
+    def start(self):
+        """启动工作线程"""
+        if self._running:
+            return
+        self._running = True
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"ingest-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"入库线程池已启动: workers={self.workers}, queue_size={self._queue.maxsize}, "
+                    f"overflow={self.overflow}")
+
+    def stop(self, timeout: float = 10):
+        """停止工作线程，尽量处理完队列中剩余数据"""
+        deadline = time.monotonic() + timeout
+        while not self._queue.empty() and time.monotonic() < deadline:
+            time.sleep(0.1)
+        self._running = False
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        self._threads.clear()
+
+    def submit(self, measurements: dict) -> bool:
+        """提交一条采集数据，返回是否已进入队列"""
+        item = (time.monotonic(), measurements)
+        with self._lock:
+            self._submitted += 1
+
+        if self.overflow == OVERFLOW_BLOCK:
+            self._queue.put(item)
+            return True
+
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            pass
+
+        if self.overflow == OVERFLOW_DROP_OLDEST:
+            while True:
+                try:
+                    self._queue.get_nowait()
+                    with self._lock:
+                        self._dropped += 1
+                except queue.Empty:
+                    pass
+                try:
+                    self._queue.put_nowait(item)
+                    return True
+                except queue.Full:
+                    continue
+
+        self._spill(measurements)
+        return False
+
+    def metrics(self) -> dict:
+        """队列深度与等待时间等指标"""
+        with self._lock:
+            waits = list(self._wait_times)
+            return {
+                "workers": self.workers,
+                "busy": self._busy,
+                "overflow": self.overflow,
+                "queue_depth": self._queue.qsize(),
+                "queue_capacity": self._queue.maxsize,
+                "submitted": self._submitted,
+                "processed": self._processed,
+                "failed": self._failed,
+                "dropped": self._dropped,
+                "spilled": self._spilled,
+                "spill_pending": os.path.exists(self.spill_file),
+                "wait_avg_ms": round(sum(waits) / len(waits) * 1000, 2) if waits else 0.0,
+                "wait_max_ms": round(self._max_wait * 1000, 2),
+            }
+
+    def _run(self):
+        if self.context_factory is None:
+            self._loop()
+            return
+        with self.context_factory():
+            self._loop()
+
+    def _loop(self):
+        while self._running:
+            try:
+                enqueue_time, measurements = self._queue.get(timeout=1)
+            except queue.Empty:
+                # 队列空闲时回灌溢写数据
+                self._reload_spill()
+                continue
+
+            wait = time.monotonic() - enqueue_time
+            with self._lock:
+                self._wait_times.append(wait)
+                self._max_wait = max(self._max_wait, wait)
+                self._busy += 1
+            try:
+                self.handler(measurements)
+                with self._lock:
+                    self._processed += 1
+            except Exception as e:
+                with self._lock:
+                    self._failed += 1
+                logger.error("入库处理失败：{}".format(str(e)))
+            finally:
+                with self._lock:
+                    self._busy -= 1
+                self._queue.task_done()
+
+    def _spill(self, measurements: dict):
+        """溢写到磁盘"""
+        with self._spill_lock:
+            try:
+                os.makedirs(os.path.dirname(self.spill_file) or ".", exist_ok=True)
+                with open(self.spill_file, "a", encoding="UTF-8") as f:
+                    f.write(json.dumps(measurements, ensure_ascii=False) + "\n")
+                with self._lock:
+                    self._spilled += 1
+            except Exception as e:
+                with self._lock:
+                    self._dropped += 1
+                logger.error("溢写数据失败：{}".format(str(e)))
+
+    def _reload_spill(self):
+        """将溢写文件中的数据按顺序放回队列，放不下的继续留在磁盘"""
+        if not os.path.exists(self.spill_file):
+            return
+        with self._spill_lock:
+            if not os.path.exists(self.spill_file):
+                return
+            with open(self.spill_file, "r", encoding="UTF-8") as f:
+                lines = [line for line in f if line.strip()]
+
+            loaded = 0
+            for line in lines:
+                try:
+                    self._queue.put_nowait((time.monotonic(), json.loads(line)))
+                    loaded += 1
+                except queue.Full:
+                    break
+
+            if loaded == len(lines):
+                os.remove(self.spill_file)
+            else:
+                tmp_file = self.spill_file + ".tmp"
+                with open(tmp_file, "w", encoding="UTF-8") as f:
+                    f.writelines(lines[loaded:])
+                os.replace(tmp_file, self.spill_file)
@@ -0,0 +1,20 @@
+import threading
+from typing import Hashable
+
+
+class LockStripes:
+    """
+    分段锁：固定数量的可重入锁，键按哈希分配到其中一把
+
+    同一设备的读写串行，不同设备大多落在不同的锁上可并发执行；锁的数量固定，不随设备数增长，
+    也无需在设备增删时维护锁表。
+
+    :param stripes: 锁的数量
+    """
+
+    def __init__(self, stripes: int = 64):
+        self._locks = [threading.RLock() for _ in range(stripes)]
+
+    def __call__(self, key: Hashable) -> threading.RLock:
+        """键对应的锁，用法：with stripes(device_id): ..."""
+        return self._locks[hash(key) % len(self._locks)]
@@ -3,6 +3,8 @@ from datetime import datetime
 from typing import Optional
 from enum import Enum
 
+from application.data.fingerprint import fingerprint
+
 
 class AlertType(Enum):
     # 基础在线状态告警
@@ -35,9 +37,9 @@ class DataPoint:
     oil_flow: float  # 油流量
     gas_flow: float  # 气流量
 
-    # 用于重复检测的哈希值
-    def content_hash(self) -> str:
-        return f"{self.dp:.2f}_{self.pressure:.2f}_{self.temperature:.2f}_{self.water_cut:.2f}"
+    # 用于重复检测的内容指纹：秒级时间戳 + 差压、压力、温度、含水率
+    def fingerprint(self) -> int:
+        return fingerprint(int(self.timestamp.timestamp()), (self.dp, self.pressure, self.temperature, self.water_cut))
 
 
 @dataclass
@@ -0,0 +1,134 @@
+import threading
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+from sqlalchemy import text
+from application import app, db, logger
+from application.data.poll_scheduler import FixedRateScheduler
+
+# 兜底分区，新分区由其拆分得到
+MAX_PARTITION = "pmax"
+# MySQL TO_DAYS() 与 date.toordinal() 的差值
+_TO_DAYS_OFFSET = 365
+
+
+def to_days(day: date) -> int:
+    """等同于 MySQL TO_DAYS()"""
+    return day.toordinal() + _TO_DAYS_OFFSET
+
+
+def from_days(days: int) -> date:
+    return date.fromordinal(days - _TO_DAYS_OFFSET)
+
+
+class PartitionManager:
+    """
+    按时间 RANGE 分区的表维护：提前创建未来分区，按保留期整分区删除历史数据
+
+    表需按 RANGE (TO_DAYS(create_time)) 分区并保留 pmax 兜底分区（见 migrations/002），
+    查询带 create_time 范围条件时只扫描相关分区，删除历史数据为 DROP PARTITION 而非 DELETE。
+
+    :param table: 表名
+    :param granularity: 分区粒度 day / month
+    :param premake: 提前创建的分区个数
+    :param retention_days: 数据保留天数，0 表示不删除
+    """
+
+    def __init__(self, table: str = "well_data", granularity: str = "day", premake: int = 7,
+                 retention_days: int = 0):
+        if granularity not in ("day", "month"):
+            raise ValueError(f"不支持的分区粒度: {granularity}")
+        self.table = table
+        self.granularity = granularity
+        self.premake = premake
+        self.retention_days = retention_days
+        self.scheduler = None
+        self._lock = threading.Lock()
+
+    def partitions(self) -> List[Tuple[str, Optional[int]]]:
+        """按顺序返回 (分区名, 上界 TO_DAYS 值)，兜底分区的上界为 None"""
+        rows = db.session.execute(text(
+            "SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND PARTITION_NAME IS NOT NULL "
+            "ORDER BY PARTITION_ORDINAL_POSITION"), {"table": self.table}).fetchall()
+        return [(name, None if description == "MAXVALUE" else int(description)) for name, description in rows]
+
+    def partition_name(self, lower: date) -> str:
+        return f"p{lower:%Y%m%d}" if self.granularity == "day" else f"p{lower:%Y%m}"
+
+    def next_bound(self, lower: date) -> date:
+        """分区上界（不含）"""
+        if self.granularity == "day":
+            return lower + timedelta(days=1)
+        return date(lower.year + lower.month // 12, lower.month % 12 + 1, 1)
+
+    def period_start(self, day: date) -> date:
+        return day if self.granularity == "day" else day.replace(day=1)
+
+    def ensure_future(self, today: date = None) -> List[str]:
+        """拆分兜底分区，保证从今天起至少有 premake 个分区；兜底分区为空时拆分不搬移数据"""
+        today = today or date.today()
+        partitions = self.partitions()
+        bounds = [bound for _, bound in partitions if bound is not None]
+        if not partitions or partitions[-1][0] != MAX_PARTITION:
+            logger.warning(f"表 {self.table} 未按时间分区或缺少兜底分区 {MAX_PARTITION}，跳过分区维护")
+            return []
+
+        # 从已有最大上界（或当前周期）开始补齐
+        lower = from_days(bounds[-1]) if bounds else self.period_start(today)
+        target = self.period_start(today)
+        for _ in range(self.premake):
+            target = self.next_bound(target)
+
+        definitions, names = [], []
+        while lower < target:
+            upper = self.next_bound(lower)
+            name = self.partition_name(lower)
+            definitions.append(f"PARTITION `{name}` VALUES LESS THAN ({to_days(upper)})")
+            names.append(name)
+            lower = upper
+        if not definitions:
+            return []
+
+        definitions.append(f"PARTITION `{MAX_PARTITION}` VALUES LESS THAN MAXVALUE")
+        db.session.execute(text(f"ALTER TABLE `{self.table}` REORGANIZE PARTITION `{MAX_PARTITION}` INTO "
+                                f"({', '.join(definitions)})"))
+        logger.info(f"表 {self.table} 新增分区: {', '.join(names)}")
+        return names
+
+    def drop_expired(self, today: date = None) -> List[str]:
+        """删除上界早于保留期起点的分区（分区内数据全部过期）"""
+        if not self.retention_days:
+            return []
+        cutoff = to_days((today or date.today()) - timedelta(days=self.retention_days))
+        names = [name for name, bound in self.partitions() if bound is not None and bound <= cutoff]
+        if names:
+            db.session.execute(text(f"ALTER TABLE `{self.table}` DROP PARTITION "
+                                    f"{', '.join(f'`{name}`' for name in names)}"))
+            logger.info(f"表 {self.table} 删除过期分区: {', '.join(names)}")
+        return names
+
+    def maintain(self):
+        """执行一次分区维护"""
+        with self._lock, app.app_context():
+            try:
+                self.ensure_future()
+                self.drop_expired()
+            except Exception as e:
+                logger.error(f"表 {self.table} 分区维护失败：{e}")
+
+    def start(self, interval: float = 3600):
+        """后台定期维护，启动时立即执行一次"""
+        self.scheduler = FixedRateScheduler(interval, align=False)
+        threading.Thread(target=self.scheduler.run, args=(self.maintain,),
+                         name=f"partition-{self.table}", daemon=True).start()
+
+    def stop(self):
+        if self.scheduler is not None:
+            self.scheduler.stop()
+
+
+# well_data 分区维护
+well_data_partitions = PartitionManager("well_data",
+                                        granularity=app.config["PARTITION_GRANULARITY"],
+                                        premake=app.config["PARTITION_PREMAKE"],
+                                        retention_days=app.config["PARTITION_RETENTION_DAYS"])
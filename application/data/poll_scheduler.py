@@ -0,0 +1,123 @@
+import bisect
+import threading
+import time
+from typing import Callable, List
+
+# 直方图桶上界 单位:毫秒
+DEFAULT_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000]
+
+
+class LatencyHistogram:
+    """固定桶的耗时直方图"""
+
+    def __init__(self, buckets_ms: List[float] = None):
+        self.buckets_ms = list(buckets_ms or DEFAULT_BUCKETS_MS)
+        # 最后一个桶收集超出上界的值
+        self._counts = [0] * (len(self.buckets_ms) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        value_ms = seconds * 1000
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets_ms, value_ms)] += 1
+            self._count += 1
+            self._sum += value_ms
+            self._max = max(self._max, value_ms)
+
+    def quantile(self, q: float) -> float:
+        """按桶上界估算分位数 单位:毫秒"""
+        with self._lock:
+            if self._count == 0:
+                return 0.0
+            target = q * self._count
+            cumulative = 0
+            for i, count in enumerate(self._counts):
+                cumulative += count
+                if cumulative >= target:
+                    return self.buckets_ms[i] if i < len(self.buckets_ms) else self._max
+            return self._max
+
+    def snapshot(self) -> dict:
+        p50, p95, p99 = self.quantile(0.5), self.quantile(0.95), self.quantile(0.99)
+        with self._lock:
+            buckets = [{"le": le, "count": count} for le, count in zip(self.buckets_ms, self._counts)]
+            buckets.append({"le": "+Inf", "count": self._counts[-1]})
+            return {
+                "count": self._count,
+                "avg_ms": round(self._sum / self._count, 2) if self._count else 0.0,
+                "max_ms": round(self._max, 2),
+                "p50_ms": p50,
+                "p95_ms": p95,
+                "p99_ms": p99,
+                "buckets": buckets,
+            }
+
+
+class FixedRateScheduler:
+    """
+    基于单调时钟的定频调度器
+
+    采集时刻对齐到 interval 的整数倍（墙上时间），按截止时间而非固定休眠推进，
+    读取耗时不会累积为漂移；一次采集超过一个周期时，错过的时隙被明确跳过并计数。
+    """
+
+    def __init__(self, interval: float, align: bool = True):
+        self.interval = interval
+        self.align = align
+        self.jitter = LatencyHistogram()
+        self.latency = LatencyHistogram()
+        self.polls = 0
+        self.skipped_slots = 0
+        self._stop = threading.Event()
+        self._base = None
+        self._slot = -1
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self, func: Callable[[], None]):
+        """按固定频率执行 func，直到 stop() 被调用"""
+        now = time.monotonic()
+        offset = self.interval - (time.time() % self.interval) if self.align else 0.0
+        self._base = now + offset
+
+        while not self._stop.is_set():
+            deadline = self._next_deadline()
+            delay = deadline - time.monotonic()
+            if delay > 0 and self._stop.wait(delay):
+                break
+
+            started = time.monotonic()
+            self.jitter.record(max(0.0, started - deadline))
+            try:
+                func()
+            finally:
+                self.latency.record(time.monotonic() - started)
+                self.polls += 1
+
+    def _next_deadline(self) -> float:
+        """计算下一个时隙的截止时间，迟到超过半个周期的时隙视为错过并跳过"""
+        tolerance = self.interval / 2
+        next_slot = self._slot + 1
+        late = time.monotonic() - (self._base + next_slot * self.interval)
+        if late > tolerance:
+            target = next_slot + int(late // self.interval)
+            if late - (target - next_slot) * self.interval > tolerance:
+                target += 1
+            self.skipped_slots += target - next_slot
+            next_slot = target
+        self._slot = next_slot
+        return self._base + next_slot * self.interval
+
+    def metrics(self) -> dict:
+        """调度指标：抖动与单次采集耗时直方图"""
+        return {
+            "interval": self.interval,
+            "polls": self.polls,
+            "skipped_slots": self.skipped_slots,
+            "jitter": self.jitter.snapshot(),
+            "latency": self.latency.snapshot(),
+        }
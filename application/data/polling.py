@@ -0,0 +1,219 @@
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+from pymodbus.client.sync import ModbusSerialClient, ModbusTcpClient
+from pymodbus.exceptions import ConnectionException, ModbusIOException
+from application import logger
+from application.data.circuit_breaker import (ACTION_PROBE, ACTION_SKIP, BreakerRegistry, CircuitBreaker,
+                                              breaker_registry)
+from application.data.poll_scheduler import FixedRateScheduler
+from application.data.register_plan import ProfileCompiler, ReadBlock, decode_block
+
+
+@dataclass
+class ModbusDevice:
+    """总线上的一个从站设备"""
+    slave: int
+    profile: str
+    plan: List[ReadBlock]
+    # 井号，未配置时使用寄存器中读取的 wellCode
+    code: Optional[str] = None
+    last_poll_ok: Optional[bool] = None
+    errors: int = 0
+    breaker: Optional[CircuitBreaker] = None
+
+
+@dataclass
+class PortConfig:
+    """一条通信链路（串口或 TCP）"""
+    name: str
+    method: str = "rtu"
+    port: object = "/dev/ttyCOM5"
+    host: Optional[str] = None
+    baudrate: int = 9600
+    parity: str = "N"
+    stopbits: int = 1
+    bytesize: int = 8
+    timeout: float = 3
+    devices: List[ModbusDevice] = field(default_factory=list)
+
+
+def create_client(port_config: PortConfig):
+    """根据链路配置创建 Modbus 客户端"""
+    if port_config.method == "tcp":
+        return ModbusTcpClient(host=port_config.host, port=port_config.port, timeout=port_config.timeout)
+    return ModbusSerialClient(
+        method=port_config.method,
+        port=port_config.port,
+        baudrate=port_config.baudrate,
+        parity=port_config.parity,
+        stopbits=port_config.stopbits,
+        bytesize=port_config.bytesize,
+        timeout=port_config.timeout
+    )
+
+
+def read_device(client, device: ModbusDevice) -> Dict[str, float]:
+    """按块读取计划读取一个从站的全部测点，从站无响应时不再读取后续块"""
+    data = {}
+    for block in device.plan:
+        try:
+            result = client.read_holding_registers(
+                address=block.address,
+                count=block.count,
+                unit=device.slave
+            )
+            if isinstance(result, ModbusIOException):
+                raise result
+            data.update(decode_block(block, result.registers))
+        except (ModbusIOException, ConnectionException) as e:
+            logger.error(f"Slave {device.slave} no response (Addr:{block.address}, Count:{block.count}): {str(e)}")
+            break
+        except Exception as e:
+            names = ",".join(point["name"] for point in block.points)
+            logger.error(f"Error reading slave {device.slave} {names} "
+                         f"(Addr:{block.address}, Count:{block.count}): {str(e)}")
+    return data
+
+
+def probe_device(client, device: ModbusDevice) -> bool:
+    """读取单个寄存器探测从站是否恢复"""
+    try:
+        result = client.read_holding_registers(address=device.plan[0].address, count=1, unit=device.slave)
+        return not result.isError()
+    except Exception:
+        return False
+
+
+class PortWorker:
+    """单条链路的采集线程，按时隙轮询链路上的全部从站"""
+
+    def __init__(self, port_config: PortConfig, interval: float, submit: Callable[[dict], object],
+                 breakers: BreakerRegistry = breaker_registry):
+        self.port_config = port_config
+        self.submit = submit
+        self.breakers = breakers
+        for device in port_config.devices:
+            # 熔断器按井号登记；未配置井号时按 链路:从站地址 登记，读到井号后关联设备编号，便于在线状态监测按设备编号查询
+            device.breaker = breakers.get(device.code or f"{port_config.name}:{device.slave}")
+        self.scheduler = FixedRateScheduler(interval)
+        self.client = create_client(port_config)
+        self._next_index = 0
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.scheduler.run, args=(self.poll_cycle,),
+                                        name=f"modbus-{self.port_config.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.scheduler.stop()
+
+    def join(self, timeout: float = None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def poll_cycle(self):
+        """一个时隙内依次轮询全部从站，起始从站逐周期轮转，避免总是同一台设备排在末尾"""
+        devices = self.port_config.devices
+        if not devices:
+            return
+        if not self.client.is_socket_open() and not self.client.connect():
+            logger.error(f"Modbus {self.port_config.name} connection failed")
+            return
+
+        start = self._next_index % len(devices)
+        self._next_index = start + 1
+        for device in devices[start:] + devices[:start]:
+            self.poll_device(device)
+
+    def poll_device(self, device: ModbusDevice):
+        """轮询单个从站；熔断中的从站按退避间隔仅做单寄存器探测，不拖慢链路上的其他设备"""
+        action = device.breaker.before_poll()
+        if action == ACTION_SKIP:
+            return
+        if action == ACTION_PROBE and not probe_device(self.client, device):
+            device.last_poll_ok = False
+            device.errors += 1
+            device.breaker.record_failure()
+            return
+
+        try:
+            measurements = read_device(self.client, device)
+            device.last_poll_ok = bool(measurements)
+            if not measurements:
+                device.errors += 1
+                device.breaker.record_failure()
+                return
+            device.breaker.record_success()
+            if device.code is not None:
+                measurements["wellCode"] = device.code
+            elif measurements.get("wellCode") is not None:
+                self.breakers.bind(measurements["wellCode"], device.breaker)
+            logger.info("采集数据[{}:{}]：{}".format(self.port_config.name, device.slave, measurements))
+            self.submit(measurements)
+        except Exception as e:
+            device.last_poll_ok = False
+            device.errors += 1
+            device.breaker.record_failure()
+            logger.error("采集数据失败[{}:{}]：{}".format(self.port_config.name, device.slave, str(e)))
+
+    def metrics(self) -> dict:
+        return {
+            "port": self.port_config.name,
+            "devices": [{"slave": device.slave, "code": device.code, "profile": device.profile,
+                         "lastPollOk": device.last_poll_ok, "errors": device.errors,
+                         "breaker": device.breaker.snapshot()}
+                        for device in self.port_config.devices],
+            **self.scheduler.metrics(),
+        }
+
+
+class PollingEngine:
+    """多链路、多从站采集引擎：每条链路一个线程并行采集，链路内从站轮询"""
+
+    def __init__(self, ports: List[PortConfig], interval: float, submit: Callable[[dict], object]):
+        self.workers = [PortWorker(port, interval, submit) for port in ports]
+
+    @staticmethod
+    def build_ports(ports: List[dict], profiles: Dict[str, object], compiler: ProfileCompiler) -> List[PortConfig]:
+        """
+        根据设备表配置构建链路列表
+        :param ports: 配置中的 modbus.ports
+        :param profiles: 寄存器配置名称 -> 寄存器配置
+        :param compiler: 寄存器配置编译缓存
+        """
+        plans = {name: compiler.compile(profile) for name, profile in profiles.items()}
+        result = []
+        for i, item in enumerate(ports):
+            item = dict(item)
+            devices = []
+            for device in item.pop("devices", None) or [{"slave": 1}]:
+                profile = device.get("profile", "default")
+                if profile not in plans:
+                    raise ValueError(f"未定义的寄存器配置: {profile}")
+                code = device.get("code")
+                devices.append(ModbusDevice(slave=device.get("slave", 1), profile=profile, plan=plans[profile],
+                                            code=str(code) if code is not None else None))
+            name = item.pop("name", None) or str(item.get("host") or item.get("port") or i)
+            result.append(PortConfig(name=name, devices=devices, **item))
+        return result
+
+    def start(self):
+        for worker in self.workers:
+            worker.start()
+        logger.info(f"采集引擎已启动: {len(self.workers)} 条链路, "
+                    f"{sum(len(w.port_config.devices) for w in self.workers)} 台设备")
+
+    def stop(self):
+        for worker in self.workers:
+            worker.stop()
+
+    def run(self):
+        """启动并阻塞直到全部链路线程退出"""
+        self.start()
+        for worker in self.workers:
+            worker.join()
+
+    def metrics(self) -> List[dict]:
+        return [worker.metrics() for worker in self.workers]
@@ -1,38 +1,92 @@
-import time
 from datetime import datetime
+from typing import List
+from sqlalchemy import insert
 from application import app, logger, db
+from application.data.deadband import DeadbandFilter
+from application.data.rollup import well_data_rollups
+from application.data_management.storage.batch_writer import BatchWriter
+from application.data_management.storage.spool import Spool, SpoolForwarder
 from application.entity import WellData
 # from application.data.models import DataPoint
 
 
+def _insert_well_data(rows: List[dict]):
+    """多行 INSERT IGNORE 批量写入 well_data，依赖 (code, create_time) 唯一键保证重放幂等"""
+    with app.app_context():
+        try:
+            db.session.execute(insert(WellData.__table__).prefix_with("IGNORE", dialect="mysql"), rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        if app.config["ROLLUP_ENABLED"]:
+            _update_rollups(rows)
+
+
+def _update_rollups(rows: List[dict]):
+    """在独立事务中重算受影响的汇总时间桶；失败只记录日志，不影响已写入的原始数据，由 rollup_backfill 补齐"""
+    try:
+        well_data_rollups.update(db.session, rows)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"well_data 汇总更新失败（{len(rows)} 条），可执行 rollup_backfill 补齐: {e}")
+
+
+# 数据库不可用时的本地落盘队列，恢复后按顺序回放
+well_data_forwarder = SpoolForwarder(Spool(app.config["SPOOL_DIR"],
+                                           segment_bytes=app.config["SPOOL_SEGMENT_SIZE"] * 1024 * 1024),
+                                     _insert_well_data,
+                                     retry_interval=app.config["SPOOL_RETRY_INTERVAL"],
+                                     name="well-data-forwarder")
+
+# well_data 批量写入器，按条数或时间期限落库
+well_data_writer = BatchWriter(well_data_forwarder.write,
+                               batch_size=app.config["BATCH_SIZE"],
+                               flush_interval=app.config["BATCH_INTERVAL"],
+                               name="well-data-writer")
+
+# 死区过滤：数值无明显变化且未到心跳时间的数据不写入，读取端按采样保持还原
+well_data_deadband = DeadbandFilter(app.config["DEADBAND_FIELDS"], app.config["DEADBAND_HEARTBEAT"]) \
+    if app.config["DEADBAND_ENABLED"] else None
+
+
 def process_data(measurements):
+    """
+    存储采集数据，由入库线程池调用
+    :param measurements: 采集数据
+    :return:
+    """
     try:
-        with app.app_context():
-            # 数据库健康检查
-            # 存储设备数据
-            well_data = WellData(code=measurements["wellCode"], dp=measurements["dp"], gvf=measurements["GVF"],
-                                 gas_flow_rate=measurements["gasFlowRate"],
-                                 liquid_flow_rate=measurements["liquidFlowRate"],
-                                 oil_flow_rate=measurements["oilFlowRate"],
-                                 pressure=measurements["pressure"],
-                                 temperature=measurements["temperature"],
-                                 water_cut=measurements["waterCut"],
-                                 water_flow_rate=measurements["waterFlowRate"])
-            db.session.add(well_data)
-            db.session.commit()
+        # 数据库健康检查
+        # 存储设备数据（采集时间在此确定，不依赖落库时间）
+        row = {"code": str(measurements["wellCode"]),
+               "dp": measurements["dp"],
+               "gvf": measurements["GVF"],
+               "gas_flow_rate": measurements["gasFlowRate"],
+               "liquid_flow_rate": measurements["liquidFlowRate"],
+               "oil_flow_rate": measurements["oilFlowRate"],
+               "pressure": measurements["pressure"],
+               "temperature": measurements["temperature"],
+               "water_cut": measurements["waterCut"],
+               "water_flow_rate": measurements["waterFlowRate"],
+               "create_time": datetime.now()}
+        if well_data_deadband is None or well_data_deadband.accept(row["code"], row,
+                                                                   row["create_time"].timestamp()):
+            well_data_writer.add(row)
+
+        # point = DataPoint(device_id=str(measurements["wellCode"]),
+        #                   timestamp=datetime.now(),
+        #                   dp=measurements["dp"],
+        #                   pressure=measurements["pressure"],
+        #                   temperature=measurements["temperature"],
+        #                   water_cut=measurements["waterCut"],
+        #                   liquid_flow= measurements["liquidFlowRate"],
+        #                   water_flow=measurements["waterFlowRate"],
+        #                   oil_flow=measurements["oilFlowRate"],
+        #                   gas_flow=measurements["gasFlowRate"])
 
-            # point = DataPoint(device_id=str(measurements["wellCode"]),
-            #                   timestamp=datetime.now(),
-            #                   dp=measurements["dp"],
-            #                   pressure=measurements["pressure"],
-            #                   temperature=measurements["temperature"],
-            #                   water_cut=measurements["waterCut"],
-            #                   liquid_flow= measurements["liquidFlowRate"],
-            #                   water_flow=measurements["waterFlowRate"],
-            #                   oil_flow=measurements["oilFlowRate"],
-            #                   gas_flow=measurements["gasFlowRate"])
-
-            # data_analyzer.add_data(measurements["wellCode"], point)
+        # data_analyzer.add_data(measurements["wellCode"], point)
 
     except Exception as e:
         logger.error("采集数据失败：{}".format(str(e)))
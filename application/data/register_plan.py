@@ -0,0 +1,156 @@
+import json
+import struct
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+# 各数据类型占用的寄存器个数及对应的 struct 格式符
+REGISTER_TYPES = {
+    "int": (1, "H"),
+    "uint16": (1, "H"),
+    "int16": (1, "h"),
+    "uint32": (2, "I"),
+    "int32": (2, "i"),
+    "float": (2, "f"),
+    "float64": (4, "d"),
+}
+
+# (字节序, 字序) -> (寄存器打包字节序, 解析字节序)
+# 寄存器按打包字节序写成字节串后，用解析字节序一次性解出全部测点，例如
+# ABCD: 大端字节、大端字；CDAB: 大端字节、字交换；BADC: 字节交换；DCBA: 全小端
+_ORDER_PREFIX = {
+    ("big", "big"): (">", ">"),
+    ("big", "little"): ("<", "<"),
+    ("little", "big"): ("<", ">"),
+    ("little", "little"): (">", "<"),
+}
+
+
+@dataclass
+class ReadBlock:
+    """一次 read_holding_registers 调用覆盖的连续寄存器块，附带预编译的解析计划"""
+    address: int
+    count: int
+    points: List[dict] = field(default_factory=list)
+    # (寄存器打包字节序, 解析字节序)
+    order: Tuple[str, str] = (">", ">")
+    # 寄存器 -> 字节串
+    packer: struct.Struct = None
+    # 字节串 -> 全部测点原始值
+    decoder: struct.Struct = None
+    # 每个测点的 (名称, 倍率, 保留小数位)
+    fields: List[Tuple[str, float, int]] = field(default_factory=list)
+
+
+def point_width(point: dict) -> int:
+    """测点占用的寄存器个数"""
+    return REGISTER_TYPES[point["type"]][0]
+
+
+def point_order(point: dict, defaults: dict = None) -> Tuple[str, str]:
+    """测点的 (寄存器打包字节序, 解析字节序)"""
+    defaults = defaults or {}
+    byte_order = point.get("byte_order", defaults.get("byte_order", "big"))
+    word_order = point.get("word_order", defaults.get("word_order", "big"))
+    return _ORDER_PREFIX[(byte_order, word_order)]
+
+
+def plan_block_reads(points: List[dict], max_gap: int = 8, max_count: int = 125,
+                     defaults: dict = None) -> List[ReadBlock]:
+    """
+    将测点合并为尽量少的块读取，并为每个块预编译解析计划
+
+    :param points: 测点定义（同 MEASUREMENT_POINTS）
+    :param max_gap: 相邻测点之间允许夹带的空闲寄存器个数，超过则拆分新块
+    :param max_count: 单次读取的最大寄存器个数（Modbus 协议上限 125）
+    :param defaults: 寄存器配置级别的默认 byte_order / word_order
+    :return: 按地址排序的读取块
+    """
+    blocks: List[ReadBlock] = []
+    for point in sorted(points, key=lambda p: p["address"]):
+        address = point["address"]
+        width = point_width(point)
+        order = point_order(point, defaults)
+        if width > max_count:
+            raise ValueError(f"测点 {point['name']} 宽度 {width} 超过单次读取上限 {max_count}")
+
+        if blocks:
+            block = blocks[-1]
+            block_end = block.address + block.count
+            gap = address - block_end
+            new_count = max(block_end, address + width) - block.address
+            # 字节序不同的测点无法共用一个解析格式
+            if 0 <= gap <= max_gap and new_count <= max_count and order == block.order:
+                block.count = new_count
+                block.points.append(point)
+                continue
+
+        blocks.append(ReadBlock(address=address, count=width, points=[point], order=order))
+
+    for block in blocks:
+        _compile_block(block)
+    return blocks
+
+
+def _compile_block(block: ReadBlock):
+    """生成块的 struct 格式：测点之间的空闲寄存器以填充字节跳过"""
+    pack_prefix, unpack_prefix = block.order
+    fmt = unpack_prefix
+    cursor = block.address
+    for point in block.points:
+        width, code = REGISTER_TYPES[point["type"]]
+        fmt += "x" * (2 * (point["address"] - cursor)) + code
+        cursor = point["address"] + width
+        block.fields.append((point["name"], point.get("scale", 1), point.get("decimla", 2)))
+    fmt += "x" * (2 * (block.address + block.count - cursor))
+    block.packer = struct.Struct(f"{pack_prefix}{block.count}H")
+    block.decoder = struct.Struct(fmt)
+
+
+def decode_block(block: ReadBlock, registers: List[int]) -> Dict[str, float]:
+    """一次 unpack 解析块内全部测点，再按倍率与小数位处理"""
+    values = block.decoder.unpack(block.packer.pack(*registers[:block.count]))
+    data = {}
+    for (name, scale, decimals), value in zip(block.fields, values):
+        if scale != 1:
+            value = value * scale
+        data[name] = round(value, decimals) if decimals else value
+    return data
+
+
+class ProfileCompiler:
+    """寄存器配置编译缓存：配置内容不变时复用已编译的读取计划"""
+
+    def __init__(self, max_gap: int = 8, max_count: int = 125):
+        self.max_gap = max_gap
+        self.max_count = max_count
+        self._cache: Dict[str, List[ReadBlock]] = {}
+        self._lock = threading.Lock()
+
+    def compile(self, profile) -> List[ReadBlock]:
+        """
+        :param profile: 测点列表，或 {"byte_order", "word_order", "points"} 形式的配置
+        """
+        if isinstance(profile, list):
+            profile = {"points": profile}
+        key = json.dumps(profile, sort_keys=True, ensure_ascii=False)
+        with self._lock:
+            plan = self._cache.get(key)
+            if plan is None:
+                defaults = {k: v for k, v in profile.items() if k in ("byte_order", "word_order")}
+                plan = plan_block_reads(profile["points"], self.max_gap, self.max_count, defaults)
+                self._cache[key] = plan
+            return plan
+
+
+def encode_block(block: ReadBlock, data: Dict[str, float]) -> List[int]:
+    """decode_block 的逆过程：将测点值按块的解析计划编码为寄存器，缺失的测点按 0 处理"""
+    values = []
+    for point, (name, scale, _) in zip(block.points, block.fields):
+        value = data.get(name, 0)
+        if scale != 1:
+            value = value / scale
+        if REGISTER_TYPES[point["type"]][1] not in "fd":
+            value = int(round(value))
+        values.append(value)
+    return list(block.packer.unpack(block.decoder.pack(*values)))
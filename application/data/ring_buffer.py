@@ -0,0 +1,223 @@
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Mapping, Optional, Tuple, TypeVar
+
+import numpy as np
+
+"""
+按列存储的定长环形缓冲区：时间戳为 int64 毫秒，每个测量字段一个数值数组
+"""
+
+T = TypeVar("T")
+
+
+def to_millis(value: datetime) -> int:
+    return int(value.timestamp() * 1000)
+
+
+def from_millis(value: int) -> datetime:
+    return datetime.fromtimestamp(value / 1000)
+
+
+class ColumnarRingBuffer:
+    """
+    列式环形缓冲区
+
+    底层数组长度为容量的两倍，每次写入同时写到 i 和 i + capacity 两个位置（镜像），
+    任意时刻窗口内的数据在数组中都是连续的一段，切片返回视图而无需拷贝或拼接。
+    写满后继续写入会覆盖最早的数据。缺失值以 NaN 存储。
+
+    数据正常按时间顺序追加，时间范围查询用二分查找定位，O(log n)；
+    记录相邻逆序对的个数，存在乱序数据时退化为逐点过滤并返回拷贝。
+
+    写入方需自行串行（同一时刻只有一个线程写入）；其他线程以 window_copy() / tail_copy() 无锁读取：
+    写入前后各递增一次版本号（顺序锁），读取期间版本号变化则重试，得到一致的拷贝。
+
+    :param capacity: 最多保存的数据点个数
+    :param fields: 测量字段名称
+    :param dtype: 测量字段的数值类型
+    """
+
+    def __init__(self, capacity: int, fields: Iterable[str], dtype=np.float32):
+        self.capacity = capacity
+        self.fields = tuple(fields)
+        self.timestamps = np.zeros(2 * capacity, dtype=np.int64)
+        self.columns: Dict[str, np.ndarray] = {field: np.full(2 * capacity, np.nan, dtype=dtype)
+                                               for field in self.fields}
+        # 最早数据点的物理下标（< capacity）及数据点个数
+        self._start = 0
+        self._size = 0
+        # 相邻两点时间戳逆序的个数，为 0 时时间戳单调不减
+        self._inversions = 0
+        # 顺序锁版本号，奇数表示正在写入
+        self._version = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, timestamp: int, values: Mapping[str, Optional[float]]) -> Optional[dict]:
+        """
+        追加一个数据点，缓冲区已满时返回被覆盖的最早数据点
+
+        :param timestamp: 毫秒时间戳
+        :param values: 字段 -> 值，未提供或为 None 的字段记为 NaN
+        """
+        evicted = None
+        if self._size == self.capacity:
+            evicted = self.popleft()
+        self._version += 1
+        try:
+            if self._size and timestamp < self.timestamps[self._start + self._size - 1]:
+                self._inversions += 1
+            position = (self._start + self._size) % self.capacity
+            for index in (position, position + self.capacity):
+                self.timestamps[index] = timestamp
+                for field, column in self.columns.items():
+                    value = values.get(field)
+                    column[index] = np.nan if value is None else value
+            self._size += 1
+        finally:
+            self._version += 1
+        return evicted
+
+    def popleft(self) -> dict:
+        """移除并返回最早的数据点"""
+        if not self._size:
+            raise IndexError("pop from an empty buffer")
+        row = self.row(0)
+        self._version += 1
+        try:
+            if self._size > 1 and self.timestamps[self._start + 1] < row["timestamp"]:
+                self._inversions -= 1
+            self._start = (self._start + 1) % self.capacity
+            self._size -= 1
+        finally:
+            self._version += 1
+        return row
+
+    def row(self, index: int) -> dict:
+        """按逻辑下标（支持负数）返回数据点，包含 timestamp 及各字段，NaN 转为 None"""
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("buffer index out of range")
+        position = self._start + index
+        row = {"timestamp": int(self.timestamps[position])}
+        for field, column in self.columns.items():
+            value = float(column[position])
+            row[field] = None if value != value else value
+        return row
+
+    def first_timestamp(self) -> Optional[int]:
+        return int(self.timestamps[self._start]) if self._size else None
+
+    def timestamp_view(self) -> np.ndarray:
+        """窗口内全部时间戳（视图）"""
+        return self.timestamps[self._start:self._start + self._size]
+
+    def column(self, field: str) -> np.ndarray:
+        """窗口内某字段的全部值（视图）"""
+        return self.columns[field][self._start:self._start + self._size]
+
+    @property
+    def monotonic(self) -> bool:
+        return not self._inversions
+
+    def window(self, start: int = None, end: int = None) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        返回 [start, end] 毫秒时间范围内的时间戳与各字段，时间戳单调时为视图
+
+        :param start: 起始毫秒时间戳，None 表示不限
+        :param end: 结束毫秒时间戳（含），None 表示不限
+        """
+        timestamps = self.timestamp_view()
+        if not self.monotonic:
+            mask = np.ones(self._size, dtype=bool)
+            if start is not None:
+                mask &= timestamps >= start
+            if end is not None:
+                mask &= timestamps <= end
+            return timestamps[mask], {field: self.column(field)[mask] for field in self.fields}
+        lower = 0 if start is None else int(np.searchsorted(timestamps, start, side="left"))
+        upper = self._size if end is None else int(np.searchsorted(timestamps, end, side="right"))
+        return self._slice(lower, max(lower, upper))
+
+    def tail(self, start: int) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        返回时间戳不早于 start 的最近数据（视图）
+
+        从尾部倍增步长找到包含 start 的区间再二分，只访问最近的 O(log k) 个点，k 为结果个数，
+        适合每个样本都要查看最近几分钟数据的场景。
+        """
+        if not self.monotonic:
+            return self.window(start)
+        timestamps = self.timestamp_view()
+        step = 1
+        while step < self._size and timestamps[self._size - step] >= start:
+            step *= 2
+        lower = max(self._size - step, 0)
+        upper = self._size - step // 2
+        lower += int(np.searchsorted(timestamps[lower:upper], start, side="left"))
+        return self._slice(lower, self._size)
+
+    def consistent(self, read: Callable[[], T]) -> T:
+        """
+        无锁一致性读取：执行 read，期间有写入则重试
+
+        :param read: 读取函数，须返回拷贝而非视图（视图引用的位置可能在返回后被覆盖）
+        """
+        while True:
+            version = self._version
+            if version & 1:
+                # 写入进行中，让出 GIL 等待写入完成
+                time.sleep(0)
+                continue
+            try:
+                result = read()
+            except (IndexError, ValueError):
+                # 读到写入中途的状态，版本号未变化则为真实错误
+                if self._version == version:
+                    raise
+                continue
+            if self._version == version:
+                return result
+
+    def window_copy(self, start: int = None, end: int = None) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """window() 的一致性拷贝，可在写入线程之外无锁调用"""
+        return self.consistent(lambda: _copy(*self.window(start, end)))
+
+    def tail_copy(self, start: int) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """tail() 的一致性拷贝，可在写入线程之外无锁调用"""
+        return self.consistent(lambda: _copy(*self.tail(start)))
+
+    def _slice(self, lower: int, upper: int) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        begin, end = self._start + lower, self._start + upper
+        return self.timestamps[begin:end], {field: column[begin:end] for field, column in self.columns.items()}
+
+    def nbytes(self) -> int:
+        return self.timestamps.nbytes + sum(column.nbytes for column in self.columns.values())
+
+    def dump_state(self) -> dict:
+        """窗口内数据按逻辑顺序保存（拷贝）"""
+        return {"timestamps": self.timestamp_view().copy(),
+                "columns": {field: self.column(field).copy() for field in self.fields}}
+
+    def load_state(self, state: dict):
+        """由快照恢复，超出容量时保留最近的数据；快照中没有的字段记为 NaN"""
+        timestamps = state["timestamps"][-self.capacity:]
+        size = len(timestamps)
+        self._version += 1
+        try:
+            self._start, self._size = 0, size
+            for offset in (0, self.capacity):
+                self.timestamps[offset:offset + size] = timestamps
+                for field, column in self.columns.items():
+                    values = state["columns"].get(field)
+                    column[offset:offset + size] = np.nan if values is None else values[-self.capacity:]
+            self._inversions = int(np.count_nonzero(np.diff(timestamps) < 0))
+        finally:
+            self._version += 1
+
+
+def _copy(timestamps: np.ndarray, columns: Dict[str, np.ndarray]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    return timestamps.copy(), {field: column.copy() for field, column in columns.items()}
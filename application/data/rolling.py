@@ -0,0 +1,163 @@
+import math
+from collections import deque
+from typing import Callable, Dict, Iterable, Mapping, Optional
+
+import numpy as np
+
+# DataPoint 中参与滚动统计的测量字段
+MEASUREMENT_FIELDS = ("dp", "pressure", "temperature", "water_cut",
+                      "liquid_flow", "water_flow", "oil_flow", "gas_flow")
+
+
+class RollingStats:
+    """
+    滑动窗口的增量统计：累计和 / 平方和 / 计数 + 单调队列求最值
+
+    窗口按先进先出变化：push() 在尾部加入一个值，pop() 移除最早加入的值（由调用方保证与窗口同步），
+    均值、方差、最小值、最大值均为 O(1) 查询，push / pop 均摊 O(1)。值为 None 或 NaN 时只占位不参与统计。
+    """
+
+    # 每移除多少个值后用窗口内的值重算一次累计和，抵消浮点加减的累积误差
+    RESYNC_INTERVAL = 100000
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        # 窗口内元素的序号区间 [_head, _tail)
+        self._head = 0
+        self._tail = 0
+        # (序号, 值)，_min 单调递增、_max 单调递减，队首即窗口最值
+        self._min = deque()
+        self._max = deque()
+        self._removed = 0
+
+    def push(self, value: Optional[float]):
+        seq = self._tail
+        self._tail += 1
+        if value is None or value != value:
+            return
+        self.count += 1
+        self.total += value
+        self.total_sq += value * value
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((seq, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((seq, value))
+
+    def pop(self, value: Optional[float]):
+        """移除窗口中最早的值，value 为该值本身"""
+        if self._head >= self._tail:
+            return
+        seq = self._head
+        self._head += 1
+        if self._min and self._min[0][0] == seq:
+            self._min.popleft()
+        if self._max and self._max[0][0] == seq:
+            self._max.popleft()
+        if value is None or value != value:
+            return
+        self.count -= 1
+        if not self.count:
+            self.total = self.total_sq = 0.0
+            return
+        self.total -= value
+        self.total_sq -= value * value
+        self._removed += 1
+
+    def needs_resync(self) -> bool:
+        return self._removed >= self.RESYNC_INTERVAL
+
+    def resync(self, values: Iterable[Optional[float]]):
+        """用窗口内的全部值重算累计和"""
+        values = [float(value) for value in values if value is not None and value == value]
+        self.count = len(values)
+        self.total = math.fsum(values)
+        self.total_sq = math.fsum(value * value for value in values)
+        self._removed = 0
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    @property
+    def variance(self) -> Optional[float]:
+        """总体方差"""
+        if not self.count:
+            return None
+        mean = self.total / self.count
+        return max(self.total_sq / self.count - mean * mean, 0.0)
+
+    @property
+    def std(self) -> Optional[float]:
+        variance = self.variance
+        return None if variance is None else math.sqrt(variance)
+
+    @property
+    def min(self) -> Optional[float]:
+        return self._min[0][1] if self._min else None
+
+    @property
+    def max(self) -> Optional[float]:
+        return self._max[0][1] if self._max else None
+
+    def snapshot(self) -> dict:
+        return {"count": self.count, "mean": self.mean, "variance": self.variance,
+                "std": self.std, "min": self.min, "max": self.max}
+
+    def dump_state(self) -> dict:
+        return {
+            "sums": np.array([self.total, self.total_sq], dtype=np.float64),
+            "counters": np.array([self.count, self._head, self._tail, self._removed], dtype=np.int64),
+            "min": np.array(self._min, dtype=np.float64).reshape(-1, 2),
+            "max": np.array(self._max, dtype=np.float64).reshape(-1, 2),
+        }
+
+    def load_state(self, state: dict):
+        self.total, self.total_sq = state["sums"].tolist()
+        self.count, self._head, self._tail, self._removed = state["counters"].tolist()
+        self._min = deque((int(seq), value) for seq, value in state["min"].tolist())
+        self._max = deque((int(seq), value) for seq, value in state["max"].tolist())
+
+
+class RollingWindow:
+    """
+    单台设备窗口内各测量字段的滚动统计，与设备的数据窗口同步增删
+
+    :param fields: 统计的字段名称
+    """
+
+    def __init__(self, fields: Iterable[str] = MEASUREMENT_FIELDS):
+        self.stats: Dict[str, RollingStats] = {field: RollingStats() for field in fields}
+
+    def push(self, values: Mapping[str, Optional[float]]):
+        """:param values: 字段 -> 值，如 vars(data_point) 或环形缓冲区的一行"""
+        for field, stats in self.stats.items():
+            stats.push(values.get(field))
+
+    def pop(self, values: Mapping[str, Optional[float]]):
+        for field, stats in self.stats.items():
+            stats.pop(values.get(field))
+
+    def resync(self, values_of: Callable[[str], Iterable[Optional[float]]]):
+        """
+        累计误差达到阈值的字段用窗口内的值重算
+
+        :param values_of: 字段名 -> 窗口内该字段的全部值
+        """
+        for field, stats in self.stats.items():
+            if stats.needs_resync():
+                stats.resync(values_of(field))
+
+    def get(self, field: str) -> Optional[RollingStats]:
+        return self.stats.get(field)
+
+    def dump_state(self) -> dict:
+        return {field: stats.dump_state() for field, stats in self.stats.items()}
+
+    def load_state(self, state: dict):
+        for field, stats_state in state.items():
+            if field in self.stats:
+                self.stats[field].load_state(stats_state)
@@ -0,0 +1,7 @@
+from application import app
+from application.data_management.storage.rollup import RollupStore
+from application.entity import WellData, WellDataRollup, WELL_DATA_ROLLUP_FIELDS
+
+# well_data 多粒度汇总，入库时由 processor 在原始数据提交后增量维护
+well_data_rollups = RollupStore(WellDataRollup, WellData.__table__, "code", "create_time", WELL_DATA_ROLLUP_FIELDS,
+                                filters=[WellData.__table__.c.valid == 1], max_hold=app.config["ROLLUP_MAX_HOLD"])
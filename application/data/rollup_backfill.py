@@ -0,0 +1,27 @@
+"""
+回填 well_data 历史数据的多粒度汇总
+
+    python -m application.data.rollup_backfill --start "2025-01-01 00:00:00" [--end ...] [--code ...]
+"""
+import argparse
+from datetime import datetime
+from application import app, db, logger
+from application.data.rollup import well_data_rollups
+from application.utils.tools import parse_time_range
+
+
+def main():
+    parser = argparse.ArgumentParser(description="回填 well_data 汇总表")
+    parser.add_argument("--start", required=True, help="开始时间，格式 %%Y-%%m-%%d %%H:%%M:%%S")
+    parser.add_argument("--end", help="结束时间，默认当前时间")
+    parser.add_argument("--code", help="井号，默认全部")
+    args = parser.parse_args()
+
+    start, end = parse_time_range(args.start, args.end or datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    with app.app_context():
+        total = well_data_rollups.backfill(db.session, start, end, args.code)
+    logger.info(f"well_data 汇总回填完成: {start} ~ {end}，共 {total} 条原始数据")
+
+
+if __name__ == "__main__":
+    main()
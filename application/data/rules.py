@@ -0,0 +1,270 @@
+import operator
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from application.data.flatline import FlatlineMonitor
+
+"""
+声明式告警规则引擎
+
+规则以数据（dict，通常来自 setting / config 表中的 JSON）定义，启动时编译为列下标与阈值数组：
+每个样本只写入设备所在行（O(字段数)），每个评估周期对全部设备、同类规则做一次 NumPy 广播比较，
+增加设备或规则几乎不增加单个样本的处理开销。
+"""
+
+THRESHOLD = "threshold"  # 测量值超出阈值
+RATE = "rate"  # 相邻两个样本的变化率（每秒）超出阈值
+FLATLINE = "flatline"  # 测量值持续 duration 秒无变化（传感器卡死）
+MISSING = "missing"  # 超过 duration 秒未收到数据
+RULE_KINDS = (THRESHOLD, RATE, FLATLINE, MISSING)
+
+_OPS: Dict[str, Callable] = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le}
+
+_DEFAULT_MESSAGES = {
+    THRESHOLD: "设备 {device_id} {field} 为 {value:g}，超出阈值 {op} {threshold:g}",
+    RATE: "设备 {device_id} {field} 变化率 {value:g}/秒，超出阈值 {op} {threshold:g}/秒",
+    FLATLINE: "设备 {device_id} {field} 已连续 {minutes:.0f} 分钟无变化，传感器可能卡死",
+    MISSING: "设备 {device_id} 已 {minutes:.0f} 分钟未收到数据",
+}
+
+
+@dataclass(frozen=True)
+class AlertRule:
+    """
+    告警规则
+
+    :param name: 规则名称
+    :param kind: threshold / rate / flatline / missing
+    :param alert_type: 告警类型名称，由调用方映射为各自的告警类型枚举
+    :param field: 测量字段（missing 不需要）
+    :param op: 比较运算 > / >= / < / <=（threshold、rate）
+    :param value: 阈值（threshold），或每秒变化量阈值（rate）
+    :param duration: 持续时间 单位:秒（flatline、missing）
+    :param tolerance: 平线容差（flatline）
+    :param min_samples: 判定为平线所需的最少样本数（flatline）
+    :param severity: 告警级别
+    :param message: 告警内容模板，可用 {device_id} {field} {value} {op} {threshold} {minutes}
+    """
+    name: str
+    kind: str
+    alert_type: str
+    field: Optional[str] = None
+    op: str = ">"
+    value: Optional[float] = None
+    duration: Optional[float] = None
+    tolerance: float = 0.01
+    min_samples: int = 2
+    severity: str = "warning"
+    message: Optional[str] = None
+
+    @property
+    def threshold(self) -> float:
+        return self.duration if self.kind in (FLATLINE, MISSING) else self.value
+
+    def format(self, device_id: str, value: float) -> str:
+        return (self.message or _DEFAULT_MESSAGES[self.kind]).format(
+            device_id=device_id, field=self.field, value=value, op=self.op, threshold=self.threshold,
+            minutes=value / 60)
+
+
+def parse_rules(items: Iterable[Mapping]) -> List[AlertRule]:
+    """
+    由配置解析规则，配置不合法时抛出 ValueError
+
+    :param items: 规则 dict 列表，键与 AlertRule 字段相同，name 缺省为 "{alert_type 小写}:{field}"
+    """
+    rules = []
+    for item in items:
+        item = dict(item)
+        kind = item.get("kind")
+        if kind not in RULE_KINDS:
+            raise ValueError(f"不支持的告警规则类型: {kind}")
+        if "alert_type" not in item:
+            raise ValueError(f"告警规则缺少 alert_type: {item}")
+        if kind != MISSING and not item.get("field"):
+            raise ValueError(f"告警规则缺少 field: {item}")
+        if kind in (THRESHOLD, RATE):
+            if item.get("op", ">") not in _OPS:
+                raise ValueError(f"不支持的比较运算: {item.get('op')}")
+            if item.get("value") is None:
+                raise ValueError(f"告警规则缺少 value: {item}")
+        elif item.get("duration") is None:
+            raise ValueError(f"告警规则缺少 duration: {item}")
+        item.setdefault("name", ":".join(str(part) for part in (item["alert_type"].lower(), item.get("field")) if part))
+        rules.append(AlertRule(**item))
+
+    flatline_fields = [rule.field for rule in rules if rule.kind == FLATLINE]
+    if len(flatline_fields) != len(set(flatline_fields)):
+        raise ValueError("同一字段只能配置一条 flatline 规则")
+    return rules
+
+
+class RuleHit(NamedTuple):
+    """规则命中：设备、规则及触发时的值"""
+    device_id: str
+    rule: AlertRule
+    value: float
+
+    @property
+    def message(self) -> str:
+        return self.rule.format(self.device_id, self.value)
+
+
+class _Check:
+    """同一数据源、同一比较运算的一组规则，编译为列下标与阈值数组"""
+
+    def __init__(self, source: Optional[str], op: str, rules: List[AlertRule], columns: Sequence[int],
+                 thresholds: Sequence[float]):
+        self.source = source
+        self.compare = _OPS[op]
+        self.rules = rules
+        self.columns = np.asarray(columns, dtype=np.intp)
+        self.thresholds = np.asarray(thresholds, dtype=np.float64)
+
+
+class RuleEngine:
+    """
+    告警规则引擎
+
+    按设备维护各字段自上次评估以来的最大值、最小值、最大变化率与平线持续时长（设备 × 字段矩阵），
+    update() 写入一行，evaluate() 对自上次评估以来有新数据的设备逐组比较；missing 规则对全部设备比较。
+
+    :param rules: 告警规则
+    :param capacity: 初始设备容量，不足时按倍数扩容
+    """
+
+    def __init__(self, rules: Sequence[AlertRule], capacity: int = 64):
+        self.rules = list(rules)
+        self.fields = tuple(dict.fromkeys(rule.field for rule in self.rules if rule.field))
+        self._columns = {field: index for index, field in enumerate(self.fields)}
+        # 平线检测沿用单调队列实现，每个样本更新后把已判定为平线的持续时长写入矩阵
+        self.flatline = FlatlineMonitor({
+            rule.field: {"tolerance": rule.tolerance, "duration": rule.duration, "min_samples": rule.min_samples}
+            for rule in self.rules if rule.kind == FLATLINE})
+        self._checks = self._compile()
+
+        self._devices: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._capacity = 0
+        self._allocate(capacity)
+        self._lock = threading.Lock()
+
+    def _compile(self) -> List[_Check]:
+        groups: Dict[tuple, List[AlertRule]] = {}
+        for rule in self.rules:
+            if rule.kind == THRESHOLD:
+                # 大于类比较周期内最大值，小于类比较最小值，周期内多个样本时不漏掉峰值
+                key = ("_high" if rule.op in (">", ">=") else "_low", rule.op)
+            elif rule.kind == RATE:
+                key = ("_rate", rule.op)
+            elif rule.kind == FLATLINE:
+                key = ("_stuck", ">")
+            else:
+                key = (None, ">")
+            groups.setdefault(key, []).append(rule)
+
+        checks = []
+        for (source, op), rules in groups.items():
+            columns = [self._columns[rule.field] if rule.field else 0 for rule in rules]
+            if source == "_stuck":
+                # 平线时长只在满足 duration、min_samples 后写入，大于 0 即命中
+                thresholds = [0.0] * len(rules)
+            else:
+                thresholds = [rule.threshold for rule in rules]
+            checks.append(_Check(source, op, rules, columns, thresholds))
+        return checks
+
+    def _allocate(self, capacity: int):
+        """按容量分配（或扩容）状态数组，新行为 NaN / False"""
+        previous = self._capacity
+
+        def grow(name: str, shape: tuple, fill, dtype=np.float64):
+            array = np.full(shape, fill, dtype=dtype)
+            if previous:
+                array[:previous] = getattr(self, name)
+            setattr(self, name, array)
+
+        for name in ("_high", "_low", "_rate", "_stuck", "_prev"):
+            grow(name, (capacity, len(self.fields)), np.nan)
+        grow("_prev_time", (capacity,), np.nan)
+        grow("_last_time", (capacity,), np.nan)
+        grow("_fresh", (capacity,), False, dtype=bool)
+        self._capacity = capacity
+
+    def _row(self, device_id: str) -> int:
+        index = self._index.get(device_id)
+        if index is None:
+            index = len(self._devices)
+            if index == self._capacity:
+                self._allocate(max(self._capacity * 2, 1))
+            self._devices.append(device_id)
+            self._index[device_id] = index
+        return index
+
+    def update(self, device_id: str, timestamp: float, values: Mapping[str, Optional[float]]):
+        """
+        写入一个样本
+
+        :param timestamp: 秒级时间戳，missing 规则以此计算距今时长
+        :param values: 字段 -> 值，None 或缺少的字段记为 NaN
+        """
+        row = np.array([values.get(field) for field in self.fields], dtype=np.float64)
+        flat = self.flatline.update(device_id, timestamp, values) if self.flatline.rules else {}
+
+        with self._lock:
+            index = self._row(device_id)
+            np.fmax(self._high[index], row, out=self._high[index])
+            np.fmin(self._low[index], row, out=self._low[index])
+            elapsed = timestamp - self._prev_time[index]
+            if elapsed > 0:
+                np.fmax(self._rate[index], np.abs(row - self._prev[index]) / elapsed, out=self._rate[index])
+            if not elapsed < 0:
+                # 迟到的样本不作为计算变化率的基准
+                self._prev[index] = row
+                self._prev_time[index] = timestamp
+            self._last_time[index] = np.fmax(self._last_time[index], timestamp)
+            for field, seconds in flat.items():
+                column = self._columns[field]
+                self._stuck[index, column] = np.fmax(self._stuck[index, column], seconds)
+            self._fresh[index] = True
+
+    def evaluate(self, now: float = None, device_id: str = None) -> List[RuleHit]:
+        """
+        评估规则并开始下一个周期
+
+        :param now: 当前秒级时间戳，用于 missing 规则
+        :param device_id: 只评估该设备（逐样本评估的场景），None 为全部设备
+        """
+        now = time.time() if now is None else now
+        hits = []
+        with self._lock:
+            if device_id is None:
+                rows = np.arange(len(self._devices))
+            elif device_id in self._index:
+                rows = np.array([self._index[device_id]])
+            else:
+                return hits
+            fresh = rows[self._fresh[rows]]
+
+            for check in self._checks:
+                if check.source is None:
+                    candidates = rows
+                    values = np.broadcast_to((now - self._last_time[rows])[:, None], (len(rows), len(check.rules)))
+                else:
+                    candidates = fresh
+                    values = getattr(self, check.source)[np.ix_(fresh, check.columns)]
+                mask = check.compare(values, check.thresholds)
+                for row, column in zip(*np.nonzero(mask)):
+                    hits.append(RuleHit(self._devices[candidates[row]], check.rules[column],
+                                        float(values[row, column])))
+
+            self._high[fresh] = np.nan
+            self._low[fresh] = np.nan
+            self._rate[fresh] = np.nan
+            self._stuck[fresh] = np.nan
+            self._fresh[fresh] = False
+        return hits
@@ -0,0 +1,381 @@
+"""
+Modbus 从站模拟器
+
+按寄存器配置（默认即 MEASUREMENT_POINTS）编码测点值，通过 Modbus TCP 或伪终端串口（RTU）对外提供
+读保持/输入寄存器服务，可模拟多个从站、响应延迟、异常应答与无应答，用于在没有现场设备的环境中
+对采集链路做吞吐与延迟测试。
+
+    python -m application.data.simulator --tcp 127.0.0.1:5020 --slaves 1-8 --latency 0.02
+    python -m application.data.simulator --pty --slaves 1-4 --replay data/Caveman423.xlsx
+    python -m application.data.simulator --tcp 127.0.0.1:5020 --slaves 1-8 --bench 100
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import random
+import select
+import socket
+import socketserver
+import struct
+import threading
+import time
+import tty
+from typing import Callable, Dict, List, Optional
+
+from application import logger
+from application.data.register_plan import ReadBlock, encode_block
+
+# 功能码
+READ_HOLDING_REGISTERS = 0x03
+READ_INPUT_REGISTERS = 0x04
+# 异常码
+ILLEGAL_FUNCTION = 0x01
+ILLEGAL_DATA_ADDRESS = 0x02
+ILLEGAL_DATA_VALUE = 0x03
+SLAVE_DEVICE_FAILURE = 0x04
+
+# MBAP 报文头：事务号、协议号、长度、单元号
+_MBAP = struct.Struct(">HHHB")
+_READ_REQUEST = struct.Struct(">HH")
+# RTU 读请求固定长度：从站号 + 功能码 + 起始地址 + 数量 + CRC
+_RTU_READ_FRAME_SIZE = 8
+
+# 模拟数据的 (均值, 波动幅度)，未列出的测点按 (0, 1) 生成
+SYNTHETIC_PROFILE = {
+    "liquidFlowRate": (120.0, 8.0),
+    "waterFlowRate": (80.0, 6.0),
+    "oilFlowRate": (40.0, 3.0),
+    "gasFlowRate": (900.0, 60.0),
+    "GVF": (35.0, 4.0),
+    "temperature": (45.0, 1.5),
+    "pressure": (1200.0, 40.0),
+    "waterCut": (66.0, 3.0),
+    "dp": (12.0, 1.0),
+}
+
+
+def crc16(frame: bytes) -> int:
+    """Modbus RTU CRC16"""
+    crc = 0xFFFF
+    for byte in frame:
+        crc ^= byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+    return crc
+
+
+def parse_slaves(text: str) -> List[int]:
+    """解析从站号列表，如 1-8,10,12"""
+    slaves = []
+    for part in text.split(","):
+        if "-" in part:
+            start, end = part.split("-")
+            slaves.extend(range(int(start), int(end) + 1))
+        elif part.strip():
+            slaves.append(int(part))
+    return slaves
+
+
+def load_records(path: str) -> List[dict]:
+    """读取录制的井数据（csv 或 Excel），列名与测点名称一致；Excel 需另行安装 pandas 与 openpyxl"""
+    if path.endswith((".xlsx", ".xls")):
+        try:
+            import pandas as pd
+            return pd.read_excel(path).to_dict("records")
+        except ImportError as e:
+            raise SystemExit(f"回放 Excel 需要安装 pandas 与 openpyxl（pip install pandas openpyxl），或先另存为 csv: {e}")
+    with open(path, "r", encoding="UTF-8") as f:
+        return [{k: float(v) for k, v in row.items() if _is_number(v)} for row in csv.DictReader(f)]
+
+
+def _is_number(value) -> bool:
+    try:
+        float(value)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def synthetic_source(slave: int) -> Callable[[int], dict]:
+    """生成平稳波动的模拟数据：每个测点为均值附近的正弦波叠加随机扰动，同一从站同一帧结果固定"""
+    def source(frame: int) -> dict:
+        rng = random.Random(slave * 1_000_003 + frame)
+        data = {"wellCode": slave}
+        for i, (name, (mean, amplitude)) in enumerate(SYNTHETIC_PROFILE.items()):
+            wave = math.sin((frame + slave * 7 + i * 13) / 30.0)
+            data[name] = mean + amplitude * (0.7 * wave + 0.3 * rng.uniform(-1, 1))
+        return data
+    return source
+
+
+def replay_source(records: List[dict], slave: int) -> Callable[[int], dict]:
+    """循环回放录制数据，不同从站错开起始行"""
+    def source(frame: int) -> dict:
+        data = dict(records[(frame + slave) % len(records)])
+        data.setdefault("wellCode", slave)
+        return data
+    return source
+
+
+class SimulatedDevice:
+    """一个模拟从站：按帧刷新测点值并编码到寄存器"""
+
+    def __init__(self, slave: int, plan: List[ReadBlock], source: Callable[[int], dict], update_interval: float = 1.0):
+        self.slave = slave
+        self.plan = plan
+        self.source = source
+        self.update_interval = update_interval
+        self._registers: Dict[int, int] = {}
+        self._frame = None
+        self._lock = threading.Lock()
+
+    def read(self, address: int, count: int) -> List[int]:
+        """读取连续寄存器，未定义的地址返回 0"""
+        with self._lock:
+            frame = int(time.time() // self.update_interval)
+            if frame != self._frame:
+                self._refresh(frame)
+            return [self._registers.get(address + i, 0) for i in range(count)]
+
+    def _refresh(self, frame: int):
+        data = self.source(frame)
+        registers = {}
+        for block in self.plan:
+            for i, value in enumerate(encode_block(block, data)):
+                registers[block.address + i] = value
+        self._registers = registers
+        self._frame = frame
+
+
+class ModbusSimulator:
+    """
+    Modbus 从站模拟器
+
+    :param devices: 从站号 -> 模拟从站
+    :param latency: 固定响应延迟 单位:秒
+    :param jitter: 在固定延迟上叠加的随机延迟上限 单位:秒
+    :param error_rate: 返回异常应答（从站故障）的概率
+    :param drop_rate: 不应答（客户端超时）的概率
+    """
+
+    def __init__(self, devices: Dict[int, SimulatedDevice], latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, drop_rate: float = 0.0):
+        self.devices = devices
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.requests = 0
+        self.errors = 0
+        self.drops = 0
+        self._servers = []
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def handle_pdu(self, unit: int, pdu: bytes) -> Optional[bytes]:
+        """处理一个请求 PDU，返回应答 PDU；返回 None 表示不应答"""
+        self.requests += 1
+        device = self.devices.get(unit)
+        if device is None:
+            # 总线上不存在的从站不会应答
+            return None
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+        if self.drop_rate and random.random() < self.drop_rate:
+            self.drops += 1
+            return None
+
+        function = pdu[0]
+        if self.error_rate and random.random() < self.error_rate:
+            self.errors += 1
+            return bytes([function | 0x80, SLAVE_DEVICE_FAILURE])
+        if function not in (READ_HOLDING_REGISTERS, READ_INPUT_REGISTERS):
+            return bytes([function | 0x80, ILLEGAL_FUNCTION])
+        if len(pdu) != 1 + _READ_REQUEST.size:
+            return bytes([function | 0x80, ILLEGAL_DATA_VALUE])
+        address, count = _READ_REQUEST.unpack(pdu[1:])
+        if not 1 <= count <= 125:
+            return bytes([function | 0x80, ILLEGAL_DATA_VALUE])
+        if address + count > 0x10000:
+            return bytes([function | 0x80, ILLEGAL_DATA_ADDRESS])
+        registers = device.read(address, count)
+        return bytes([function, 2 * count]) + struct.pack(f">{count}H", *registers)
+
+    def serve_tcp(self, host: str = "127.0.0.1", port: int = 5020) -> int:
+        """启动 Modbus TCP 服务，返回实际监听端口（port 为 0 时自动分配）"""
+        simulator = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                sock = self.request
+                while not simulator._stop.is_set():
+                    header = _recv_exact(sock, _MBAP.size)
+                    if header is None:
+                        return
+                    transaction, protocol, length, unit = _MBAP.unpack(header)
+                    pdu = _recv_exact(sock, length - 1)
+                    if pdu is None:
+                        return
+                    response = simulator.handle_pdu(unit, pdu)
+                    if response is not None:
+                        sock.sendall(_MBAP.pack(transaction, protocol, len(response) + 1, unit) + response)
+
+        class Server(socketserver.ThreadingTCPServer):
+            allow_reuse_address = True
+            daemon_threads = True
+
+        server = Server((host, port), Handler)
+        self._servers.append(server)
+        self._start_thread(server.serve_forever, f"modbus-sim-tcp-{port}")
+        actual_port = server.server_address[1]
+        logger.info(f"Modbus TCP 模拟器已启动: {host}:{actual_port}, 从站 {sorted(self.devices)}")
+        return actual_port
+
+    def serve_pty(self) -> str:
+        """启动基于伪终端的 Modbus RTU 服务，返回供采集端打开的串口设备路径"""
+        master_fd, slave_fd = os.openpty()
+        tty.setraw(slave_fd)
+        path = os.ttyname(slave_fd)
+        self._start_thread(lambda: self._serve_rtu(master_fd, slave_fd), f"modbus-sim-rtu-{os.path.basename(path)}")
+        logger.info(f"Modbus RTU 模拟器已启动: {path}, 从站 {sorted(self.devices)}")
+        return path
+
+    def _serve_rtu(self, master_fd: int, slave_fd: int):
+        buffer = b""
+        try:
+            while not self._stop.is_set():
+                readable, _, _ = select.select([master_fd], [], [], 0.2)
+                if not readable:
+                    # 帧间静默，丢弃不完整的残帧
+                    buffer = b""
+                    continue
+                buffer += os.read(master_fd, 256)
+                while len(buffer) >= _RTU_READ_FRAME_SIZE:
+                    frame = buffer[:_RTU_READ_FRAME_SIZE]
+                    if crc16(frame[:-2]) != struct.unpack("<H", frame[-2:])[0]:
+                        # 校验失败，滑动一个字节重新同步
+                        buffer = buffer[1:]
+                        continue
+                    buffer = buffer[_RTU_READ_FRAME_SIZE:]
+                    response = self.handle_pdu(frame[0], frame[1:-2])
+                    if response is not None:
+                        body = bytes([frame[0]]) + response
+                        os.write(master_fd, body + struct.pack("<H", crc16(body)))
+        finally:
+            os.close(master_fd)
+            os.close(slave_fd)
+
+    def _start_thread(self, target: Callable[[], None], name: str):
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+        for thread in self._threads:
+            thread.join(timeout=1)
+
+    def metrics(self) -> dict:
+        return {"requests": self.requests, "errors": self.errors, "drops": self.drops}
+
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+def benchmark(port: dict, plan: List[ReadBlock], cycles: int) -> dict:
+    """用采集引擎的链路线程对模拟器连续采集 cycles 个周期，统计单周期耗时与成功率"""
+    from application.data.poll_scheduler import LatencyHistogram
+    from application.data.polling import ModbusDevice, PortConfig, PortWorker
+
+    collected = []
+    devices = [ModbusDevice(slave=slave, profile="default", plan=plan) for slave in port.pop("slaves")]
+    worker = PortWorker(PortConfig(devices=devices, **port), interval=1, submit=collected.append)
+    histogram = LatencyHistogram()
+    started = time.monotonic()
+    for _ in range(cycles):
+        cycle_started = time.monotonic()
+        worker.poll_cycle()
+        histogram.record(time.monotonic() - cycle_started)
+    elapsed = time.monotonic() - started
+    worker.client.close()
+    polls = cycles * len(devices)
+    return {
+        "cycles": cycles,
+        "polls": polls,
+        "collected": len(collected),
+        "success_rate": round(len(collected) / polls, 4) if polls else 0.0,
+        "polls_per_second": round(polls / elapsed, 2) if elapsed else 0.0,
+        "cycle": histogram.snapshot(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Modbus 从站模拟器")
+    parser.add_argument("--tcp", help="Modbus TCP 监听地址，如 127.0.0.1:5020")
+    parser.add_argument("--pty", action="store_true", help="启动伪终端串口（RTU）服务")
+    parser.add_argument("--slaves", default="1", help="从站号列表，如 1-8,10")
+    parser.add_argument("--profile", default="default", help="寄存器配置名称")
+    parser.add_argument("--replay", help="回放录制数据（csv/xlsx），不指定时生成模拟数据；"
+                                          "xlsx 需另行安装 pandas 与 openpyxl，未安装时请先另存为 csv")
+    parser.add_argument("--update-interval", type=float, default=1.0, help="测点值刷新间隔 单位:秒")
+    parser.add_argument("--latency", type=float, default=0.0, help="固定响应延迟 单位:秒")
+    parser.add_argument("--jitter", type=float, default=0.0, help="随机延迟上限 单位:秒")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="异常应答概率")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="不应答概率")
+    parser.add_argument("--bench", type=int, default=0, help="启动后用采集引擎采集 N 个周期并输出统计")
+    args = parser.parse_args()
+
+    from application.data.collector import REGISTER_PROFILES, profile_compiler
+
+    plan = profile_compiler.compile(REGISTER_PROFILES[args.profile])
+    records = load_records(args.replay) if args.replay else None
+    slaves = parse_slaves(args.slaves)
+    devices = {
+        slave: SimulatedDevice(slave, plan,
+                               replay_source(records, slave) if records else synthetic_source(slave),
+                               args.update_interval)
+        for slave in slaves
+    }
+    simulator = ModbusSimulator(devices, args.latency, args.jitter, args.error_rate, args.drop_rate)
+
+    ports = []
+    if args.tcp:
+        host, port = args.tcp.rsplit(":", 1)
+        port = simulator.serve_tcp(host, int(port))
+        ports.append({"name": f"tcp-{port}", "method": "tcp", "host": host, "port": port, "timeout": 1})
+    if args.pty:
+        path = simulator.serve_pty()
+        ports.append({"name": f"pty-{os.path.basename(path)}", "method": "rtu", "port": path, "baudrate": 115200,
+                      "timeout": 1})
+    if not ports:
+        parser.error("至少指定 --tcp 或 --pty")
+
+    try:
+        if args.bench:
+            for port in ports:
+                result = benchmark({**port, "slaves": slaves}, plan, args.bench)
+                print(json.dumps({"port": port["name"], **result}, ensure_ascii=False, indent=2))
+            print(json.dumps(simulator.metrics()))
+        else:
+            threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# 每个字节中 1 的个数
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class SlotBitmap:
+    """
+    采样时隙位图：按采集间隔把时间切分为时隙，每个时隙 1 位，收到数据即置位
+
+    位图为环形，保存最近 window 秒的时隙，新时隙覆盖最早的时隙。任意子窗口的缺失率、
+    中断时间段统计只需按字节查表计数，为 O(时隙数 / 8) 的向量化运算，与数据条数无关。
+
+    :param interval: 采集间隔 单位:秒
+    :param window: 保存的时间范围 单位:秒
+    """
+
+    def __init__(self, interval: float = 60, window: float = 86400):
+        self.interval = interval
+        self.slots = int(window // interval)
+        # 位数向上取整到 64 的倍数
+        self.bits = (self.slots + 63) // 64 * 64
+        self._bytes = np.zeros(self.bits // 8, dtype=np.uint8)
+        # 已写入的最新时隙编号，其后的时隙尚未清零
+        self._head: Optional[int] = None
+
+    def slot_of(self, timestamp: float) -> int:
+        return int(timestamp // self.interval)
+
+    def mark(self, timestamp: float):
+        """记录 timestamp（秒级时间戳）所在时隙收到了数据"""
+        slot = self.slot_of(timestamp)
+        if self._head is None:
+            self._head = slot
+        elif slot > self._head:
+            # 时间前进，回收中间的时隙
+            self._fill(self._head + 1, slot + 1, False)
+            self._head = slot
+        elif slot <= self._head - self.slots:
+            # 早于保存范围的迟到数据
+            return
+        position = slot % self.bits
+        self._bytes[position >> 3] |= np.uint8(1 << (position & 7))
+
+    def mark_many(self, timestamps: Iterable[float]):
+        """批量置位，用于从数据库重建"""
+        slots = np.unique((np.asarray(list(timestamps), dtype=np.float64) // self.interval).astype(np.int64))
+        if not len(slots):
+            return
+        if self._head is None or slots[-1] > self._head:
+            self.mark(float(slots[-1]) * self.interval)
+        slots = slots[slots > self._head - self.slots]
+        positions = slots % self.bits
+        np.bitwise_or.at(self._bytes, positions >> 3, (1 << (positions & 7)).astype(np.uint8))
+
+    def _fill(self, start: int, end: int, value: bool):
+        """将时隙 [start, end) 置为 value"""
+        if end - start >= self.bits:
+            self._bytes[:] = 0xFF if value else 0
+            return
+        for lower, upper in self._positions(start, end):
+            first_byte, last_byte = -(-lower // 8), upper // 8
+            if first_byte > last_byte:
+                self._fill_bits(lower, upper, value)
+                continue
+            self._fill_bits(lower, first_byte * 8, value)
+            self._bytes[first_byte:last_byte] = 0xFF if value else 0
+            self._fill_bits(last_byte * 8, upper, value)
+
+    def _fill_bits(self, lower: int, upper: int, value: bool):
+        for position in range(lower, upper):
+            if value:
+                self._bytes[position >> 3] |= np.uint8(1 << (position & 7))
+            else:
+                self._bytes[position >> 3] &= np.uint8(~(1 << (position & 7)) & 0xFF)
+
+    def _positions(self, start: int, end: int) -> List[Tuple[int, int]]:
+        """时隙 [start, end) 在环上对应的一到两段位区间"""
+        lower, length = start % self.bits, end - start
+        if lower + length <= self.bits:
+            return [(lower, lower + length)]
+        return [(lower, self.bits), (0, lower + length - self.bits)]
+
+    def _range(self, seconds: float, now: float = None) -> Tuple[int, int]:
+        """最近 seconds 秒内已结束的时隙 [start, end)，不超过位图保存范围"""
+        end = self.slot_of(datetime.now().timestamp() if now is None else now)
+        return end - min(int(seconds // self.interval), self.slots), end
+
+    def _count(self, start: int, end: int) -> int:
+        """时隙 [start, end) 中置位的个数，head 之后的时隙视为未收到"""
+        if self._head is None:
+            return 0
+        end = min(end, self._head + 1)
+        start = max(start, self._head + 1 - self.slots)
+        if start >= end:
+            return 0
+        total = 0
+        for lower, upper in self._positions(start, end):
+            first_byte, last_byte = -(-lower // 8), upper // 8
+            if first_byte > last_byte:
+                total += self._count_bits(lower, upper)
+                continue
+            total += int(_POPCOUNT[self._bytes[first_byte:last_byte]].sum(dtype=np.int64))
+            total += self._count_bits(lower, first_byte * 8) + self._count_bits(last_byte * 8, upper)
+        return total
+
+    def _count_bits(self, lower: int, upper: int) -> int:
+        return sum((int(self._bytes[position >> 3]) >> (position & 7)) & 1 for position in range(lower, upper))
+
+    def _bits(self, start: int, end: int) -> np.ndarray:
+        """时隙 [start, end) 的位数组，head 之后及保存范围之前的时隙为 0"""
+        result = np.zeros(end - start, dtype=np.uint8)
+        if self._head is None:
+            return result
+        lower, upper = max(start, self._head + 1 - self.slots), min(end, self._head + 1)
+        if lower >= upper:
+            return result
+        unpacked = np.unpackbits(self._bytes, bitorder="little")
+        offset = lower - start
+        for first, last in self._positions(lower, upper):
+            result[offset:offset + last - first] = unpacked[first:last]
+            offset += last - first
+        return result
+
+    def received(self, seconds: float, now: float = None) -> int:
+        """最近 seconds 秒内收到数据的时隙数"""
+        return self._count(*self._range(seconds, now))
+
+    def loss_rate(self, seconds: float, now: float = None) -> float:
+        """最近 seconds 秒内的数据缺失率"""
+        start, end = self._range(seconds, now)
+        if start >= end:
+            return 0.0
+        return round(1 - self._count(start, end) / (end - start), 4)
+
+    def gaps(self, seconds: float, now: float = None) -> List[Tuple[float, float]]:
+        """最近 seconds 秒内连续缺失的时间段 [(起始时间戳, 结束时间戳)]"""
+        start, end = self._range(seconds, now)
+        if start >= end:
+            return []
+        # 在首尾补 1，缺失段即为 1 -> 0 与 0 -> 1 的跳变之间
+        edges = np.diff(np.concatenate(([1], self._bits(start, end), [1])).astype(np.int8))
+        begins, ends = np.flatnonzero(edges == -1), np.flatnonzero(edges == 1)
+        return [((start + begin) * self.interval, (start + finish) * self.interval)
+                for begin, finish in zip(begins.tolist(), ends.tolist())]
+
+    def longest_gap(self, seconds: float, now: float = None) -> float:
+        """最近 seconds 秒内最长的连续缺失时长 单位:秒"""
+        return max((end - start for start, end in self.gaps(seconds, now)), default=0.0)
+
+    def dump_state(self) -> dict:
+        return {"interval": self.interval, "head": self._head, "bytes": self._bytes.copy()}
+
+    def load_state(self, state: dict):
+        self._head = state["head"]
+        self._bytes[:] = state["bytes"]
+
+
+class SlotBitmapRegistry:
+    """
+    按设备管理采样时隙位图，供入库流程置位、定时健康检查读取
+
+    :param interval: 采集间隔 单位:秒
+    :param window: 保存的时间范围 单位:秒
+    """
+
+    def __init__(self, interval: float = 60, window: float = 86400):
+        self.interval = interval
+        self.window = window
+        # 是否已从数据库重建
+        self.loaded = False
+        self._bitmaps: Dict[str, SlotBitmap] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, interval: float, window: float = None):
+        """修改采集间隔或保存范围，参数变化时清空已有位图（需重新从数据库重建）"""
+        window = self.window if window is None else window
+        with self._lock:
+            if interval != self.interval or window != self.window:
+                self.interval, self.window = interval, window
+                self._bitmaps.clear()
+                self.loaded = False
+
+    def get(self, device_id: str) -> SlotBitmap:
+        with self._lock:
+            bitmap = self._bitmaps.get(device_id)
+            if bitmap is None:
+                bitmap = SlotBitmap(self.interval, self.window)
+                self._bitmaps[device_id] = bitmap
+            return bitmap
+
+    def mark(self, device_id: str, timestamp: float):
+        bitmap = self.get(device_id)
+        with self._lock:
+            bitmap.mark(timestamp)
+
+    def mark_many(self, device_id: str, timestamps: Iterable[float]):
+        bitmap = self.get(device_id)
+        with self._lock:
+            bitmap.mark_many(timestamps)
+
+    def rebuild(self, rows: Iterable[Tuple[str, float]]):
+        """由 (设备编号, 秒级时间戳) 批量重建"""
+        timestamps: Dict[str, List[float]] = {}
+        for device_id, timestamp in rows:
+            timestamps.setdefault(str(device_id), []).append(timestamp)
+        for device_id, values in timestamps.items():
+            bitmap = self.get(device_id)
+            with self._lock:
+                bitmap.mark_many(values)
+        self.loaded = True
+
+    def received(self, device_id: str, seconds: float, now: float = None) -> int:
+        bitmap = self.get(device_id)
+        with self._lock:
+            return bitmap.received(seconds, now)
+
+    def loss_rate(self, device_id: str, seconds: float, now: float = None) -> float:
+        bitmap = self.get(device_id)
+        with self._lock:
+            return bitmap.loss_rate(seconds, now)
+
+    def gaps(self, device_id: str, seconds: float, now: float = None) -> List[Tuple[float, float]]:
+        bitmap = self.get(device_id)
+        with self._lock:
+            return bitmap.gaps(seconds, now)
+
+    def dump_state(self) -> dict:
+        with self._lock:
+            return {"interval": self.interval, "window": self.window,
+                    "devices": {device_id: bitmap.dump_state() for device_id, bitmap in self._bitmaps.items()}}
+
+    def load_state(self, state: dict) -> bool:
+        """由快照恢复，采集间隔或保存范围与快照不一致时不恢复"""
+        if state["interval"] != self.interval or state["window"] != self.window:
+            return False
+        for device_id, bitmap_state in state["devices"].items():
+            bitmap = self.get(device_id)
+            with self._lock:
+                bitmap.load_state(bitmap_state)
+        self.loaded = True
+        return True
+
+
+# 全局采样时隙位图（device_data 入库时置位）
+data_slots = SlotBitmapRegistry()
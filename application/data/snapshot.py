@@ -0,0 +1,119 @@
+import json
+import mmap
+import os
+import struct
+import time
+from typing import Optional
+
+import numpy as np
+
+"""
+内存状态快照文件：JSON 索引 + 按 64 字节对齐的数组数据，恢复时内存映射读取，数组为零拷贝视图
+
+文件结构：MAGIC(8) | 索引长度 uint64(8) | 索引 JSON | 填充 | 数组数据
+状态为嵌套 dict，叶子为 numpy 数组或可 JSON 序列化的值；索引中数组记为 {"@": [dtype, shape, 偏移]}
+"""
+
+MAGIC = b"OILSNAP1"
+_ALIGN = 64
+_ARRAY = "@"
+
+
+def _align(value: int) -> int:
+    return (value + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def write_snapshot(path: str, state: dict) -> int:
+    """
+    写入快照，先写临时文件再原子替换，返回文件大小
+
+    :param state: 嵌套 dict，叶子为 numpy 数组或可 JSON 序列化的值
+    """
+    arrays = []
+    size = 0
+
+    def encode(node):
+        nonlocal size
+        if isinstance(node, dict):
+            return {str(key): encode(value) for key, value in node.items()}
+        if isinstance(node, np.ndarray):
+            array = np.ascontiguousarray(node)
+            arrays.append((size, array))
+            entry = {_ARRAY: [array.dtype.str, list(array.shape), size]}
+            size = _align(size + array.nbytes)
+            return entry
+        return node
+
+    header = json.dumps({"created_at": time.time(), "state": encode(state)},
+                        ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    data_start = _align(16 + len(header))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(header)) + header)
+        for offset, array in arrays:
+            f.seek(data_start + offset)
+            f.write(array.tobytes())
+        f.truncate(data_start + size)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    return data_start + size
+
+
+class Snapshot:
+    """
+    内存映射方式打开的快照，state 中的数组直接引用映射内存（只读）
+
+    数组视图仅在快照打开期间有效，加载到内存结构时需拷贝；用完调用 close()。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        if self._mmap[:8] != MAGIC:
+            self.close()
+            raise ValueError(f"不是有效的快照文件: {path}")
+        header_size = struct.unpack("<Q", self._mmap[8:16])[0]
+        header = json.loads(self._mmap[16:16 + header_size].decode("utf-8"))
+        self._data_start = _align(16 + header_size)
+        self.created_at: float = header["created_at"]
+        self.state: Optional[dict] = self._decode(header["state"])
+
+    def _decode(self, node):
+        if isinstance(node, dict):
+            if _ARRAY in node:
+                dtype, shape, offset = node[_ARRAY]
+                dtype = np.dtype(dtype)
+                count = int(np.prod(shape))
+                return np.frombuffer(self._mmap, dtype=dtype, count=count,
+                                     offset=self._data_start + offset).reshape(shape)
+            return {key: self._decode(value) for key, value in node.items()}
+        return node
+
+    @property
+    def age(self) -> float:
+        """快照距今的时长 单位:秒"""
+        return time.time() - self.created_at
+
+    def close(self):
+        self.state = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            # 仍有数组视图引用映射内存，由垃圾回收在视图释放后解除映射
+            pass
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -1,10 +1,10 @@
-import smtplib
 import time
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from datetime import datetime, timedelta
-from typing import Dict
+from typing import Dict, Optional
 
+import numpy as np
+from sqlalchemy import func
+from application.data_management.modules.alert.notifier import EmailNotifier
 from application.data_management.storage.database import Database
 from application.data_management.storage.settings import SettingManager
 from application.data_management.storage.db_models import Alert
@@ -12,12 +12,25 @@ from application.data_management.storage.constants import AlertType
 
 
 class AlertManager:
-    """告警管理器"""
+    """
+    告警管理器
 
-    def __init__(self, db: Database, settings: SettingManager):
+    告警写入数据库后交给邮件通知队列，由后台线程合并发送，send() 不等待邮件服务器
+
+    :param notifier: 邮件通知，None 时按配置创建并启动
+    """
+
+    def __init__(self, db: Database, settings: SettingManager, notifier: Optional[EmailNotifier] = None):
         self.db = db
         self.settings = settings
         self._suppression_cache: Dict[str, datetime] = {}
+        if notifier is None:
+            notifier = EmailNotifier(settings,
+                                     digest_window=settings.get("ALERT_DIGEST_SECONDS", 10),
+                                     max_retries=settings.get("ALERT_SMTP_MAX_RETRIES", 5),
+                                     idle_timeout=settings.get("ALERT_SMTP_IDLE_SECONDS", 60))
+            notifier.start()
+        self.notifier = notifier
 
     def send(self, device_id: str, alert_type: AlertType, message: str) -> bool:
         """发送告警"""
@@ -26,7 +39,7 @@ class AlertManager:
             return False
 
         self._save_alert(device_id, alert_type, message)
-        self._send_email(device_id, alert_type, message)
+        self.notifier.notify(device_id, alert_type, message)
         self._update_suppression(device_id, alert_type)
 
         return True
@@ -44,6 +57,33 @@ class AlertManager:
 
         return datetime.now() < suppression_until
 
+    def load_suppression(self):
+        """启动预热：由告警表恢复抑制期内各设备、各类型告警的最后发送时间"""
+
+        suppression_minutes = self.settings.get("ALERT_REPETITION_INHIBITION_TIME")
+        since = int(time.time() - suppression_minutes * 60)
+        session = self.db.get_session()
+
+        try:
+            rows = session.query(Alert.device_id, Alert.alert_type, func.max(Alert.created_at)).filter(
+                Alert.created_at >= since).group_by(Alert.device_id, Alert.alert_type).all()
+            for device_id, alert_type, created_at in rows:
+                self._suppression_cache[f"{device_id}:{alert_type}"] = datetime.fromtimestamp(created_at)
+        finally:
+            session.close()
+
+    def dump_state(self) -> dict:
+        """状态快照：各设备、各类型告警的最后发送时间"""
+        items = list(self._suppression_cache.items())
+        return {"keys": [key for key, _ in items],
+                "sent_at": np.array([sent_at.timestamp() for _, sent_at in items], dtype=np.float64)}
+
+    def load_state(self, state: dict):
+        for key, sent_at in zip(state["keys"], state["sent_at"].tolist()):
+            sent_at = datetime.fromtimestamp(sent_at)
+            if key not in self._suppression_cache or self._suppression_cache[key] < sent_at:
+                self._suppression_cache[key] = sent_at
+
     def _update_suppression(self, device_id: str, alert_type: AlertType):
         """更新抑制缓存"""
         key = f"{device_id}:{alert_type.value}"
@@ -70,43 +110,6 @@ class AlertManager:
         finally:
             session.close()
 
-    def _send_email(self, device_id: str, alert_type: AlertType, message: str) -> bool:
-        """发送邮件"""
-
-        smtp_server = self.settings.get("ALERT_SMTP_HOST")
-        smtp_port = self.settings.get("ALERT_SMTP_PORT")
-        smtp_username = self.settings.get("ALERT_SMTP_USER")
-        smtp_password = self.settings.get("ALERT_SMTP_PASSWORD")
-        sender_email = self.settings.get("ALERT_SMTP_SENDER")
-        receivers = self.settings.get("ALERT_SMTP_RECEIVERS")
-
-        if not receivers:
-            print(f"[告警] 未配置收件人，跳过发送: {message}")
-            return False
-
-        subject = f"[油井告警] {device_id} - {alert_type.name}"
-
-        try:
-            msg = MIMEMultipart()
-            msg['From'] = sender_email
-            msg['To'] = ', '.join(receivers)
-            msg['Subject'] = subject
-            msg.attach(MIMEText(message, 'plain', 'utf-8'))
-
-            # TLS
-            # with smtplib.SMTP(smtp_server, smtp_port) as server:
-            #     server.starttls()
-            #     server.login(smtp_username, smtp_password)
-            #     server.sendmail(sender_email, receivers, msg.as_string())
-
-            # SSL
-            with smtplib.SMTP_SSL(smtp_server, smtp_port) as server:
-                server.login(smtp_username, smtp_password)
-                server.sendmail(sender_email, receivers, msg.as_string())
-
-            print(f"[告警] 邮件发送成功: {message}")
-            return True
-
-        except Exception as e:
-            print(f"[告警] 邮件发送失败: {e}")
-            return False
+    def close(self):
+        """停止邮件通知，发送队列中剩余的告警"""
+        self.notifier.close()
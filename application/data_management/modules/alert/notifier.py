@@ -0,0 +1,211 @@
+"""
+告警通知模块
+"""
+import logging
+import queue
+import smtplib
+import threading
+import time
+from datetime import datetime
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import List, NamedTuple, Optional
+
+from application.data_management.storage.constants import AlertType
+from application.data_management.storage.settings import SettingManager
+
+
+class Notification(NamedTuple):
+    device_id: str
+    alert_type: AlertType
+    message: str
+    created_at: float
+
+
+class EmailNotifier:
+    """
+    异步邮件通知：告警进入队列后立即返回，由后台线程发送，邮件服务器缓慢或不可用不会阻塞数据处理
+
+    - 保持已登录的 SMTP 连接复用，空闲超过 idle_timeout 秒后断开，下次发送时重新连接
+    - 收到第一条告警后再等待 digest_window 秒，期间的告警合并为一封摘要邮件发送给全部收件人
+    - 发送失败时断开连接并按指数退避重试，超过 max_retries 次后放弃该批告警
+
+    SMTP 配置：ALERT_SMTP_HOST / PORT / USER / PASSWORD / SENDER / RECEIVERS，
+    ALERT_SMTP_SECURITY 为 ssl（默认）/ starttls / none。
+
+    :param settings: 配置管理器
+    :param digest_window: 摘要合并窗口 单位:秒
+    :param max_batch: 每封摘要邮件最多包含的告警数
+    :param max_retries: 发送失败后的最大重试次数
+    :param retry_delay: 首次重试的等待时间 单位:秒，之后每次加倍
+    :param idle_timeout: 连接空闲超过该时长 单位:秒 后断开
+    :param queue_size: 队列容量，队列满时丢弃新告警（告警已写入数据库）
+    """
+
+    def __init__(self, settings: SettingManager, digest_window: float = 10, max_batch: int = 100,
+                 max_retries: int = 5, retry_delay: float = 2, idle_timeout: float = 60, queue_size: int = 10000):
+        self.settings = settings
+        self.digest_window = digest_window
+        self.max_batch = max_batch
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.idle_timeout = idle_timeout
+
+        self._queue: "queue.Queue[Notification]" = queue.Queue(maxsize=queue_size)
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+        self._running = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # 统计指标
+        self._sent = 0
+        self._messages = 0
+        self._failed = 0
+        self._dropped = 0
+
+    def start(self):
+        """启动发送线程"""
+        if self._running:
+            return
+        self._running = True
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="alert-notifier", daemon=True)
+        self._thread.start()
+
+    def close(self, timeout: float = 10):
+        """停止发送线程，尽量发送完队列中剩余的告警；超时后发送线程仍在运行时由其自行断开连接"""
+        self._running = False
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                logging.warning(f"[告警通知] 发送线程 {timeout} 秒内未结束，剩余 {self._queue.qsize()} 条告警")
+                return
+            self._thread = None
+        self._disconnect()
+
+    def notify(self, device_id: str, alert_type: AlertType, message: str) -> bool:
+        """加入发送队列，不等待发送，返回是否已入队"""
+        try:
+            self._queue.put_nowait(Notification(device_id, alert_type, message, time.time()))
+            return True
+        except queue.Full:
+            self._dropped += 1
+            logging.error(f"[告警通知] 队列已满，丢弃: {message}")
+            return False
+
+    def metrics(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "sent": self._sent,
+            "messages": self._messages,
+            "failed": self._failed,
+            "dropped": self._dropped,
+            "connected": self._smtp is not None,
+        }
+
+    def _run(self):
+        while self._running or not self._queue.empty():
+            try:
+                first = self._queue.get(timeout=1)
+            except queue.Empty:
+                if self._smtp is not None and time.monotonic() - self._last_used > self.idle_timeout:
+                    self._disconnect()
+                continue
+            batch = [first] + self._collect(time.monotonic() + self.digest_window)
+            self._deliver(batch)
+        # 连接只由发送线程使用与断开
+        self._disconnect()
+
+    def _collect(self, deadline: float) -> List[Notification]:
+        """收集摘要窗口内的其余告警，停止时不再等待"""
+        batch = []
+        while len(batch) < self.max_batch - 1:
+            remaining = deadline - time.monotonic() if self._running else 0
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _deliver(self, batch: List[Notification]):
+        """发送一封摘要邮件，失败时按指数退避重试"""
+        receivers = self.settings.get("ALERT_SMTP_RECEIVERS")
+        if not receivers:
+            logging.info(f"[告警通知] 未配置收件人，跳过 {len(batch)} 条告警")
+            return
+        sender = self.settings.get("ALERT_SMTP_SENDER")
+        content = self._build_message(batch, sender, receivers).as_string()
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._connection().sendmail(sender, receivers, content)
+                self._last_used = time.monotonic()
+                self._sent += len(batch)
+                self._messages += 1
+                logging.info(f"[告警通知] 邮件发送成功: {len(batch)} 条告警")
+                return
+            except Exception as e:
+                # 连接可能已失效，下次重试时重新建立
+                self._disconnect()
+                if attempt == self.max_retries:
+                    self._failed += len(batch)
+                    logging.error(f"[告警通知] 邮件发送失败，已重试 {self.max_retries} 次，放弃 {len(batch)} 条告警: {e}")
+                    return
+                delay = self.retry_delay * 2 ** attempt
+                logging.warning(f"[告警通知] 邮件发送失败，{delay:g} 秒后重试: {e}")
+                # 停止时不再等待完整的退避时间
+                self._stop.wait(delay)
+
+    def _connection(self) -> smtplib.SMTP:
+        """已登录的 SMTP 连接，不存在时建立"""
+        if self._smtp is not None:
+            return self._smtp
+        host = self.settings.get("ALERT_SMTP_HOST")
+        port = self.settings.get("ALERT_SMTP_PORT")
+        username = self.settings.get("ALERT_SMTP_USER")
+        password = self.settings.get("ALERT_SMTP_PASSWORD")
+        security = self.settings.get("ALERT_SMTP_SECURITY", "ssl")
+
+        if security == "ssl":
+            smtp = smtplib.SMTP_SSL(host, port, timeout=30)
+        else:
+            smtp = smtplib.SMTP(host, port, timeout=30)
+        try:
+            if security == "starttls":
+                smtp.starttls()
+            if username:
+                smtp.login(username, password)
+        except Exception:
+            smtp.close()
+            raise
+        self._smtp = smtp
+        return smtp
+
+    def _disconnect(self):
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception:
+            self._smtp.close()
+        self._smtp = None
+
+    @staticmethod
+    def _build_message(batch: List[Notification], sender: str, receivers: List[str]) -> MIMEMultipart:
+        if len(batch) == 1:
+            subject = f"[油井告警] {batch[0].device_id} - {batch[0].alert_type.name}"
+            body = batch[0].message
+        else:
+            devices = list(dict.fromkeys(item.device_id for item in batch))
+            subject = f"[油井告警] {len(batch)} 条告警 - {', '.join(devices[:3])}{' 等' if len(devices) > 3 else ''}"
+            body = "\n".join(f"{datetime.fromtimestamp(item.created_at):%Y-%m-%d %H:%M:%S} "
+                             f"{item.device_id} {item.alert_type.name}: {item.message}" for item in batch)
+
+        msg = MIMEMultipart()
+        msg['From'] = sender
+        msg['To'] = ', '.join(receivers)
+        msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'plain', 'utf-8'))
+        return msg
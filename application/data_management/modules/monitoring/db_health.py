@@ -1,72 +1,69 @@
+import time
+
+from application.data.fingerprint import FingerprintSet, fingerprint
+from application.data.slot_bitmap import SlotBitmapRegistry, data_slots
 from application.data_management.models.well_data import WellData
 from application.data_management.modules.alert.alert_manager import AlertManager
 from application.data_management.modules.audit.audit_logger import AuditLogger
 from application.data_management.modules.audit.event_type import AuditEventType
 from application.data_management.storage.database import Database
-from application.data_management.storage.db_models import DeviceData
 from application.data_management.storage.constants import AlertType
+from application.data_management.storage.well_data_storage import WellDataStorage
+
+
+# 参与重复判断的测量字段
+CONTENT_FIELDS = ('dP', 'gVF', 'gasFlowRate', 'liquidFlowRate', 'oilFlowRate', 'pressure', 'temperature',
+                  'waterCut', 'waterFlowRate')
+
+
+def content_fingerprint(cmt5_time: int, record) -> int:
+    """数据时间 + 全部测量值的内容指纹，record 为 WellData 或 DeviceData"""
+    return fingerprint(cmt5_time, [getattr(record, field) for field in CONTENT_FIELDS])
 
 
 class DatabaseHealthMonitor:
+    """
+    重复数据检测与入库
 
-    def __init__(self, db: Database, alert_manager: AlertManager, audit_logger: AuditLogger):
+    判重使用内存中最近 dedup_window 秒的内容指纹集合（启动预热时由数据库加载），不再逐条查询；
+    device_data 的 (device_id, cmt5_time) 唯一键配合 INSERT IGNORE 兜底。
+    """
+
+    def __init__(self, db: Database, alert_manager: AlertManager, audit_logger: AuditLogger,
+                 storage: WellDataStorage, slots: SlotBitmapRegistry = data_slots,
+                 dedup_window: float = 24 * 60 * 60):
         self.db = db
+        self.storage = storage
+        self.slots = slots
         self.alert_manager = alert_manager
         self.audit_logger = audit_logger
+        self.fingerprints = FingerprintSet(dedup_window)
+
+    def load_history(self, device_id: str, rows):
+        """启动预热：加载已入库数据的指纹与采样时隙"""
+        since = time.time() - self.fingerprints.ttl
+        self.fingerprints.seed((device_id, row.cmt5_time, content_fingerprint(row.cmt5_time, row))
+                               for row in rows if row.cmt5_time >= since)
+        self.slots.mark_many(device_id, [row.cmt5_time for row in rows])
 
     def process(self, device_id: str, well_data: WellData):
         """检查数据健康并存储"""
 
-        session = self.db. get_session()
-
         try:
             # 重复数据检查
-            existing = session.query(DeviceData).filter_by(
-                device_id=device_id,
-                cmt5_time=well_data.cmt5_time,
-                dP=well_data.dP,
-                gVF=well_data.gVF,
-                gasFlowRate=well_data.gasFlowRate,
-                liquidFlowRate=well_data. liquidFlowRate,
-                oilFlowRate=well_data.oilFlowRate,
-                pressure=well_data.pressure,
-                temperature=well_data.temperature,
-                waterCut=well_data.waterCut,
-                waterFlowRate=well_data.waterFlowRate,
-            ).first()
-
-            if existing is not None:
+            if not self.fingerprints.add(device_id, well_data.cmt5_time,
+                                         content_fingerprint(well_data.cmt5_time, well_data)):
                 # 重复数据，发告警，不存储
                 self._send_alert(device_id, AlertType.DUPLICATE_DATA,
                     f"设备 {device_id} 检测到重复数据")
                 return
 
-            # 不重复，存储数据
-            self._save_data(session, device_id, well_data)
+            # 不重复，存储数据（批量写入）
+            self.storage.save(device_id, well_data)
+            self.slots.mark(device_id, well_data.cmt5_time)
 
         except Exception as e:
-            session.rollback()
             print(f"[数据库健康检查] 处理失败: {e}")
-        finally:
-            session.close()
-
-    def _save_data(self, session, device_id: str, well_data:  WellData):
-        """保存数据"""
-        data = DeviceData(
-            device_id=device_id,
-            cmt5_time=well_data.cmt5_time,
-            dP=well_data.dP,
-            gVF=well_data. gVF,
-            gasFlowRate=well_data. gasFlowRate,
-            liquidFlowRate=well_data.liquidFlowRate,
-            oilFlowRate=well_data.oilFlowRate,
-            pressure=well_data.pressure,
-            temperature=well_data.temperature,
-            waterCut=well_data.waterCut,
-            waterFlowRate=well_data.waterFlowRate,
-        )
-        session.add(data)
-        session.commit()
 
     def _send_alert(self, device_id:  str, alert_type: AlertType, message: str):
         """发送告警"""
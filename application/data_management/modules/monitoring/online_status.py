@@ -1,5 +1,6 @@
 import logging
 
+from application.data.circuit_breaker import BreakerRegistry, breaker_registry
 from application.data_management.models.well_data import WellData
 from application.data_management.storage.database import Database
 from application.data_management.storage.db_models import Device
@@ -7,8 +8,9 @@ from application.data_management.storage.db_models import Device
 
 class OnlineStatusMonitor:
 
-    def __init__(self, db: Database):
+    def __init__(self, db: Database, breakers: BreakerRegistry = breaker_registry):
         self.db = db
+        self.breakers = breakers
 
     def process(self, device_id: str, well_data: WellData):
         """
@@ -21,4 +23,10 @@ class OnlineStatusMonitor:
                 Device.last_update_time: well_data.cmt5_time
             })
             session.commit()
-        return []
\ No newline at end of file
+        return []
+
+    def is_reachable(self, device_id: str) -> bool:
+        """
+        设备在采集链路上是否可达（未被熔断）
+        """
+        return not self.breakers.is_open(device_id)
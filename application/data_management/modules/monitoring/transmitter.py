@@ -1,7 +1,13 @@
 """
 变送器监控模块
 """
+import logging
+import threading
+from typing import List, Optional
 
+from application.data.flatline import DEFAULT_FLATLINE_RULES, FlatlineMonitor
+from application.data.poll_scheduler import FixedRateScheduler
+from application.data.rules import FLATLINE, THRESHOLD, AlertRule, RuleEngine, parse_rules
 from application.data_management.models.well_data import WellData
 from application.data_management.modules.alert.alert_manager import AlertManager
 from application.data_management.modules.audit.audit_logger import AuditLogger
@@ -10,24 +16,130 @@ from application.data_management.storage.database import Database
 from application.data_management.storage.constants import AlertType
 from application.data_management.storage.settings import SettingManager
 
+# 告警规则相关的配置项，任一变化即重新加载规则
+RULE_SETTINGS = ("ALERT_RULES", "DIFFERENTIAL_PRESSURE_THRESHOLD", "PRESSURE_THRESHOLD", "FLATLINE_RULES")
+
+
+def default_rules(settings: SettingManager) -> List[AlertRule]:
+    """未配置 ALERT_RULES 时的默认规则，阈值取自各自的配置项；压力上限只在配置了 PRESSURE_THRESHOLD 时检查"""
+    items = [
+        {"kind": THRESHOLD, "field": "dP", "op": ">", "alert_type": AlertType.DP_HIGH.name,
+         "value": float(settings.get("DIFFERENTIAL_PRESSURE_THRESHOLD", 500)),
+         "message": "设备 {device_id} 差压过高: {value:g} kPa。阈值: {threshold:g} kPa"},
+    ]
+    pressure_threshold = settings.get("PRESSURE_THRESHOLD")
+    if pressure_threshold is not None:
+        items.append({"kind": THRESHOLD, "field": "pressure", "op": ">", "alert_type": AlertType.PRESSURE_HIGH.name,
+                      "value": float(pressure_threshold),
+                      "message": "设备 {device_id} 压力过高: {value:g} psi。阈值: {threshold:g} psi"})
+    # 默认只检测温度平线；压力、差压的容差需按传感器分辨率配置，通过 FLATLINE_RULES 启用，如
+    # {"temperature": {...}, "pressure": {"tolerance": 1, "duration": 600, "min_samples": 10}}
+    for field, rule in settings.get("FLATLINE_RULES", DEFAULT_FLATLINE_RULES).items():
+        items.append({"kind": FLATLINE, "field": field, "alert_type": AlertType.SENSOR_FLATLINE.name, **rule})
+    return parse_rules(items)
+
 
 class TransmitterMonitor:
-    """变送器监控"""
+    """
+    变送器监控
+
+    告警规则（阈值、变化率、平线、数据缺失）由配置 ALERT_RULES 定义，示例：
+    [{"kind": "threshold", "field": "dP", "op": ">", "value": 500, "alert_type": "DP_HIGH"},
+     {"kind": "rate", "field": "pressure", "op": ">", "value": 50, "alert_type": "PRESSURE_HIGH"},
+     {"kind": "flatline", "field": "temperature", "tolerance": 0.01, "duration": 600, "min_samples": 10,
+      "alert_type": "SENSOR_FLATLINE"},
+     {"kind": "missing", "duration": 600, "alert_type": "DATA_GAP"}]
+    入库时只记录样本，由 evaluate() 定期对全部设备批量评估；
+    每个评估周期检查规则配置，SettingManager.refresh() 后的配置变化无需重启即可生效。
+    """
 
     def __init__(self, db: Database, setting_manager: SettingManager, alert_manager: AlertManager, audit_logger: AuditLogger):
         self.db = db
         self.setting_manager = setting_manager
         self.alert_manager = alert_manager
         self.audit_logger = audit_logger
+        self._rule_settings = self._read_rule_settings()
+        self.rules = RuleEngine(self._load_rules())
+        self.scheduler: Optional[FixedRateScheduler] = None
+
+    @property
+    def flatline(self) -> FlatlineMonitor:
+        """平线（传感器卡死）检测状态，供启动预热使用"""
+        return self.rules.flatline
+
+    def _read_rule_settings(self) -> tuple:
+        return tuple(self.setting_manager.get(key) for key in RULE_SETTINGS)
+
+    def _load_rules(self) -> List[AlertRule]:
+        items = self.setting_manager.get("ALERT_RULES")
+        if not items:
+            return default_rules(self.setting_manager)
+        try:
+            rules = parse_rules(items)
+            unknown = [rule.alert_type for rule in rules if rule.alert_type not in AlertType.__members__]
+            if unknown:
+                raise ValueError(f"未知的告警类型: {', '.join(unknown)}")
+            return rules
+        except (ValueError, TypeError) as e:
+            logging.error(f"[变送器监控] 告警规则配置无效，使用默认规则: {e}")
+            return default_rules(self.setting_manager)
+
+    def reload_rules(self) -> bool:
+        """
+        规则配置变化时重新加载，返回是否重新加载
+
+        平线检测状态按字段沿用；阈值、变化率自上次评估以来的样本不再参与评估。
+        """
+        current = self._read_rule_settings()
+        if current == self._rule_settings:
+            return False
+        self._rule_settings = current
+        rules = self._load_rules()
+        if rules == self.rules.rules:
+            return False
+        engine = RuleEngine(rules)
+        engine.flatline.load_state(self.rules.flatline.dump_state())
+        self.rules = engine
+        logging.info(f"[变送器监控] 告警规则已重新加载，共 {len(rules)} 条")
+        return True
 
     def process(self, device_id: str, well_data: WellData):
-        """检查变送器参数"""
+        """记录变送器参数，告警由 evaluate() 统一判断"""
+        self.rules.update(device_id, well_data.cmt5_time, vars(well_data))
+
+    def evaluate(self, now: float = None):
+        """对全部设备评估告警规则并发送告警"""
+        for hit in self.rules.evaluate(now):
+            self._send_alert(hit.device_id, AlertType[hit.rule.alert_type], hit.message)
+
+    def start(self, interval: float = 10):
+        """后台按固定间隔评估告警规则"""
+        self.scheduler = FixedRateScheduler(interval, align=False)
+        threading.Thread(target=self.scheduler.run, args=(self._evaluate,),
+                         name="alert-rules", daemon=True).start()
+
+    def stop(self):
+        if self.scheduler is not None:
+            self.scheduler.stop()
+
+    def _evaluate(self):
+        try:
+            self.reload_rules()
+            self.evaluate()
+        except Exception as e:
+            logging.error(f"[变送器监控] 告警规则评估失败: {e}")
+
+    def dump_state(self) -> dict:
+        """状态快照：平线检测状态"""
+        return self.flatline.dump_state()
 
-        dp_threshold = int(self.setting_manager.get("DIFFERENTIAL_PRESSURE_THRESHOLD"))
+    def load_state(self, state: dict):
+        self.flatline.load_state(state)
 
-        # 检查差压是否超出阈值
-        if well_data.dP > dp_threshold:
-            self._send_alert(device_id, AlertType.DP_HIGH, f"设备 {device_id} 差压过高: {well_data.dP} kPa。阈值: {dp_threshold} kPa")
+    def load_history(self, device_id: str, rows):
+        """启动预热：由历史数据恢复平线检测状态（预热在后台进行，早于该设备已处理的实时数据的历史数据被忽略）"""
+        for row in rows:
+            self.flatline.update(device_id, row.cmt5_time, row._mapping)
 
     def _send_alert(self, device_id: str, alert_type: AlertType, message: str):
         """发送告警"""
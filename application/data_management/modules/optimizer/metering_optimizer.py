@@ -1,11 +1,9 @@
-import time
+from datetime import datetime, timedelta
 from typing import Optional
 
-from sqlalchemy import func
-
 from application.data_management.models.well_data import WellData
 from application.data_management.storage.database import Database
-from application.data_management.storage.db_models import DeviceData
+from application.data_management.storage.well_data_storage import device_data_rollups
 
 
 class MeteringOptimizer:
@@ -31,6 +29,15 @@ class MeteringOptimizer:
         """是否开启"""
         return self._enabled
 
+    @property
+    def correction_value(self) -> Optional[float]:
+        return self._correction_value
+
+    def restore(self, enabled: bool, correction_value: Optional[float]):
+        """由状态快照恢复开关与修正值"""
+        self._enabled = enabled
+        self._correction_value = correction_value if enabled else None
+
     def process(self, well_data: WellData) -> WellData:
         """
         优化处理数据
@@ -74,21 +81,17 @@ class MeteringOptimizer:
         return corrected
 
     def _get_24h_avg_water_cut(self) -> Optional[float]:
-        """获取24小时平均含水率"""
+        """获取24小时时间加权平均含水率（整点/整天部分读取汇总表，两端不足一个时间桶及汇总表回填完成前的部分读取原始数据）"""
 
         session = self.db.get_session()
 
         try:
-            now = int(time.time())
-            hours_24_ago = now - 24 * 60 * 60
-
-            result = session.query(func.avg(DeviceData.waterCut)).filter(
-                DeviceData.device_id == self.device_id,
-                DeviceData.cmt5_time >= hours_24_ago,
-                DeviceData.cmt5_time <= now
-            ).scalar()
+            now = datetime.now().replace(microsecond=0)
+            # 与原始查询一致，包含当前秒
+            result = device_data_rollups.aggregate(session, self.device_id, "waterCut",
+                                                   now - timedelta(hours=24), now + timedelta(seconds=1))
 
-            return result
+            return result["avg"] if result else None
 
         except Exception as e:
             print(f"[优化器] 查询平均值失败: {e}")
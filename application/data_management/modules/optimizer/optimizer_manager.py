@@ -1,5 +1,7 @@
 from typing import Dict
 
+import numpy as np
+
 from application.data_management.modules.optimizer.metering_optimizer import MeteringOptimizer
 from application.data_management.storage.database import Database
 
@@ -32,4 +34,19 @@ class OptimizerManager:
             optimizer.disable()
 
     def clear(self):
-        self._optimizers.clear()
\ No newline at end of file
+        self._optimizers.clear()
+
+    def dump_state(self) -> dict:
+        """状态快照：各设备优化器的开关与修正值（无修正值记为 NaN）"""
+        items = list(self._optimizers.items())
+        return {
+            "devices": [device_id for device_id, _ in items],
+            "enabled": np.array([optimizer.is_enabled() for _, optimizer in items], dtype=bool),
+            "correction": np.array([np.nan if optimizer.correction_value is None else optimizer.correction_value
+                                    for _, optimizer in items], dtype=np.float64),
+        }
+
+    def load_state(self, state: dict):
+        for device_id, enabled, correction in zip(state["devices"], state["enabled"].tolist(),
+                                                  state["correction"].tolist()):
+            self.get(device_id).restore(enabled, None if correction != correction else correction)
\ No newline at end of file
@@ -0,0 +1,89 @@
+"""
+状态快照模块
+"""
+import logging
+import os
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+from application.data.poll_scheduler import FixedRateScheduler
+from application.data.snapshot import Snapshot, write_snapshot
+
+
+class StateCheckpoint:
+    """
+    状态快照：定期把各组件的内存状态（滚动统计、采样时隙位图、平线检测队列、告警抑制时间、优化器修正值等）
+    写入快照文件，重启时以内存映射方式读取恢复，无需由数据库回放最近 24 小时的数据
+
+    各组件以 register() 注册 dump / load：dump 返回叶子为 numpy 数组或 JSON 值的嵌套 dict，
+    load 接收快照中的只读数组视图，须拷贝到自身的数据结构中。
+
+    :param path: 快照文件路径
+    :param interval: 写入间隔 单位:秒
+    :param max_age: 快照超过该时长 单位:秒 视为过期，不再恢复
+    """
+
+    def __init__(self, path: str, interval: float = 300, max_age: float = 3600):
+        self.path = path
+        self.interval = interval
+        self.max_age = max_age
+        self.scheduler: Optional[FixedRateScheduler] = None
+
+        self._components: List[Tuple[str, Callable[[], dict], Callable[[dict], None]]] = []
+        self._lock = threading.Lock()
+
+    def register(self, name: str, dump: Callable[[], dict], load: Callable[[dict], None]):
+        """注册组件的状态导出与恢复方法"""
+        self._components.append((name, dump, load))
+
+    def save(self) -> int:
+        """写入一次快照，返回文件大小"""
+        with self._lock:
+            started = time.time()
+            size = write_snapshot(self.path, {name: dump() for name, dump, _ in self._components})
+        logging.info(f"[状态快照] 写入 {self.path}: {size} 字节, 耗时 {time.time() - started:.3f} 秒")
+        return size
+
+    def checkpoint(self):
+        """定期写入快照，失败只记录日志"""
+        try:
+            self.save()
+        except Exception as e:
+            logging.error(f"[状态快照] 写入失败: {e}")
+
+    def restore(self) -> Optional[float]:
+        """
+        由快照恢复全部组件，返回快照的写入时间（秒级时间戳）
+
+        快照不存在、已过期、缺少已注册的组件或恢复失败时返回 None，由调用方改为从数据库预热。
+        """
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with Snapshot(self.path) as snapshot:
+                if snapshot.age > self.max_age:
+                    logging.info(f"[状态快照] {self.path} 已过期 ({snapshot.age:.0f} 秒)，不恢复")
+                    return None
+                missing = [name for name, _, _ in self._components if name not in snapshot.state]
+                if missing:
+                    logging.info(f"[状态快照] {self.path} 缺少 {', '.join(missing)}，不恢复")
+                    return None
+                for name, _, load in self._components:
+                    load(snapshot.state[name])
+                created_at = snapshot.created_at
+        except Exception as e:
+            logging.error(f"[状态快照] 恢复失败: {e}")
+            return None
+        logging.info(f"[状态快照] 已由 {self.path} 恢复")
+        return created_at
+
+    def start(self):
+        """后台定期写入快照，启动时立即写入一次"""
+        self.scheduler = FixedRateScheduler(self.interval, align=False)
+        threading.Thread(target=self.scheduler.run, args=(self.checkpoint,),
+                         name="state-checkpoint", daemon=True).start()
+
+    def stop(self):
+        if self.scheduler is not None:
+            self.scheduler.stop()
@@ -1,3 +1,5 @@
+from datetime import datetime, timedelta
+
 from application.data_management.models.well_data import WellData
 from application.data_management.modules.audit.audit_logger import AuditLogger
 from application.data_management.modules.alert.alert_manager import AlertManager
@@ -5,8 +7,11 @@ from application.data_management.modules.monitoring.db_health import DatabaseHea
 from application.data_management.modules.monitoring.online_status import OnlineStatusMonitor
 from application.data_management.modules.monitoring.transmitter import TransmitterMonitor
 from application.data_management.modules.optimizer.optimizer_manager import OptimizerManager
+from application.data_management.processor.checkpoint import StateCheckpoint
+from application.data_management.processor.warm_start import WarmStart
 from application.data_management.storage.database import Database
 from application.data_management.storage.settings import SettingManager
+from application.data_management.storage.well_data_storage import WellDataStorage
 
 
 class DataProcessor:
@@ -17,12 +22,52 @@ class DataProcessor:
 
         self.alert_manager = AlertManager(db, settings)
         self.audit_logger = AuditLogger(db)
+        self.storage = WellDataStorage(db,
+                                       batch_size=settings.get("DATA_BATCH_SIZE", 200),
+                                       flush_interval=settings.get("DATA_BATCH_INTERVAL_SECONDS", 5),
+                                       spool_dir=settings.get("DATA_SPOOL_DIR", "spool/device_data"),
+                                       retry_interval=settings.get("DATA_SPOOL_RETRY_SECONDS", 10),
+                                       rollup_enabled=settings.get("DATA_ROLLUP_ENABLED", True))
 
         self.online_monitor = OnlineStatusMonitor(db)
-        self.db_health_monitor = DatabaseHealthMonitor(db, self.alert_manager, self.audit_logger)
+        self.db_health_monitor = DatabaseHealthMonitor(db, self.alert_manager, self.audit_logger, self.storage,
+                                                       dedup_window=settings.get("DUPLICATE_WINDOW_SECONDS", 86400))
         self.transmitter_monitor = TransmitterMonitor(db, settings, self.alert_manager, self.audit_logger)
         self.optimizer_manager = OptimizerManager(db)
 
+        # 状态快照：去重指纹、采样时隙、平线检测、告警抑制与优化器修正值
+        self.checkpoint = StateCheckpoint(settings.get("SNAPSHOT_PATH", "snapshot/processor.snap"),
+                                          interval=settings.get("SNAPSHOT_INTERVAL_SECONDS", 300),
+                                          max_age=settings.get("SNAPSHOT_MAX_AGE_SECONDS", 3600))
+        self.checkpoint.register("fingerprints", self.db_health_monitor.fingerprints.dump_state,
+                                 self.db_health_monitor.fingerprints.load_state)
+        # 采集间隔变化时不恢复采样时隙位图，由定时任务从数据库重建
+        self.checkpoint.register("slots", self.db_health_monitor.slots.dump_state,
+                                 self.db_health_monitor.slots.load_state)
+        self.checkpoint.register("flatline", self.transmitter_monitor.dump_state, self.transmitter_monitor.load_state)
+        self.checkpoint.register("alert_suppression", self.alert_manager.dump_state, self.alert_manager.load_state)
+        self.checkpoint.register("optimizer", self.optimizer_manager.dump_state, self.optimizer_manager.load_state)
+
+        # 启动预热：后台由数据库恢复去重指纹、采样时隙、平线检测与告警抑制状态
+        self.db_health_monitor.slots.configure(settings.get("DATA_INTERVAL_SECONDS", 60), 24 * 60 * 60)
+        self.warm_start = WarmStart(db, hours=settings.get("WARM_START_HOURS", 24))
+        self.warm_start.add_sink("db_health", self.db_health_monitor.load_history)
+        self.warm_start.add_sink("transmitter", self.transmitter_monitor.load_history)
+        self.warm_start.add_task("alert_suppression", self.alert_manager.load_suppression)
+        self.warm_start.on_ready(self._on_warm_start_ready)
+
+        # 快照未过期时直接恢复，只补读快照之后入库的数据（往前多读一个写入间隔，重复加载指纹、时隙无影响）
+        restored_at = self.checkpoint.restore()
+        if restored_at is not None:
+            self.warm_start.resume_from(restored_at - self.checkpoint.interval, sinks=["db_health"])
+        if self.storage.rollup_enabled:
+            # 回填最近 24 小时的汇总（新建的表或停机期间的数据），完成前优化器的 24 小时平均值读取原始数据
+            self.warm_start.add_task("rollups", self._backfill_rollups)
+        self.warm_start.start()
+
+        # 告警规则按固定间隔对全部设备批量评估
+        self.transmitter_monitor.start(settings.get("ALERT_RULE_INTERVAL_SECONDS", 10))
+
     def process(self, device_id: str, data: WellData) -> WellData:
         """处理单条数据的完整流程"""
 
@@ -37,3 +82,27 @@ class DataProcessor:
         processed_data = optimizer.process(data)
 
         return data
+
+    def _on_warm_start_ready(self):
+        # 采样时隙位图已由预热数据重建，定时任务无需再查询
+        if self.warm_start.status()["complete"] and self.warm_start.status()["source"] == "database":
+            self.db_health_monitor.slots.loaded = True
+        # 预热完成前的状态不完整，完成后才开始定期写入快照
+        self.checkpoint.start()
+
+    def _backfill_rollups(self):
+        end = datetime.now()
+        self.storage.backfill_rollups(end - timedelta(hours=24), end)
+
+    def is_ready(self) -> bool:
+        """启动预热是否完成（完成前缺失率、重复检测等依赖历史数据的判断可能不准确）"""
+        return self.warm_start.ready.is_set()
+
+    def close(self):
+        """停止处理，写入缓冲中的剩余数据与最后一次状态快照，发送队列中剩余的告警邮件"""
+        self.checkpoint.stop()
+        self.transmitter_monitor.stop()
+        self.storage.close()
+        if self.is_ready():
+            self.checkpoint.checkpoint()
+        self.alert_manager.close()
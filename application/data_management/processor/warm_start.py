@@ -0,0 +1,151 @@
+"""
+启动预热模块
+"""
+import itertools
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+
+from application.data.models import DataPoint
+from application.data_management.storage.database import Database
+from application.data_management.storage.db_models import DeviceData
+
+# 按设备加载历史数据的回调：(设备编号, 按时间排序的 device_data 行)
+RowSink = Callable[[str, Sequence], None]
+
+
+def to_data_point(device_id: str, row) -> DataPoint:
+    """device_data 行转换为时间窗口存储使用的 DataPoint"""
+    return DataPoint(
+        device_id=device_id,
+        timestamp=datetime.fromtimestamp(row.cmt5_time),
+        dp=row.dP,
+        pressure=row.pressure,
+        temperature=row.temperature,
+        water_cut=row.waterCut,
+        liquid_flow=row.liquidFlowRate,
+        water_flow=row.waterFlowRate,
+        oil_flow=row.oilFlowRate,
+        gas_flow=row.gasFlowRate,
+    )
+
+
+class WarmStart:
+    """
+    启动预热：重启后由数据库恢复各内存窗口，而不是等待 24 小时重新积累
+
+    一次流式查询读取最近 hours 小时全部设备的 device_data，按 (device_id, cmt5_time) 唯一键顺序返回，
+    每台设备的数据集中交给各回调批量加载；之后执行其余恢复任务（如告警抑制时间），全部完成后标记就绪。
+
+    :param db: 数据库
+    :param hours: 加载最近多少小时的数据
+    :param batch_size: 流式读取每批行数
+    """
+
+    def __init__(self, db: Database, hours: float = 24, batch_size: int = 10000):
+        self.db = db
+        self.hours = hours
+        self.batch_size = batch_size
+        self.ready = threading.Event()
+        # 只读取该时间戳之后的数据（由快照恢复后补读），None 表示最近 hours 小时
+        self.since: Optional[float] = None
+
+        self._sinks: List[Tuple[str, RowSink]] = []
+        self._tasks: List[Tuple[str, Callable[[], None]]] = []
+        self._callbacks: List[Callable[[], None]] = []
+        # complete: device_data 是否全部读取成功
+        # source: database 由数据库预热，snapshot 由快照恢复并补读快照之后的数据
+        self._status = {"state": "pending", "source": "database", "complete": False, "rows": 0, "devices": 0,
+                        "seconds": None, "errors": []}
+
+    def add_sink(self, name: str, sink: RowSink):
+        """注册按设备加载历史数据的回调"""
+        self._sinks.append((name, sink))
+
+    def add_window_store(self, name: str, load: Callable[[str, List[DataPoint]], None]):
+        """注册时间窗口存储（TimeWindowDataStore / TimeWindowDataManager 的 load_history）"""
+        self.add_sink(name, lambda device_id, rows: load(device_id, [to_data_point(device_id, row) for row in rows]))
+
+    def add_task(self, name: str, task: Callable[[], None]):
+        """注册不依赖 device_data 的恢复任务"""
+        self._tasks.append((name, task))
+
+    def on_ready(self, callback: Callable[[], None]):
+        """注册预热完成后的回调"""
+        self._callbacks.append(callback)
+
+    def resume_from(self, since: float, sinks: Iterable[str]):
+        """
+        各组件已由快照恢复：只补读 since 之后入库的数据，交给可重复加载的回调，不再执行其余恢复任务
+
+        :param since: 秒级时间戳
+        :param sinks: 补读数据的回调名称，对重复数据须幂等（如去重指纹、采样时隙）
+        """
+        sinks = set(sinks)
+        self.since = since
+        self._sinks = [(name, sink) for name, sink in self._sinks if name in sinks]
+        self._tasks = []
+        self._status["source"] = "snapshot"
+
+    def start(self) -> threading.Thread:
+        """后台执行预热"""
+        thread = threading.Thread(target=self.run, name="warm-start", daemon=True)
+        thread.start()
+        return thread
+
+    def run(self):
+        """执行预热，单个回调失败不影响其余回调"""
+        started = time.time()
+        self._status["state"] = "loading"
+        session = self.db.get_session()
+
+        try:
+            since = int(started - self.hours * 60 * 60 if self.since is None else self.since)
+            table = DeviceData.__table__
+            rows = session.execute(select(table).where(table.c.cmt5_time >= since)
+                                   .order_by(table.c.device_id, table.c.cmt5_time)
+                                   .execution_options(yield_per=self.batch_size))
+            for device_id, device_rows in itertools.groupby(rows, key=lambda row: row.device_id):
+                device_rows = list(device_rows)
+                self._status["rows"] += len(device_rows)
+                self._status["devices"] += 1
+                for name, sink in self._sinks:
+                    self._call(name, sink, device_id, device_rows)
+            self._status["complete"] = True
+
+        except Exception as e:
+            self._error("device_data", e)
+        finally:
+            session.close()
+
+        for name, task in self._tasks:
+            self._call(name, task)
+        for callback in self._callbacks:
+            self._call("on_ready", callback)
+
+        self._status["seconds"] = round(time.time() - started, 3)
+        self._status["state"] = "ready"
+        self.ready.set()
+        logging.info(f"[启动预热] 完成: {self._status['devices']} 台设备, {self._status['rows']} 条数据, "
+                     f"耗时 {self._status['seconds']} 秒")
+
+    def _call(self, name: str, func: Callable, *args):
+        try:
+            func(*args)
+        except Exception as e:
+            self._error(name, e)
+
+    def _error(self, name: str, error: Exception):
+        self._status["errors"].append(f"{name}: {error}")
+        logging.error(f"[启动预热] {name} 加载失败: {error}")
+
+    def wait(self, timeout: float = None) -> bool:
+        """等待预热完成"""
+        return self.ready.wait(timeout)
+
+    def status(self) -> dict:
+        return {**self._status, "ready": self.ready.is_set(), "errors": list(self._status["errors"])}
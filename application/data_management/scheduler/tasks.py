@@ -7,6 +7,8 @@ from datetime import datetime, timedelta
 
 from apscheduler.schedulers.background import BackgroundScheduler
 
+from application.data.circuit_breaker import BreakerRegistry, breaker_registry
+from application.data.slot_bitmap import SlotBitmapRegistry, data_slots
 from application.data_management.storage.constants import DeviceStatus, AlertType
 from application.data_management.storage.database import Database
 from application.data_management.storage.settings import SettingManager
@@ -19,8 +21,11 @@ from application.data_management.modules.audit.event_type import AuditEventType
 class ScheduledTasks:
     """定时任务"""
 
-    def __init__(self, db: Database, settings: SettingManager, alert_manager: AlertManager, audit_logger: AuditLogger):
+    def __init__(self, db: Database, settings: SettingManager, alert_manager: AlertManager, audit_logger: AuditLogger,
+                 breakers: BreakerRegistry = breaker_registry, slots: SlotBitmapRegistry = data_slots):
         self.db = db
+        self.breakers = breakers
+        self.slots = slots
         self.settings = settings
         self.alert_manager = alert_manager
         self.audit_logger = audit_logger
@@ -30,6 +35,10 @@ class ScheduledTasks:
     def start(self):
         """启动定时任务"""
 
+        # 由数据库重建采样时隙位图（启动预热已完成时跳过），之后由入库流程增量维护
+        if not self.slots.loaded:
+            self.rebuild_slots()
+
         # 每 1 分钟检查设备在线状态
         self.scheduler.add_job(
             self.check_device_online,
@@ -54,6 +63,24 @@ class ScheduledTasks:
         self.scheduler.shutdown()
         logging.info("[定时任务] 已停止")
 
+    def rebuild_slots(self):
+        """读取24小时内各设备的数据时间，重建采样时隙位图"""
+
+        session = self.db.get_session()
+
+        try:
+            self.slots.configure(self.settings.get("DATA_INTERVAL_SECONDS", 60), 24 * 60 * 60)
+            since = int(time.time()) - 24 * 60 * 60
+            rows = session.query(DeviceData.device_id, DeviceData.cmt5_time).filter(
+                DeviceData.cmt5_time >= since).yield_per(10000)
+            self.slots.rebuild(rows)
+            logging.info("[定时任务] 采样时隙位图已重建")
+
+        except Exception as e:
+            logging.error(f"[定时任务] 重建采样时隙位图失败: {e}")
+        finally:
+            session.close()
+
     def check_device_online(self):
         """检查所有设备在线状态"""
 
@@ -71,8 +98,11 @@ class ScheduledTasks:
 
             for device in devices:
 
-                # 超时且当前状态是在线
-                if device.last_update_time < offline_threshold and device.status == DeviceStatus.ONLINE:
+                # 采集链路已熔断的设备直接判定离线，无需等待超时
+                breaker_open = self.breakers.is_open(device.id)
+
+                # 超时（或已熔断）且当前状态是在线
+                if (breaker_open or device.last_update_time < offline_threshold) and device.status == DeviceStatus.ONLINE:
                     # 更新状态
                     device.status = DeviceStatus.OFFLINE
 
@@ -80,10 +110,11 @@ class ScheduledTasks:
                     minutes_offline = (now - device.last_update_time).total_seconds() / 60
 
                     # 发送告警
+                    reason = "采集链路无响应（已熔断）" if breaker_open else f"{minutes_offline:.0f} 分钟未收到数据"
                     self.alert_manager.send(
                         device_id=device.id,
                         alert_type=AlertType.DEVICE_OFFLINE,
-                        message=f"设备 {device.id} 已离线，{minutes_offline:.0f} 分钟未收到数据",
+                        message=f"设备 {device.id} 已离线，{reason}",
                     )
 
                     # 记录审计日志
@@ -109,13 +140,14 @@ class ScheduledTasks:
         try:
             # 获取配置
             # 数据上报间隔（秒）
-            data_interval_seconds = 60
+            data_interval_seconds = self.settings.get("DATA_INTERVAL_SECONDS", 60)
             # 缺失率阈值
             missing_threshold_percent = self.settings.get("DATA_MISSING_THRESHOLD_PERCENT")
 
-            # 24小时时间范围
-            now = int(time.time())
-            hours_24_ago = now - 24 * 60 * 60
+            # 采集间隔变化时位图被清空，需重新重建
+            self.slots.configure(data_interval_seconds, 24 * 60 * 60)
+            if not self.slots.loaded:
+                self.rebuild_slots()
 
             # 24小时应有的数据条数
             expected_count = (24 * 60 * 60) // data_interval_seconds
@@ -124,19 +156,9 @@ class ScheduledTasks:
             devices = session.query(Device).all()
 
             for device in devices:
-                # 统计该设备24小时内的实际数据条数
-                actual_count = session.query(DeviceData).filter(
-                    DeviceData.device_id == device.id,
-                    DeviceData.cmt5_time >= hours_24_ago,
-                    DeviceData.cmt5_time <= now
-                ).count()
-
-                # 计算缺失率
-                missing_count = expected_count - actual_count
-                if missing_count < 0:
-                    missing_count = 0
-
-                missing_percent = (missing_count / expected_count) * 100
+                # 由采样时隙位图统计该设备24小时内的缺失率，无需查询数据表
+                actual_count = self.slots.received(device.id, 24 * 60 * 60)
+                missing_percent = self.slots.loss_rate(device.id, 24 * 60 * 60) * 100
 
                 logging.info(f"设备 {device. id}:  预期 {expected_count} 条, 实际 {actual_count} 条, 缺失率 {missing_percent:.2f}%")
 
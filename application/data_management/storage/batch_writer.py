@@ -0,0 +1,123 @@
+import atexit
+import logging
+import threading
+import time
+from typing import Callable, List
+
+
+class BatchWriter:
+    """
+    写后批量写入器：按条数或时间期限批量落库
+
+    写入失败的批次放回缓冲头部，间隔 flush_interval 秒后重试；
+    缓冲达到 max_pending 条时 add() 阻塞等待写入，数据库持续缓慢或不可用时向调用方施加背压，而不是无限占用内存。
+    """
+
+    def __init__(self, flush_func: Callable[[List[dict]], None], batch_size: int = 200,
+                 flush_interval: float = 5.0, name: str = "batch-writer", max_pending: int = None):
+        """
+        :param flush_func: 批量写入函数，参数为行字典列表
+        :param batch_size: 缓冲达到该条数时立即写入
+        :param flush_interval: 第一条缓冲数据最多等待的秒数，也是写入失败后的重试间隔
+        :param name: 后台线程名称
+        :param max_pending: 缓冲上限，默认为 batch_size 的 50 倍
+        """
+        self.flush_func = flush_func
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.name = name
+        self.max_pending = max_pending or batch_size * 50
+
+        self._buffer: List[dict] = []
+        self._deadline = None
+        # 上一批写入失败，等待重试期限而不是按条数立即重写
+        self._retrying = False
+        self._closed = False
+        self._cond = threading.Condition()
+        # 保证同一时间只有一个批次在写入，维持写入顺序
+        self._flush_lock = threading.Lock()
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        # 进程退出时保证最后一次写入
+        atexit.register(self.close)
+
+    def add(self, row: dict):
+        """加入一行待写入数据，缓冲已满时阻塞直至写入腾出空间"""
+        with self._cond:
+            while len(self._buffer) >= self.max_pending and not self._closed:
+                self._cond.wait()
+            if self._closed:
+                raise RuntimeError(f"[{self.name}] 已关闭，无法继续写入")
+            if not self._buffer:
+                self._deadline = time.monotonic() + self.flush_interval
+            self._buffer.append(row)
+            if len(self._buffer) >= self.batch_size:
+                # 等待者中既有后台线程也有被阻塞的调用方
+                self._cond.notify_all()
+
+    def pending(self) -> int:
+        """缓冲中待写入的条数"""
+        with self._cond:
+            return len(self._buffer)
+
+    def flush(self):
+        """立即写入缓冲中的全部数据"""
+        with self._flush_lock:
+            with self._cond:
+                rows = self._take()
+            self._write(rows)
+
+    def close(self):
+        """停止后台线程并写入剩余数据"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self.flush()
+        pending = self.pending()
+        if pending:
+            logging.error(f"[{self.name}] 关闭时仍有 {pending} 条数据写入失败，已丢弃")
+
+    def _take(self) -> List[dict]:
+        rows = self._buffer
+        self._buffer = []
+        self._deadline = None
+        # 唤醒因缓冲已满而阻塞的调用方
+        self._cond.notify_all()
+        return rows
+
+    def _write(self, rows: List[dict]):
+        if not rows:
+            return
+        try:
+            self.flush_func(rows)
+            logging.debug(f"[{self.name}] 批量写入 {len(rows)} 条")
+            with self._cond:
+                self._retrying = False
+        except Exception as e:
+            logging.error(f"[{self.name}] 批量写入 {len(rows)} 条失败，{self.flush_interval} 秒后重试: {e}")
+            with self._cond:
+                # 放回缓冲头部保持写入顺序
+                self._buffer[:0] = rows
+                self._deadline = time.monotonic() + self.flush_interval
+                self._retrying = True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if len(self._buffer) >= self.batch_size and not self._retrying:
+                        break
+                    if self._deadline is None:
+                        self._cond.wait()
+                        continue
+                    remaining = self._deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._closed:
+                    return
+            self.flush()
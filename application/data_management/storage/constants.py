@@ -16,4 +16,5 @@ class AlertType(IntEnum):
     PRESSURE_HIGH = 5
     PRESSURE_LOW = 6
     TEMPERATURE_HIGH = 7
-    TEMPERATURE_LOW = 8
\ No newline at end of file
+    TEMPERATURE_LOW = 8
+    SENSOR_FLATLINE = 9
\ No newline at end of file
@@ -1,7 +1,9 @@
-from sqlalchemy import Column, String, Text, BIGINT, FLOAT, ForeignKey
+from sqlalchemy import Column, String, Text, BIGINT, FLOAT, ForeignKey, Table, UniqueConstraint
 from sqlalchemy.dialects.mssql import TINYINT
 from sqlalchemy.orm import declarative_base, relationship
 
+from application.data_management.storage.rollup import rollup_columns
+
 Base = declarative_base()
 
 
@@ -18,6 +20,8 @@ class Device(Base):
 
 class DeviceData(Base):
     __tablename__ = 'device_data'
+    # 同一设备同一时刻只保留一条，批量写入使用 INSERT IGNORE
+    __table_args__ = (UniqueConstraint('device_id', 'cmt5_time', name='uk_device_id_cmt5_time'),)
 
     id = Column(BIGINT, primary_key=True, autoincrement=True)
     device_id = Column(String(50), ForeignKey('device.id'), index=True, nullable=False)
@@ -35,6 +39,16 @@ class DeviceData(Base):
     device = relationship("Device", back_populates="data_records")
 
 
+# device_data 参与汇总的字段
+DEVICE_DATA_ROLLUP_FIELDS = ['dP', 'gVF', 'gasFlowRate', 'liquidFlowRate', 'oilFlowRate', 'pressure', 'temperature',
+                             'waterCut', 'waterFlowRate']
+
+# device_data 多粒度汇总表（10分钟 / 1小时 / 1天）
+DeviceDataRollup = Table('device_data_rollup', Base.metadata,
+                         *rollup_columns(Column('device_id', String(50), primary_key=True),
+                                         DEVICE_DATA_ROLLUP_FIELDS))
+
+
 class Alert(Base):
     __tablename__ = "alert"
 
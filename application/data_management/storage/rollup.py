@@ -0,0 +1,281 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Column, DateTime, Float, Integer, Table, delete, func, insert, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+# 汇总粒度 单位:秒，由细到粗，每一级由上一级汇总得到
+RESOLUTIONS = (600, 3600, 86400)
+
+
+def rollup_columns(key_column: Column, fields: Iterable[str]) -> List[Column]:
+    """
+    汇总表字段：设备 + 粒度 + 时间桶为主键，每个字段保存 sum / min / max / last
+
+    sum 为按时间加权的积分（值 × 保持秒数），除以 covered_seconds 即为时间加权平均值
+
+    :param key_column: 设备标识列（需为主键）
+    :param fields: 被汇总的字段名称
+    """
+    columns = [
+        key_column,
+        Column("resolution", Integer, primary_key=True, comment="汇总粒度 单位:秒"),
+        Column("bucket", DateTime, primary_key=True, comment="时间桶起点"),
+        Column("sample_count", Integer, nullable=False, comment="样本数"),
+        Column("last_time", DateTime, nullable=False, comment="桶内最后一条数据的时间"),
+        Column("covered_seconds", Float(53), nullable=False, comment="有数据覆盖的秒数"),
+    ]
+    for field in fields:
+        columns += [
+            Column(f"{field}_sum", Float(53), nullable=False),
+            Column(f"{field}_min", Float(53), nullable=False),
+            Column(f"{field}_max", Float(53), nullable=False),
+            Column(f"{field}_last", Float(53), nullable=False),
+        ]
+    return columns
+
+
+def floor_time(value: datetime, resolution: int) -> datetime:
+    """按本地时间对齐到时间桶起点（粒度需整除一天）"""
+    midnight = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    seconds = int((value - midnight).total_seconds()) // resolution * resolution
+    return midnight + timedelta(seconds=seconds)
+
+
+def ceil_time(value: datetime, resolution: int) -> datetime:
+    floor = floor_time(value, resolution)
+    return floor if floor == value else floor + timedelta(seconds=resolution)
+
+
+class RollupStore:
+    """
+    多粒度汇总表（10分钟 / 1小时 / 1天）
+
+    原始数据入库提交后调用 update()：受影响的 10 分钟桶由原始数据重新计算，
+    1 小时桶由 10 分钟桶、1 天桶由 1 小时桶重新计算。每次都是重算而非累加，
+    落盘队列重放等重复写入不会导致重复计数。
+
+    平均值按采样保持（死区过滤下未写入即未变化）时间加权：每个样本的值保持到下一个样本，
+    最长 max_hold 秒，超过视为数据中断；桶起点之前最后一个样本的值延续到桶内。
+    稳定期只有心跳数据、变化期逐条写入时，平均值不会偏向变化期。
+
+    :param rollup: 汇总表
+    :param source: 原始数据表
+    :param key: 设备标识列名
+    :param time: 时间列名
+    :param fields: 被汇总的字段名称
+    :param epoch: 时间列是否为秒级时间戳（否则为 DATETIME）
+    :param filters: 原始数据的附加过滤条件，如 valid = 1
+    :param max_hold: 样本值最长保持时间 单位:秒，需不小于采集间隔与死区心跳
+    """
+
+    def __init__(self, rollup: Table, source: Table, key: str, time: str, fields: List[str],
+                 epoch: bool = False, filters: list = None, max_hold: float = 600):
+        self.rollup = rollup
+        self.source = source
+        self.key = key
+        self.time = time
+        self.fields = list(fields)
+        self.epoch = epoch
+        self.filters = list(filters or [])
+        self.max_hold = max_hold
+        # 汇总表自该时间起完整（由 backfill 设置），之前的区间 aggregate() 读取原始数据
+        self.complete_since: Optional[datetime] = None
+
+    def _to_datetime(self, value) -> datetime:
+        return datetime.fromtimestamp(value) if self.epoch else value
+
+    def _to_source(self, value: datetime):
+        return int(value.timestamp()) if self.epoch else value
+
+    def update(self, session, rows: List[dict]):
+        """重算 rows 涉及的全部时间桶，需在原始数据写入之后调用（由调用方提交）"""
+        hold = timedelta(seconds=self.max_hold)
+        # 样本值最多保持到 max_hold 秒后，其间的 10 分钟桶都可能受影响
+        affected = set()
+        for row in rows:
+            time_value = self._to_datetime(row[self.time])
+            bucket, last = floor_time(time_value, RESOLUTIONS[0]), floor_time(time_value + hold, RESOLUTIONS[0])
+            while bucket <= last:
+                affected.add((row[self.key], bucket))
+                bucket += timedelta(seconds=RESOLUTIONS[0])
+
+        for level, resolution in enumerate(RESOLUTIONS):
+            buckets = sorted({(key, floor_time(bucket, resolution)) for key, bucket in affected})
+            for key, bucket in buckets:
+                end = bucket + timedelta(seconds=resolution)
+                if level == 0:
+                    stats = self._aggregate_source(session, key, bucket, end)
+                else:
+                    stats = self._aggregate_children(session, key, RESOLUTIONS[level - 1], bucket, end)
+                self._save(session, key, resolution, bucket, stats)
+
+    def backfill(self, session, start: datetime, end: datetime, key=None) -> int:
+        """按天重算历史数据的汇总，每天提交一次，返回处理的原始数据条数；回填全部设备后汇总表自 start 起完整"""
+        total = 0
+        day = floor_time(start, 86400)
+        while day < end:
+            next_day = day + timedelta(days=1)
+            conditions = [self.source.c[self.time] >= self._to_source(max(day, start)),
+                          self.source.c[self.time] < self._to_source(min(next_day, end)), *self.filters]
+            if key is not None:
+                conditions.append(self.source.c[self.key] == key)
+            rows = [{self.key: row[0], self.time: row[1]} for row in session.execute(
+                select(self.source.c[self.key], self.source.c[self.time]).where(*conditions))]
+            if rows:
+                self.update(session, rows)
+                session.commit()
+                total += len(rows)
+            day = next_day
+        if key is None and (self.complete_since is None or start < self.complete_since):
+            self.complete_since = start
+        return total
+
+    def _aggregate_source(self, session, key, start: datetime, end: datetime,
+                          fields: List[str] = None) -> Optional[dict]:
+        """由原始数据按采样保持计算 [start, end) 的时间加权汇总，start 之前最后一个样本的值延续到区间内"""
+        fields = fields or self.fields
+        columns = [self.source.c[self.time]] + [self.source.c[field] for field in fields]
+        rows = session.execute(select(*columns).where(
+            self.source.c[self.key] == key,
+            self.source.c[self.time] >= self._to_source(start),
+            self.source.c[self.time] < self._to_source(end),
+            *self.filters).order_by(self.source.c[self.time])).fetchall()
+        previous = session.execute(select(*columns).where(
+            self.source.c[self.key] == key,
+            self.source.c[self.time] < self._to_source(start),
+            self.source.c[self.time] >= self._to_source(start - timedelta(seconds=self.max_hold)),
+            *self.filters).order_by(self.source.c[self.time].desc()).limit(1)).fetchall()
+
+        points = [(self._to_datetime(row[0]), [float(value) for value in row[1:]]) for row in previous + rows]
+        covered, sums = 0.0, [0.0] * len(fields)
+        minimum, maximum = [None] * len(fields), [None] * len(fields)
+        for i, (time_value, values) in enumerate(points):
+            stop = time_value + timedelta(seconds=self.max_hold)
+            if i + 1 < len(points):
+                stop = min(stop, points[i + 1][0])
+            seconds = max((min(stop, end) - max(time_value, start)).total_seconds(), 0.0)
+            if seconds == 0 and time_value < start:
+                # 延续值未覆盖到区间内
+                continue
+            covered += seconds
+            for j, value in enumerate(values):
+                sums[j] += value * seconds
+                minimum[j] = value if minimum[j] is None else min(minimum[j], value)
+                maximum[j] = value if maximum[j] is None else max(maximum[j], value)
+        if not rows and not covered:
+            return None
+
+        last_time, last_values = points[-1]
+        stats = {"sample_count": len(rows), "last_time": last_time, "covered_seconds": covered}
+        for j, field in enumerate(fields):
+            stats.update({f"{field}_sum": sums[j], f"{field}_min": minimum[j],
+                          f"{field}_max": maximum[j], f"{field}_last": last_values[j]})
+        return stats
+
+    def _aggregate_children(self, session, key, resolution: int, start: datetime, end: datetime) -> Optional[dict]:
+        rows = session.execute(select(self.rollup).where(
+            self.rollup.c[self.key] == key,
+            self.rollup.c.resolution == resolution,
+            self.rollup.c.bucket >= start,
+            self.rollup.c.bucket < end).order_by(self.rollup.c.bucket)).mappings().fetchall()
+        if not rows:
+            return None
+        stats = {"sample_count": sum(row["sample_count"] for row in rows), "last_time": rows[-1]["last_time"],
+                 "covered_seconds": sum(row["covered_seconds"] for row in rows)}
+        for field in self.fields:
+            stats.update({f"{field}_sum": sum(row[f"{field}_sum"] for row in rows),
+                          f"{field}_min": min(row[f"{field}_min"] for row in rows),
+                          f"{field}_max": max(row[f"{field}_max"] for row in rows),
+                          f"{field}_last": rows[-1][f"{field}_last"]})
+        return stats
+
+    def _save(self, session, key, resolution: int, bucket: datetime, stats: Optional[dict]):
+        identity = {self.key: key, "resolution": resolution, "bucket": bucket}
+        if stats is None:
+            session.execute(delete(self.rollup).where(*(self.rollup.c[k] == v for k, v in identity.items())))
+        elif session.get_bind().dialect.name == "mysql":
+            stmt = mysql_insert(self.rollup).values(**identity, **stats)
+            session.execute(stmt.on_duplicate_key_update(**{name: stmt.inserted[name] for name in stats}))
+        else:
+            session.execute(delete(self.rollup).where(*(self.rollup.c[k] == v for k, v in identity.items())))
+            session.execute(insert(self.rollup).values(**identity, **stats))
+
+    @staticmethod
+    def pick_resolution(start: datetime, end: datetime, max_points: int, raw_interval: float) -> Optional[int]:
+        """
+        选择满足点数上限的最细粒度；原始数据即可满足时返回 None
+
+        :param max_points: 单个设备返回的最大点数
+        :param raw_interval: 原始数据采集间隔 单位:秒
+        """
+        span = (end - start).total_seconds()
+        if span / raw_interval <= max_points:
+            return None
+        for resolution in RESOLUTIONS:
+            if span / resolution <= max_points:
+                return resolution
+        return RESOLUTIONS[-1]
+
+    def series(self, session, start: datetime, end: datetime, resolution: int, key=None):
+        """按粒度返回时间桶时间加权平均值序列，列为 key、createTime 及各字段"""
+        columns = [self.rollup.c[self.key], self.rollup.c.bucket.label("createTime")]
+        columns += [(self.rollup.c[f"{field}_sum"] / self.rollup.c.covered_seconds).label(field)
+                    for field in self.fields]
+        conditions = [self.rollup.c.resolution == resolution,
+                      self.rollup.c.bucket >= floor_time(start, resolution),
+                      self.rollup.c.bucket < end]
+        if key is not None:
+            conditions.append(self.rollup.c[self.key] == key)
+        return session.execute(select(*columns).where(*conditions).order_by(self.rollup.c.bucket)).fetchall()
+
+    def aggregate(self, session, key, field: str, start: datetime, end: datetime) -> Optional[Dict[str, float]]:
+        """
+        [start, end) 内某字段的样本数 / 时间加权平均值 / 最小值 / 最大值
+
+        区间内部用尽量粗的完整时间桶覆盖，两端不足一个桶的部分逐级用更细的粒度，最后用原始数据补齐；
+        汇总表尚未完整（complete_since 之前或未回填）的部分全部读取原始数据。
+        """
+        split = end if self.complete_since is None else min(max(start, self.complete_since), end)
+        segments = [(None, start, split)] if start < split else []
+        segments += self._cover(split, end, list(reversed(RESOLUTIONS)))
+
+        count, covered, total, minimum, maximum = 0, 0.0, 0.0, None, None
+        for resolution, segment_start, segment_end in segments:
+            if resolution is None:
+                stats = self._aggregate_source(session, key, segment_start, segment_end, [field])
+                if stats is None:
+                    continue
+                row = (stats["sample_count"], stats["covered_seconds"], stats[f"{field}_sum"],
+                       stats[f"{field}_min"], stats[f"{field}_max"])
+            else:
+                row = session.execute(select(
+                    func.sum(self.rollup.c.sample_count), func.sum(self.rollup.c.covered_seconds),
+                    func.sum(self.rollup.c[f"{field}_sum"]),
+                    func.min(self.rollup.c[f"{field}_min"]), func.max(self.rollup.c[f"{field}_max"])).where(
+                    self.rollup.c[self.key] == key,
+                    self.rollup.c.resolution == resolution,
+                    self.rollup.c.bucket >= segment_start,
+                    self.rollup.c.bucket < segment_end)).one()
+                if row[3] is None:
+                    continue
+            count += int(row[0])
+            covered += float(row[1])
+            total += float(row[2])
+            minimum = float(row[3]) if minimum is None else min(minimum, float(row[3]))
+            maximum = float(row[4]) if maximum is None else max(maximum, float(row[4]))
+        if not covered:
+            return None
+        return {"count": count, "avg": total / covered, "min": minimum, "max": maximum}
+
+    def _cover(self, start: datetime, end: datetime, resolutions: List[int]) -> List[Tuple[Optional[int], datetime, datetime]]:
+        """将 [start, end) 拆分为 (粒度, 起点, 终点) 片段，粒度为 None 表示读取原始数据"""
+        if start >= end:
+            return []
+        if not resolutions:
+            return [(None, start, end)]
+        resolution, finer = resolutions[0], resolutions[1:]
+        first, last = ceil_time(start, resolution), floor_time(end, resolution)
+        if first >= last:
+            return self._cover(start, end, finer)
+        return self._cover(start, first, finer) + [(resolution, first, last)] + self._cover(last, end, finer)
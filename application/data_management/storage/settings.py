@@ -12,8 +12,8 @@ class SettingManager:
         self.db = db
         self._cache = {}
 
-    def get(self, key: str) -> Any:
-        """获取配置值"""
+    def get(self, key: str, default: Any = None) -> Any:
+        """获取配置值，未配置时返回 default"""
 
         # 先查缓存
         if key in self._cache:
@@ -24,7 +24,7 @@ class SettingManager:
             setting = session.query(Setting).filter_by(key=key).first()
 
             if setting is None:
-                return None
+                return default
 
             value = self._parse_value(setting.value)
 
@@ -0,0 +1,222 @@
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+# 记录头：负载长度 + CRC32
+_HEADER = struct.Struct('>II')
+_SEGMENT_SUFFIX = ".seg"
+_CHECKPOINT_FILE = "checkpoint"
+
+
+def _encode(record: dict) -> bytes:
+    def default(value):
+        if isinstance(value, datetime):
+            return {"__datetime__": value.isoformat()}
+        return str(value)
+    return json.dumps(record, ensure_ascii=False, default=default).encode('utf-8')
+
+
+def _decode(payload: bytes) -> dict:
+    def object_hook(value):
+        if "__datetime__" in value:
+            return datetime.fromisoformat(value["__datetime__"])
+        return value
+    return json.loads(payload.decode('utf-8'), object_hook=object_hook)
+
+
+class Spool:
+    """
+    追加写的本地落盘队列
+
+    数据按段文件顺序存放，每条记录为 长度 + CRC32 + JSON 负载；
+    消费进度记录在 checkpoint 文件中，已完全消费的段文件会被删除。
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = 4 * 1024 * 1024, fsync: bool = True):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._read_pos = self._load_checkpoint()
+        self._write_segment = self._segments()[-1] if self._segments() else max(self._read_pos[0], 1)
+        self._repair_tail()
+
+    def append(self, records: List[dict]):
+        """追加一批记录并落盘"""
+        if not records:
+            return
+        with self._lock:
+            path = self._segment_path(self._write_segment)
+            if os.path.exists(path) and os.path.getsize(path) >= self.segment_bytes:
+                self._write_segment += 1
+                path = self._segment_path(self._write_segment)
+
+            buf = bytearray()
+            for record in records:
+                payload = _encode(record)
+                buf += _HEADER.pack(len(payload), zlib.crc32(payload))
+                buf += payload
+            with open(path, "ab") as f:
+                f.write(buf)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+
+    def read_batch(self, max_records: int = 500) -> Tuple[List[dict], Tuple[int, int]]:
+        """从消费位置起按顺序读取一批记录，返回记录和读取后的位置"""
+        with self._lock:
+            segment, offset = self._read_pos
+            records = []
+            while len(records) < max_records and segment <= self._write_segment:
+                path = self._segment_path(segment)
+                if os.path.exists(path):
+                    with open(path, "rb") as f:
+                        f.seek(offset)
+                        while len(records) < max_records:
+                            record = self._read_record(f)
+                            if record is None:
+                                break
+                            records.append(record)
+                            offset = f.tell()
+                    if len(records) >= max_records:
+                        break
+                if segment == self._write_segment:
+                    break
+                segment, offset = segment + 1, 0
+            return records, (segment, offset)
+
+    def commit(self, position: Tuple[int, int]):
+        """确认已消费到 position，保存进度并删除已消费完的段文件"""
+        with self._lock:
+            self._read_pos = position
+            tmp_path = os.path.join(self.directory, _CHECKPOINT_FILE + ".tmp")
+            with open(tmp_path, "w", encoding="UTF-8") as f:
+                f.write(f"{position[0]} {position[1]}")
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, os.path.join(self.directory, _CHECKPOINT_FILE))
+
+            for segment in self._segments():
+                if segment < position[0]:
+                    os.remove(self._segment_path(segment))
+
+    def is_empty(self) -> bool:
+        """是否没有待消费的记录"""
+        with self._lock:
+            segment, offset = self._read_pos
+            for seg in self._segments():
+                if seg < segment:
+                    continue
+                size = os.path.getsize(self._segment_path(seg))
+                if seg > segment and size > 0 or seg == segment and size > offset:
+                    return False
+            return True
+
+    def _segments(self) -> List[int]:
+        return sorted(int(name[:-len(_SEGMENT_SUFFIX)]) for name in os.listdir(self.directory)
+                      if name.endswith(_SEGMENT_SUFFIX))
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"{segment:012d}{_SEGMENT_SUFFIX}")
+
+    def _load_checkpoint(self) -> Tuple[int, int]:
+        path = os.path.join(self.directory, _CHECKPOINT_FILE)
+        if os.path.exists(path):
+            with open(path, "r", encoding="UTF-8") as f:
+                segment, offset = f.read().split()
+                return int(segment), int(offset)
+        segments = self._segments()
+        return (segments[0] if segments else 1), 0
+
+    @staticmethod
+    def _read_record(f) -> Optional[dict]:
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            return None
+        length, crc = _HEADER.unpack(header)
+        payload = f.read(length)
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            return None
+        return _decode(payload)
+
+    def _repair_tail(self):
+        """截断写入段末尾因进程中断留下的半条记录"""
+        path = self._segment_path(self._write_segment)
+        if not os.path.exists(path):
+            return
+        with open(path, "r+b") as f:
+            valid_end = 0
+            while self._read_record(f) is not None:
+                valid_end = f.tell()
+            if valid_end < os.path.getsize(path):
+                logging.warning(f"[落盘队列] 段文件 {path} 尾部记录不完整，截断至 {valid_end}")
+                f.truncate(valid_end)
+
+
+class SpoolForwarder:
+    """
+    存储转发：数据库可用且无积压时直接写入，否则写入落盘队列，
+    由后台线程在数据库恢复后按顺序批量回放。
+    写入函数需幂等（如 INSERT IGNORE + 唯一键），保证重放不产生重复数据。
+    """
+
+    def __init__(self, spool: Spool, insert_func: Callable[[List[dict]], None],
+                 batch_size: int = 500, retry_interval: float = 10.0, name: str = "spool-forwarder"):
+        self.spool = spool
+        self.insert_func = insert_func
+        self.batch_size = batch_size
+        self.retry_interval = retry_interval
+        self.name = name
+
+        # 保证直接写入与回放之间的先后顺序
+        self._order_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def write(self, rows: List[dict]):
+        """写入一批数据"""
+        with self._order_lock:
+            if self.spool.is_empty():
+                try:
+                    self.insert_func(rows)
+                    return
+                except Exception as e:
+                    logging.error(f"[{self.name}] 写入数据库失败，转存落盘队列: {e}")
+            self.spool.append(rows)
+        self._wakeup.set()
+
+    def drain(self) -> int:
+        """回放落盘队列直至清空，返回回放条数；数据库不可用时抛出异常"""
+        total = 0
+        while True:
+            with self._order_lock:
+                records, position = self.spool.read_batch(self.batch_size)
+                if not records:
+                    self.spool.commit(position)
+                    return total
+                self.insert_func(records)
+                self.spool.commit(position)
+            total += len(records)
+
+    def _run(self):
+        while True:
+            if not self.spool.is_empty():
+                try:
+                    count = self.drain()
+                    logging.info(f"[{self.name}] 落盘队列回放完成，共 {count} 条")
+                except Exception as e:
+                    logging.warning(f"[{self.name}] 落盘队列回放失败，{self.retry_interval} 秒后重试: {e}")
+                    time.sleep(self.retry_interval)
+                    continue
+            self._wakeup.wait(self.retry_interval)
+            self._wakeup.clear()
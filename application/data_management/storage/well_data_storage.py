@@ -1,42 +1,106 @@
+import logging
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import insert
+
 from application.data_management.models.well_data import WellData
+from application.data_management.storage.batch_writer import BatchWriter
 from application.data_management.storage.database import Database
-from application.data_management.storage.db_models import DeviceData
+from application.data_management.storage.db_models import DEVICE_DATA_ROLLUP_FIELDS, DeviceData, DeviceDataRollup
+from application.data_management.storage.rollup import RollupStore
+from application.data_management.storage.spool import Spool, SpoolForwarder
+
+# device_data 多粒度汇总，原始数据提交后在独立事务内维护
+device_data_rollups = RollupStore(DeviceDataRollup, DeviceData.__table__, "device_id", "cmt5_time",
+                                  DEVICE_DATA_ROLLUP_FIELDS, epoch=True)
 
 
 class WellDataStorage:
 
-    def __init__(self, db: Database):
+    def __init__(self, db: Database, batch_size: int = 200, flush_interval: float = 5.0,
+                 spool_dir: str = "spool/device_data", retry_interval: float = 10.0, rollup_enabled: bool = True):
+        """
+        :param spool_dir: 数据库不可用时的本地落盘目录，恢复后按顺序回放
+        :param retry_interval: 落盘队列回放失败后的重试间隔 单位:秒
+        :param rollup_enabled: 是否维护 device_data 多粒度汇总表
+        """
         self.db = db
+        self.rollup_enabled = rollup_enabled
+        self.forwarder = SpoolForwarder(Spool(spool_dir), self._flush,
+                                        retry_interval=retry_interval, name="device-data-forwarder")
+        self.writer = BatchWriter(self.forwarder.write, batch_size, flush_interval, name="device-data-writer")
 
     def save(self, device_id: str, well_data: WellData) -> bool:
         """
-        保存数据
+        保存数据（进入批量写入缓冲，按条数或时间期限落库）
 
         返回:  True=成功, False=失败
         """
+        try:
+            self.writer.add({
+                "device_id": device_id,
+                "cmt5_time": well_data.cmt5_time,
+                "dP": well_data.dP,
+                "gVF": well_data.gVF,
+                "gasFlowRate": well_data.gasFlowRate,
+                "liquidFlowRate": well_data.liquidFlowRate,
+                "oilFlowRate": well_data.oilFlowRate,
+                "pressure": well_data.pressure,
+                "temperature": well_data.temperature,
+                "waterCut": well_data.waterCut,
+                "waterFlowRate": well_data.waterFlowRate,
+            })
+            return True
+
+        except Exception as e:
+            print(f"[数据存储] 保存失败: {e}")
+            return False
+
+    def flush(self):
+        """立即写入缓冲数据"""
+        self.writer.flush()
+
+    def close(self):
+        """关闭并写入剩余数据"""
+        self.writer.close()
+
+    def backfill_rollups(self, start: datetime, end: datetime, device_id: str = None) -> int:
+        """回填历史数据的汇总，返回处理的原始数据条数"""
         session = self.db.get_session()
 
         try:
-            data = DeviceData(
-                device_id=device_id,
-                cmt5_time=well_data.cmt5_time,
-                dP=well_data.dP,
-                gVF=well_data.gVF,
-                gasFlowRate=well_data.gasFlowRate,
-                liquidFlowRate=well_data.liquidFlowRate,
-                oilFlowRate=well_data.oilFlowRate,
-                pressure=well_data.pressure,
-                temperature=well_data.temperature,
-                waterCut=well_data.waterCut,
-                waterFlowRate=well_data.waterFlowRate,
-            )
-            session.add(data)
+            return device_data_rollups.backfill(session, start, end, device_id)
+        finally:
+            session.close()
+
+    def _flush(self, rows: List[dict]):
+        """多行 INSERT IGNORE 批量写入，提交后重算受影响的汇总时间桶；同一设备同一时刻的重复数据由唯一键忽略"""
+        session = self.db.get_session()
+
+        try:
+            session.execute(insert(DeviceData).prefix_with("IGNORE", dialect="mysql")
+                            .prefix_with("OR IGNORE", dialect="sqlite"), rows)
             session.commit()
-            return True
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
 
+        if self.rollup_enabled:
+            self._update_rollups(rows)
+
+    def _update_rollups(self, rows: List[dict]):
+        """汇总更新失败不影响已写入的原始数据；汇总表不再完整，aggregate() 改读原始数据直至下次启动回填"""
+        session = self.db.get_session()
+
+        try:
+            device_data_rollups.update(session, rows)
+            session.commit()
         except Exception as e:
             session.rollback()
-            print(f"[数据存储] 保存失败: {e}")
-            return False
+            device_data_rollups.complete_since = None
+            logging.error(f"[数据存储] 汇总更新失败（{len(rows)} 条）: {e}")
         finally:
-            session.close()
\ No newline at end of file
+            session.close()
@@ -1,5 +1,6 @@
 from application import db
 from sqlalchemy import DECIMAL
+from application.data_management.storage.rollup import rollup_columns
 
 
 # 用户表
@@ -80,6 +81,13 @@ class Dept(db.Model):
 
 
 class WellData(db.Model):
+    __table_args__ = (
+        # 落盘队列回放幂等依赖的唯一键
+        db.UniqueConstraint('code', 'create_time', name='uk_code_create_time'),
+        # 按井号与时间范围查询曲线数据
+        db.Index('idx_code_valid_create_time', 'code', 'valid', 'create_time'),
+    )
+
     id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
     code = db.Column(db.String, nullable=False)
     dp = db.Column(DECIMAL(10, 2), nullable=False)
@@ -92,7 +100,8 @@ class WellData(db.Model):
     water_cut = db.Column(DECIMAL(10, 2), nullable=False)
     water_cut_optimizer = db.Column(DECIMAL(10, 2), nullable=True)
     water_flow_rate = db.Column(DECIMAL(10, 2), nullable=False)
-    create_time = db.Column(db.DateTime, nullable=False, default=db.func.current_timestamp())
+    # 表按 create_time 分区，主键需包含分区列
+    create_time = db.Column(db.DateTime, primary_key=True, nullable=False, default=db.func.current_timestamp())
     update_time = db.Column(db.DateTime, nullable=False, default=db.func.current_timestamp(),
                             onupdate=db.func.current_timestamp())
     valid = db.Column(db.SmallInteger, nullable=False, default=1)
@@ -131,6 +140,11 @@ class WaterCutSample(db.Model):
 
 
 class Alarm(db.Model):
+    __table_args__ = (
+        # 按时间范围查询告警列表
+        db.Index('idx_valid_alarm_time', 'valid', 'alarm_time'),
+    )
+
     id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
     code = db.Column(db.String, nullable=False)
     alarm_type = db.Column(db.String, nullable=False)
@@ -207,3 +221,13 @@ class Config(db.Model):
         self.key = key
         self.value = value
         self.description = description
+
+
+# well_data 参与汇总的字段
+WELL_DATA_ROLLUP_FIELDS = ['dp', 'gvf', 'gas_flow_rate', 'liquid_flow_rate', 'oil_flow_rate', 'pressure',
+                           'temperature', 'water_cut', 'water_flow_rate']
+
+# well_data 多粒度汇总表（10分钟 / 1小时 / 1天）
+WellDataRollup = db.Table('well_data_rollup',
+                          *rollup_columns(db.Column('code', db.String(255), primary_key=True),
+                                          WELL_DATA_ROLLUP_FIELDS))
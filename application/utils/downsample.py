@@ -0,0 +1,93 @@
+import numpy as np
+
+"""
+曲线降采样：在序列化之前把时间序列压缩到指定点数，保持曲线形状
+"""
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets 降采样，返回保留点的下标
+
+    首尾点必定保留，其余点均分为 threshold - 2 个桶，每个桶保留与
+    上一个保留点、下一个桶均值点构成三角形面积最大的点。桶内面积计算向量化。
+    threshold 小于 3 时只保留首点（及尾点），返回点数不超过 threshold。
+
+    :param x: 按升序排列的横坐标（如时间戳）
+    :param y: 纵坐标
+    :param threshold: 保留的点数
+    """
+    n = len(x)
+    if threshold >= n:
+        return np.arange(n)
+    if threshold < 3:
+        return np.array([0, n - 1][:max(threshold, 0)], dtype=np.int64)
+
+    # 第 i 个桶为 [edges[i], edges[i + 1])，不含首尾点
+    edges = (np.arange(threshold - 1) * (n - 2) / (threshold - 2) + 1).astype(np.int64)
+    edges[-1] = n - 1
+    # 每个桶的均值点，最后一个桶之后是尾点
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    counts = np.diff(edges)
+    avg_x = np.append(sums_x / counts, x[-1])
+    avg_y = np.append(sums_y / counts, y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # 以上一个保留点 a 为顶点，|(xa - xc)(yb - ya) - (xa - xb)(yc - ya)| 的两倍面积
+        area = np.abs((x[a] - avg_x[i + 1]) * (y[start:end] - y[a])
+                      - (x[a] - x[start:end]) * (avg_y[i + 1] - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def m4(x: np.ndarray, y: np.ndarray, buckets: int) -> np.ndarray:
+    """
+    M4 降采样，返回保留点的下标
+
+    按横坐标等宽分桶，每个桶保留首点、末点、最小值点、最大值点，像素级还原折线形状。
+    全部为数组运算，无逐桶循环。
+
+    :param x: 按升序排列的横坐标（如时间戳）
+    :param y: 纵坐标
+    :param buckets: 桶数，返回点数不超过 4 * buckets
+    """
+    n = len(x)
+    if buckets <= 0 or 4 * buckets >= n:
+        return np.arange(n)
+
+    span = x[-1] - x[0]
+    if span <= 0:
+        return np.array([0, n - 1]) if n > 1 else np.arange(n)
+    bucket = np.minimum(((x - x[0]) / span * buckets).astype(np.int64), buckets - 1)
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], n] - 1
+
+    # 桶内按 y 排序后，每组第一个即最小值点，最后一个即最大值点
+    order = np.lexsort((y, bucket))
+    minimum = order[starts]
+    maximum = order[ends]
+    return np.unique(np.concatenate((starts, ends, minimum, maximum)))
+
+
+def downsample(x, y, max_points: int, method: str = "lttb") -> np.ndarray:
+    """
+    按指定方法降采样，返回保留点的下标（升序），点数不超过 max_points
+
+    :param method: lttb / m4
+    """
+    if max_points < 1:
+        raise ValueError("maxPoints 必须为正整数")
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if method == "m4":
+        # 不足一个 M4 桶（4 个点）时只保留首尾点
+        return m4(x, y, max_points // 4) if max_points >= 4 else lttb(x, y, max_points)
+    if method == "lttb":
+        return lttb(x, y, max_points)
+    raise ValueError(f"不支持的降采样方法: {method}")
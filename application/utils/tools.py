@@ -1,5 +1,5 @@
 from collections import namedtuple
-from datetime import datetime
+from datetime import datetime, timedelta
 from functools import wraps
 from application import logger
 from application.base import Result
@@ -17,6 +17,18 @@ def format_datetime(value, formater='%Y-%m-%d %H:%M:%S'):
     return value
 
 
+# 解析查询时间范围，未传时默认为最近 hours 小时
+def parse_time_range(start_time, end_time, hours=24, formater='%Y-%m-%d %H:%M:%S'):
+    try:
+        end = datetime.strptime(end_time, formater) if end_time else datetime.now()
+        start = datetime.strptime(start_time, formater) if start_time else end - timedelta(hours=hours)
+    except ValueError:
+        raise ValueError(f"时间格式错误，应为 {formater}")
+    if start >= end:
+        raise ValueError("开始时间必须早于结束时间")
+    return start, end
+
+
 # 获取sql返回的所有字段
 def get_all_columns(data_list):
     # 获取列名
@@ -17,6 +17,13 @@ def load_config():
     sqlalchemy_config = config_original['sqlalchemy']
     server_config = config_original['server']
     time_config = config_original['time']
+    modbus_config = config_original.get('modbus', {})
+    ingest_config = config_original.get('ingest', {})
+    batch_config = config_original.get('batch', {})
+    spool_config = config_original.get('spool', {})
+    deadband_config = config_original.get('deadband', {})
+    partition_config = config_original.get('partition', {})
+    rollup_config = config_original.get('rollup', {})
 
     class Config:
         # 数据库连接字符串
@@ -38,6 +45,67 @@ def load_config():
         # 滚动窗口
         ROLLING_WINDOW = time_config["rolling_window"]
 
+        # 块读取允许夹带的空闲寄存器个数
+        MODBUS_MAX_GAP = modbus_config.get("max_gap", 8)
+        # 单次块读取的最大寄存器个数
+        MODBUS_MAX_COUNT = modbus_config.get("max_count", 125)
+        # 设备表：每条链路（串口/TCP）及其上的从站
+        MODBUS_PORTS = modbus_config.get("ports") or [{"port": "/dev/ttyCOM5", "devices": [{"slave": 1}]}]
+        # 寄存器配置：名称 -> 测点列表或 {byte_order, word_order, points}
+        MODBUS_PROFILES = modbus_config.get("profiles") or {}
+        # 从站连续失败多少次后熔断
+        MODBUS_BREAKER_FAILURES = modbus_config.get("breaker", {}).get("failure_threshold", 3)
+        # 熔断后首次探测间隔 单位:秒（探测失败后翻倍）
+        MODBUS_BREAKER_BACKOFF = modbus_config.get("breaker", {}).get("backoff", 30)
+        # 最大探测间隔 单位:秒
+        MODBUS_BREAKER_MAX_BACKOFF = modbus_config.get("breaker", {}).get("max_backoff", 600)
+
+        # 入库线程数
+        INGEST_WORKERS = ingest_config.get("workers", 2)
+        # 入库队列容量
+        INGEST_QUEUE_SIZE = ingest_config.get("queue_size", 100)
+        # 队列满时的策略 block / drop_oldest / spill
+        INGEST_OVERFLOW = ingest_config.get("overflow", "block")
+        # spill 策略下的溢写目录
+        INGEST_SPILL_DIR = ingest_config.get("spill_dir", "spill")
+
+        # 批量写入条数
+        BATCH_SIZE = batch_config.get("size", 200)
+        # 批量写入最长等待时间 单位:秒
+        BATCH_INTERVAL = batch_config.get("interval", 5)
+
+        # 数据库不可用时的本地落盘目录
+        SPOOL_DIR = spool_config.get("dir", "spool")
+        # 落盘段文件大小 单位:MB
+        SPOOL_SEGMENT_SIZE = spool_config.get("segment_size", 4)
+        # 回放失败重试间隔 单位:秒
+        SPOOL_RETRY_INTERVAL = spool_config.get("retry_interval", 10)
+
+        # 是否启用死区过滤
+        DEADBAND_ENABLED = deadband_config.get("enabled", False)
+        # 最长静默时间 单位:秒，超过后即使数值未变化也写入
+        DEADBAND_HEARTBEAT = deadband_config.get("heartbeat", 300)
+        # 字段死区：字段 -> {abs: 绝对值} 或 {pct: 百分比}
+        DEADBAND_FIELDS = deadband_config.get("fields") or {}
+
+        # 是否启用 well_data 分区维护
+        PARTITION_ENABLED = partition_config.get("enabled", False)
+        # 分区粒度 day / month
+        PARTITION_GRANULARITY = partition_config.get("granularity", "day")
+        # 提前创建的分区个数
+        PARTITION_PREMAKE = partition_config.get("premake", 7)
+        # 数据保留天数，0 表示不删除
+        PARTITION_RETENTION_DAYS = partition_config.get("retention_days", 0)
+        # 分区维护间隔 单位:秒
+        PARTITION_INTERVAL = partition_config.get("interval", 3600)
+
+        # 是否维护多粒度汇总表
+        ROLLUP_ENABLED = rollup_config.get("enabled", False)
+        # 曲线查询单个设备返回的最大点数，超过时改用汇总数据
+        ROLLUP_MAX_POINTS = rollup_config.get("max_points", 1500)
+        # 样本值最长保持时间，汇总按采样保持时间加权，超过视为数据中断
+        ROLLUP_MAX_HOLD = rollup_config.get("max_hold", 600)
+
     return config_original, Config
 
 
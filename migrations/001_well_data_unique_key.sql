@@ -0,0 +1,11 @@
+-- ----------------------------
+-- well_data 唯一键：落盘队列回放使用 INSERT IGNORE，依赖 (code, create_time) 保证幂等
+-- 同时切换为 InnoDB，批量写入失败时整体回滚
+-- ----------------------------
+ALTER TABLE `well_data` ENGINE = InnoDB;
+
+-- 清理已存在的同一时刻重复数据，保留 id 最小的一条
+DELETE t1 FROM `well_data` t1
+    INNER JOIN `well_data` t2 ON t1.`code` = t2.`code` AND t1.`create_time` = t2.`create_time` AND t1.`id` > t2.`id`;
+
+ALTER TABLE `well_data` ADD UNIQUE INDEX `uk_code_create_time`(`code`, `create_time`) USING BTREE;
@@ -0,0 +1,13 @@
+-- ----------------------------
+-- well_data 按天 RANGE 分区：查询按 create_time 范围裁剪分区，过期数据整分区删除
+-- 分区表的主键/唯一键必须包含分区列，主键改为 (id, create_time)
+-- 现有数据全部放入 p_history，之后的分区由 PartitionManager 从 pmax 拆分创建
+-- ----------------------------
+ALTER TABLE `well_data` DROP PRIMARY KEY, ADD PRIMARY KEY (`id`, `create_time`) USING BTREE;
+
+SET @partition_sql = CONCAT('ALTER TABLE `well_data` PARTITION BY RANGE (TO_DAYS(`create_time`)) (',
+    'PARTITION `p_history` VALUES LESS THAN (', TO_DAYS(CURDATE()), '), ',
+    'PARTITION `pmax` VALUES LESS THAN MAXVALUE)');
+PREPARE stmt FROM @partition_sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
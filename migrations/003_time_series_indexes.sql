@@ -0,0 +1,6 @@
+-- ----------------------------
+-- 时序查询复合索引：按井号 + 有效标记 + 时间范围扫描，只读取需要的行
+-- ----------------------------
+ALTER TABLE `well_data` ADD INDEX `idx_code_valid_create_time`(`code`, `valid`, `create_time`) USING BTREE;
+
+ALTER TABLE `alarm` ADD INDEX `idx_valid_alarm_time`(`valid`, `alarm_time`) USING BTREE;
@@ -0,0 +1,9 @@
+-- ----------------------------
+-- device_data 唯一键：重复数据检测改为内存指纹集合，(device_id, cmt5_time) 唯一键配合 INSERT IGNORE 兜底
+-- ----------------------------
+
+-- 清理已存在的同一时刻重复数据，保留 id 最小的一条
+DELETE t1 FROM `device_data` t1
+    INNER JOIN `device_data` t2 ON t1.`device_id` = t2.`device_id` AND t1.`cmt5_time` = t2.`cmt5_time` AND t1.`id` > t2.`id`;
+
+ALTER TABLE `device_data` ADD UNIQUE INDEX `uk_device_id_cmt5_time`(`device_id`, `cmt5_time`) USING BTREE;
@@ -0,0 +1,9 @@
+-- ----------------------------
+-- 汇总表改为按采样保持时间加权：新增 covered_seconds，各字段 _sum 改为 值 × 保持秒数 的积分
+-- 执行后重新回填历史汇总：python -m application.data.rollup_backfill --start "2025-01-01 00:00:00"
+-- device_data_rollup 由 data_management 启动时自动回填最近 24 小时
+-- ----------------------------
+
+ALTER TABLE `well_data_rollup` ADD COLUMN `covered_seconds` double NOT NULL DEFAULT 0 COMMENT '有数据覆盖的秒数' AFTER `last_time`;
+
+ALTER TABLE `device_data_rollup` ADD COLUMN `covered_seconds` double NOT NULL DEFAULT 0 COMMENT '有数据覆盖的秒数' AFTER `last_time`;
@@ -56,7 +56,8 @@ CREATE TABLE `alarm`  (
   `create_time` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
   `update_time` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
   `valid` tinyint NOT NULL DEFAULT 1 COMMENT '是否有效 1是 0否',
-  PRIMARY KEY (`id`) USING BTREE
+  PRIMARY KEY (`id`) USING BTREE,
+  INDEX `idx_valid_alarm_time`(`valid`, `alarm_time`) USING BTREE
 ) ENGINE = MyISAM AUTO_INCREMENT = 2 CHARACTER SET = utf8mb4 COLLATE = utf8mb4_0900_ai_ci ROW_FORMAT = Dynamic;
 
 -- ----------------------------
@@ -327,7 +328,63 @@ CREATE TABLE `well_data`  (
   `create_time` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
   `update_time` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
   `valid` tinyint NOT NULL DEFAULT 1 COMMENT '是否有效 1是 0否',
-  PRIMARY KEY (`id`) USING BTREE
-) ENGINE = MyISAM AUTO_INCREMENT = 1 CHARACTER SET = utf8mb4 COLLATE = utf8mb4_0900_ai_ci ROW_FORMAT = Dynamic;
+  PRIMARY KEY (`id`, `create_time`) USING BTREE,
+  UNIQUE INDEX `uk_code_create_time`(`code`, `create_time`) USING BTREE,
+  INDEX `idx_code_valid_create_time`(`code`, `valid`, `create_time`) USING BTREE
+) ENGINE = InnoDB AUTO_INCREMENT = 1 CHARACTER SET = utf8mb4 COLLATE = utf8mb4_0900_ai_ci ROW_FORMAT = Dynamic
+PARTITION BY RANGE (to_days(`create_time`))
+PARTITIONS 1
+(PARTITION `pmax` VALUES LESS THAN (MAXVALUE) ENGINE = InnoDB MAX_ROWS = 0 MIN_ROWS = 0 )
+;
+
+-- ----------------------------
+-- Table structure for well_data_rollup
+-- ----------------------------
+DROP TABLE IF EXISTS `well_data_rollup`;
+CREATE TABLE `well_data_rollup`  (
+  `code` varchar(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_0900_ai_ci NOT NULL COMMENT '井号',
+  `resolution` int NOT NULL COMMENT '汇总粒度 单位:秒',
+  `bucket` datetime NOT NULL COMMENT '时间桶起点',
+  `sample_count` int NOT NULL COMMENT '样本数',
+  `last_time` datetime NOT NULL COMMENT '桶内最后一条数据的时间',
+  `covered_seconds` double NOT NULL COMMENT '有数据覆盖的秒数',
+  `dp_sum` double NOT NULL COMMENT 'dp 合计',
+  `dp_min` double NOT NULL COMMENT 'dp 最小值',
+  `dp_max` double NOT NULL COMMENT 'dp 最大值',
+  `dp_last` double NOT NULL COMMENT 'dp 最后值',
+  `gvf_sum` double NOT NULL COMMENT 'gvf 合计',
+  `gvf_min` double NOT NULL COMMENT 'gvf 最小值',
+  `gvf_max` double NOT NULL COMMENT 'gvf 最大值',
+  `gvf_last` double NOT NULL COMMENT 'gvf 最后值',
+  `gas_flow_rate_sum` double NOT NULL COMMENT 'gas_flow_rate 合计',
+  `gas_flow_rate_min` double NOT NULL COMMENT 'gas_flow_rate 最小值',
+  `gas_flow_rate_max` double NOT NULL COMMENT 'gas_flow_rate 最大值',
+  `gas_flow_rate_last` double NOT NULL COMMENT 'gas_flow_rate 最后值',
+  `liquid_flow_rate_sum` double NOT NULL COMMENT 'liquid_flow_rate 合计',
+  `liquid_flow_rate_min` double NOT NULL COMMENT 'liquid_flow_rate 最小值',
+  `liquid_flow_rate_max` double NOT NULL COMMENT 'liquid_flow_rate 最大值',
+  `liquid_flow_rate_last` double NOT NULL COMMENT 'liquid_flow_rate 最后值',
+  `oil_flow_rate_sum` double NOT NULL COMMENT 'oil_flow_rate 合计',
+  `oil_flow_rate_min` double NOT NULL COMMENT 'oil_flow_rate 最小值',
+  `oil_flow_rate_max` double NOT NULL COMMENT 'oil_flow_rate 最大值',
+  `oil_flow_rate_last` double NOT NULL COMMENT 'oil_flow_rate 最后值',
+  `pressure_sum` double NOT NULL COMMENT 'pressure 合计',
+  `pressure_min` double NOT NULL COMMENT 'pressure 最小值',
+  `pressure_max` double NOT NULL COMMENT 'pressure 最大值',
+  `pressure_last` double NOT NULL COMMENT 'pressure 最后值',
+  `temperature_sum` double NOT NULL COMMENT 'temperature 合计',
+  `temperature_min` double NOT NULL COMMENT 'temperature 最小值',
+  `temperature_max` double NOT NULL COMMENT 'temperature 最大值',
+  `temperature_last` double NOT NULL COMMENT 'temperature 最后值',
+  `water_cut_sum` double NOT NULL COMMENT 'water_cut 合计',
+  `water_cut_min` double NOT NULL COMMENT 'water_cut 最小值',
+  `water_cut_max` double NOT NULL COMMENT 'water_cut 最大值',
+  `water_cut_last` double NOT NULL COMMENT 'water_cut 最后值',
+  `water_flow_rate_sum` double NOT NULL COMMENT 'water_flow_rate 合计',
+  `water_flow_rate_min` double NOT NULL COMMENT 'water_flow_rate 最小值',
+  `water_flow_rate_max` double NOT NULL COMMENT 'water_flow_rate 最大值',
+  `water_flow_rate_last` double NOT NULL COMMENT 'water_flow_rate 最后值',
+  PRIMARY KEY (`code`, `resolution`, `bucket`) USING BTREE
+) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_0900_ai_ci ROW_FORMAT = Dynamic;
 
 SET FOREIGN_KEY_CHECKS = 1;
@@ -1,11 +1,15 @@
 import threading
 from application import app
 from application.data.collector import read_data
+from application.data.partition_manager import well_data_partitions
 
 
 if __name__ == '__main__':
     # 采集处理数据
     data_thread = threading.Thread(target=read_data, daemon=True)
     data_thread.start()
+    # well_data 分区维护
+    if app.config["PARTITION_ENABLED"]:
+        well_data_partitions.start(app.config["PARTITION_INTERVAL"])
     # 启动Flask服务
     app.run(host=app.config["HOST"], port=app.config["PORT"], debug=False)